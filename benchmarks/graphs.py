@@ -0,0 +1,208 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Synthetic object graphs of representative shapes for the benchmarks
+"""
+import random
+
+import numpy as np
+
+from reprbuild import ReprParser
+
+
+class Bag:
+    """Object holding any attributes, all of them listed in _repr_attrs
+
+    Args:
+        name (str): name of the object, the first attribute of the representation
+        **attrs (params): the other attributes, in representation order
+    """
+
+    __class_name__ = "Bag"
+
+    def __init__(self, name=None, **attrs):
+        self._repr_attrs = ["name", *attrs]
+        self.name = name
+        for attr_name, value in attrs.items():
+            setattr(self, attr_name, value)
+
+    @classmethod
+    def rebuild(cls, obj_repr):
+        """Return an instance with every attribute of the representation rebuilt"""
+        parser = ReprParser(obj_repr, rebuilders=REBUILDERS)
+        new_obj = cls(parser.name or None)
+        for attr_name in parser.obj_defn:
+            if attr_name != "name":
+                new_obj._repr_attrs.append(attr_name)
+                setattr(new_obj, attr_name, parser.rebuild(attr_name))
+        return new_obj
+
+
+class Record(Bag):
+    """Small object with a few scalar attributes"""
+
+    __class_name__ = "Record"
+
+
+class Link(Bag):
+    """Member of a chain, tree, DAG or cycle"""
+
+    __class_name__ = "Link"
+
+
+class Holder(Bag):
+    """Object holding numpy arrays"""
+
+    __class_name__ = "Holder"
+
+
+REBUILDERS = [Bag, Record, Link, Holder]
+
+
+def _record(index, rng):
+    return Record(
+        f"r{index}",
+        value=index,
+        score=rng.random(),
+        label=f"label {index % 17}",
+        flags=(index % 2 == 0, index % 3 == 0),
+    )
+
+
+def wide(size, rng):
+    """One object with size scalar attributes"""
+    attrs = {}
+    for index in range(size):
+        kind = index % 3
+        if kind == 0:
+            attrs[f"a{index}"] = index
+        elif kind == 1:
+            attrs[f"a{index}"] = rng.random()
+        else:
+            attrs[f"a{index}"] = f"text {index}"
+    return Bag("wide", **attrs)
+
+
+def deep(size, _):
+    """Chain of size objects, each holding the next one"""
+    head = None
+    for index in range(size - 1, -1, -1):
+        head = Link(f"l{index}", value=index, next=head)
+    return head
+
+
+def dag(size, rng):
+    """Layers of about size objects, each holding two objects of the next layer"""
+    width = max(2, int(size**0.5))
+    layer = [Link(f"d{index}", value=index, kids=[]) for index in range(width)]
+    count = width
+    while count < size:
+        upper = [
+            Link(f"d{count + index}", value=index, kids=rng.sample(layer, 2))
+            for index in range(width)
+        ]
+        count += width
+        layer = upper
+    return Bag("dag", roots=layer)
+
+
+def cycles(size, _):
+    """Rings of 50 objects, each object holding the next one and the first of its ring"""
+    rings = []
+    for start in range(0, size, 50):
+        ring = [Link(f"c{start + index}", value=index) for index in range(50)]
+        for index, link in enumerate(ring):
+            link.next = ring[(index + 1) % len(ring)]
+            link.first = ring[0]
+            link._repr_attrs.extend(["next", "first"])
+        rings.append(ring[0])
+    return Bag("cycles", rings=rings)
+
+
+def numeric(size, rng):
+    """Object with a list of size floats and a list of size ints"""
+    return Bag(
+        "numeric",
+        floats=[rng.random() for _ in range(size)],
+        ints=list(range(size)),
+    )
+
+
+def arrays(size, _):
+    """One object holding two arrays of 100 elements for every 100 of size"""
+    return Bag(
+        "arrays",
+        holders=[
+            Holder(
+                f"h{index}",
+                values=np.linspace(0.0, 1.0, 100),
+                counts=np.arange(100, dtype=np.int32).reshape(10, 10),
+            )
+            for index in range(max(1, size // 100))
+        ],
+    )
+
+
+def dict_of_objects(size, rng):
+    """Object holding a dict of size records keyed by name"""
+    return Bag(
+        "index", records={f"k{index}": _record(index, rng) for index in range(size)}
+    )
+
+
+# Graph shape name mapped to (generator, build_repr options, operations not run)
+SHAPES = {
+    "wide": (wide, {}, ()),
+    # The recursive engine stops at MAXRECURSION levels so chains use the work stack, the
+    # rebuild methods and fingerprint call each other once per level so they are skipped
+    "deep": (deep, {"engine": "iterative"}, ("rebuild", "fingerprint")),
+    "dag": (dag, {}, ()),
+    "cycles": (cycles, {}, ()),
+    "numeric": (numeric, {}, ()),
+    "arrays": (arrays, {}, ()),
+    "dict_of_objects": (dict_of_objects, {}, ()),
+}
+
+
+def make_graph(shape, size, seed=0):
+    """Return the root object of a graph and the build_repr options for it
+    Args:
+        shape (str): one of the names in SHAPES
+        size (int): approximate number of objects or values in the graph
+        seed (int): seed of the random values, so every run builds the same graph
+    Returns:
+        tuple: (root object, dict of build_repr options)
+    Raises:
+        KeyError: if shape is not known
+    """
+    generator, options, _ = SHAPES[shape]
+    root = generator(size, random.Random(seed))
+    return root, dict(options, attr_list=root._repr_attrs)
+
+
+def make_batch(shape, size, graph_size=10):
+    """Return a batch of small graphs holding about size objects or values between them
+    Args:
+        shape (str): one of the names in SHAPES
+        size (int): approximate number of objects or values in the whole batch
+        graph_size (int): approximate number of objects or values in each graph, each
+                          generated with its own seed
+    Returns:
+        tuple: (list of root objects, dict of build_repr options for every root)
+    Raises:
+        KeyError: if shape is not known
+    """
+    roots = [
+        make_graph(shape, graph_size, seed)[0]
+        for seed in range(max(1, size // graph_size))
+    ]
+    return roots, dict(SHAPES[shape][1], attr_list=roots[0]._repr_attrs)
@@ -0,0 +1,335 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Time build_repr, build_repr_many, ReprParser, format_repr, the get accessors, rebuild,
+fingerprint and the binary format over growing graphs
+"""
+import gc
+import hashlib
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from getopt import getopt, GetoptError
+
+from reprbuild import build_repr, build_repr_many, fingerprint, format_repr, ReprParser
+
+from graphs import make_batch, make_graph, REBUILDERS, SHAPES
+
+USAGE = """run_benchmarks.py -s <shapes> -p <operations> -n <sizes> -r <repeats>
+                        -w <results> -b <baseline> -t <threshold> [-q]
+         shapes     : comma separated graph shapes, default all of
+                      wide,deep,dag,cycles,numeric,arrays,dict_of_objects
+         operations : comma separated operations, default all of
+                      build,loop,many,parse,format,get,rebuild,fingerprint,digest,
+                      binary,decode,round_trip,binary_round_trip,compact,
+                      decode_compact
+         sizes      : comma separated graph sizes, default 1000,4000,16000
+         repeats    : timed runs of each operation, the fastest is kept, default 5
+         results    : write the results as JSON to this file
+         baseline   : compare with the results saved in this file, exit with status 1
+                      if any operation is slower or uses more memory than allowed
+         threshold  : fraction an operation can be slower or use more memory than the
+                      baseline before it is flagged, default 0.25
+         -q         : quick run with sizes 500,2000 and 3 repeats
+     """
+
+OPERATIONS = (
+    "build",
+    "loop",
+    "many",
+    "parse",
+    "format",
+    "get",
+    "rebuild",
+    "fingerprint",
+    "digest",
+    "binary",
+    "decode",
+    "round_trip",
+    "binary_round_trip",
+    "compact",
+    "decode_compact",
+)
+
+
+def _get_members(parser):
+    """Read every member of the root object through the get accessors"""
+    for attr_name in parser.obj_defn:
+        parser.get(attr_name)
+        parser.get_repr(attr_name)
+
+
+def _operation_inputs(root, options, batch):
+    """Return the operation name mapped to (function, argument) for a graph
+    Args:
+        root (object): root of the graph
+        options (dict): build_repr options for the graph
+        batch (tuple): (roots, build_repr options) of a batch of graphs of the same shape
+    """
+    text = build_repr(root, **options)
+    binary_options = dict(options, format="binary")
+    compact_options = dict(options, format="compact")
+    roots, batch_options = batch
+    return {
+        "build": (lambda source: build_repr(source, **options), root),
+        # The same batch built by a loop over build_repr and by build_repr_many
+        "loop": (
+            lambda sources: [build_repr(cur, **batch_options) for cur in sources],
+            roots,
+        ),
+        "many": (lambda sources: build_repr_many(sources, **batch_options), roots),
+        "parse": (ReprParser, text),
+        "format": (format_repr, text),
+        "get": (_get_members, ReprParser(text)),
+        "rebuild": (
+            lambda obj_repr: ReprParser(obj_repr, rebuilders=REBUILDERS).rebuild(),
+            text,
+        ),
+        "fingerprint": (lambda source: fingerprint(source, **options), root),
+        # Hash of the text of build_repr, what fingerprint replaces when member digests
+        # are not needed
+        "digest": (
+            lambda source: hashlib.sha256(
+                build_repr(source, **options).encode()
+            ).digest(),
+            root,
+        ),
+        # Against build and parse, the binary format is written during the walk of the
+        # graph and decoded without tokenizing text
+        "binary": (lambda source: build_repr(source, **binary_options), root),
+        "decode": (ReprParser, build_repr(root, **binary_options)),
+        # A representation built and read back, as the text and in the binary format
+        "round_trip": (lambda source: ReprParser(build_repr(source, **options)), root),
+        "binary_round_trip": (
+            lambda source: ReprParser(build_repr(source, **binary_options)),
+            root,
+        ),
+        # The compact format has fewer tokens to parse than the text
+        "compact": (lambda source: build_repr(source, **compact_options), root),
+        "decode_compact": (ReprParser, build_repr(root, **compact_options)),
+    }
+
+
+def measure(function, argument, repeats):
+    """Return the fastest wall time of repeats calls and the peak memory of one call
+    Args:
+        function (callable): operation to measure
+        argument (object): its argument, prepared before the timing starts
+        repeats (int): number of timed calls
+    Returns:
+        dict: {"time": seconds, "peak": bytes allocated at the peak}
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        gc.collect()
+        started = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - started)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        function(argument)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {"time": best, "peak": peak}
+
+
+def scaling(timings):
+    """Return the least squares slope of log(time) against log(size)
+    Args:
+        timings (dict): size mapped to {"time": seconds, ...}
+    Returns:
+        float: the exponent k of time ~ size**k, None with fewer than two sizes
+    """
+    points = [
+        (math.log(int(size)), math.log(result["time"]))
+        for size, result in timings.items()
+        if result["time"] > 0
+    ]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    if spread == 0:
+        return None
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+
+
+def run(shapes, operations, sizes, repeats):
+    """Run the benchmarks
+    Returns:
+        dict: {"meta": {...}, "results": {shape: {operation: {"sizes": {size:
+              {"time", "peak"}}, "scaling": exponent}}}}
+    """
+    results = {}
+    for shape in shapes:
+        skipped = SHAPES[shape][2]
+        shape_results = results[shape] = {}
+        for size in sizes:
+            root, options = make_graph(shape, size)
+            inputs = _operation_inputs(root, options, make_batch(shape, size))
+            for operation in operations:
+                if operation in skipped:
+                    continue
+                function, argument = inputs[operation]
+                timings = shape_results.setdefault(operation, {"sizes": {}})["sizes"]
+                timings[str(size)] = measure(function, argument, repeats)
+                print(
+                    f"{shape:<16}{operation:<18}{size:>8}"
+                    f"{timings[str(size)]['time'] * 1000:>12.3f} ms"
+                    f"{timings[str(size)]['peak'] / 1024:>12.1f} KiB"
+                )
+        for operation_results in shape_results.values():
+            operation_results["scaling"] = scaling(operation_results["sizes"])
+    return {
+        "meta": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a message for every measurement worse than the baseline by more than threshold
+    Args:
+        results (dict): returned by run()
+        baseline (dict): earlier results from run()
+        threshold (float): fraction a time or peak can grow before it is flagged
+    Returns:
+        list: str messages, empty if nothing regressed
+    """
+    regressions = []
+    for shape, shape_results in results["results"].items():
+        for operation, operation_results in shape_results.items():
+            base_sizes = (
+                baseline["results"].get(shape, {}).get(operation, {}).get("sizes", {})
+            )
+            for size, result in operation_results["sizes"].items():
+                base = base_sizes.get(size)
+                if base is None:
+                    continue
+                for metric in ("time", "peak"):
+                    if base[metric] > 0 and result[metric] > base[metric] * (
+                        1 + threshold
+                    ):
+                        regressions.append(
+                            f"{shape} {operation} {size}: {metric} "
+                            f"{result[metric] / base[metric]:.2f}x the baseline"
+                        )
+    return regressions
+
+
+def _get_cmdline(argv):
+    try:
+        opts, _ = getopt(
+            argv,
+            "hqs:p:n:r:w:b:t:",
+            [
+                "shapes=",
+                "operations=",
+                "sizes=",
+                "repeats=",
+                "write=",
+                "baseline=",
+                "threshold=",
+                "quick",
+            ],
+        )
+    except GetoptError:
+        print(USAGE)
+        sys.exit(2)
+    options = {
+        "shapes": list(SHAPES),
+        "operations": list(OPERATIONS),
+        "sizes": [1000, 4000, 16000],
+        "repeats": 5,
+        "write": None,
+        "baseline": None,
+        "threshold": 0.25,
+    }
+    for opt, arg in opts:
+        if opt == "-h":
+            print(USAGE)
+            sys.exit()
+        elif opt in ("-q", "--quick"):
+            options["sizes"] = [500, 2000]
+            options["repeats"] = 3
+        elif opt in ("-s", "--shapes"):
+            options["shapes"] = arg.split(",")
+        elif opt in ("-p", "--operations"):
+            options["operations"] = arg.split(",")
+        elif opt in ("-n", "--sizes"):
+            options["sizes"] = [int(size) for size in arg.split(",")]
+        elif opt in ("-r", "--repeats"):
+            options["repeats"] = int(arg)
+        elif opt in ("-w", "--write"):
+            options["write"] = arg
+        elif opt in ("-b", "--baseline"):
+            options["baseline"] = arg
+        elif opt in ("-t", "--threshold"):
+            options["threshold"] = float(arg)
+    unknown = [shape for shape in options["shapes"] if shape not in SHAPES]
+    unknown += [name for name in options["operations"] if name not in OPERATIONS]
+    if unknown:
+        print(f"Unknown shapes or operations: {', '.join(unknown)}")
+        print(USAGE)
+        sys.exit(2)
+    return options
+
+
+def main():
+    """Run the benchmarks selected on the command line, saving and comparing the results
+    Args:
+
+    Returns:
+
+    Raises:
+
+    Additional Information:
+        Exits with status 1 if a baseline was given and a measurement regressed.
+    """
+    options = _get_cmdline(sys.argv[1:])
+    results = run(
+        options["shapes"], options["operations"], options["sizes"], options["repeats"]
+    )
+    for shape, shape_results in results["results"].items():
+        for operation, operation_results in shape_results.items():
+            if operation_results["scaling"] is not None:
+                print(
+                    f"{shape:<16}{operation:<18} scales as size**"
+                    f"{operation_results['scaling']:.2f}"
+                )
+    if options["write"] is not None:
+        with open(options["write"], "w", encoding="utf-8") as results_file:
+            json.dump(results, results_file, indent=1)
+    if options["baseline"] is not None:
+        with open(options["baseline"], encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(results, baseline, options["threshold"])
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print("No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -14,5 +14,18 @@ Build a recursive representation such that eval(repr(A)) is a dictionary which c
 unambiguous enough that we can build a class method such that cls(A).build_repr(eval(A))
 is equivalent to A for most reasonable definitions of equivalence.
 """
-from .reprbuild import build_repr, is_valid_repr, split_repr, ReprBuildError
-from .reprparse import ReprParser, format_repr
+from .reprbase import clear_plan_cache, ReprBuildError
+from .reprbuild import build_repr, build_repr_many, is_valid_repr, split_repr
+from .reprasync import async_build_repr, async_format_repr
+from .reprbinary import decode_binary, encode_binary
+from .reprcache import ReprCached
+from .reprcolumns import ReprColumns
+from .reprdiff import apply_diff, diff_repr
+from .reprhandlers import register_type_handler, unregister_type_handler
+from .reprhash import fingerprint, ReprFingerprint
+from .reprliteral import parse_literal, ReprSyntaxError
+from .reprparse import ReprParser, format_repr, print_repr
+from .reprprofile import profile_repr, ReprProfile
+from .reprstore import ReprStore
+from .reprsymbols import decode_symbols, encode_symbols
+from .reprwalk import build_repr_to, iter_repr
@@ -18,3 +18,24 @@ is equivalent to A for most reasonable definitions of equivalence.
 REPRATTRIBUTES = "_repr_attrs"
 MAXRECURSION = 200
 REBUILDER = "rebuild"
+REFERENCE = "reprref"
+# ndarrays with more data bytes than this are stored as base64 rather than a list
+NDARRAYBASE64 = 256
+# containers with fewer members than this are built serially when build_repr has workers
+PARALLELTHRESHOLD = 1000
+# class name of the marker put in place of the members elided once a build_repr budget runs out
+ELIDED = "reprelided"
+# key holding the row class in the definition of a columnar list or tuple of objects
+COLUMNS = "reprcolumns"
+# lists and tuples with fewer objects than this are not made columnar by build_repr(columnar=True)
+COLUMNARTHRESHOLD = 16
+# first member of a compact representation, followed by its symbol table and its body
+SYMBOLS = "reprsymbols"
+# class name of the marker put in a stored subtree in place of an object stored on its own
+STORED = "reprstored"
+# class name of the marker put in a stored subtree in place of a container stored as pages
+STOREDPAGES = "reprpages"
+# class name of the marker a set is stored as, its members in a canonical order
+STOREDSET = "reprset"
+# lists, tuples and dicts with more members than this are stored by ReprStore in pages of this size
+STOREPAGESIZE = 256
@@ -0,0 +1,102 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Lossless encoding of numpy arrays for the recursive representations
+"""
+import base64
+
+from .constants import NDARRAYBASE64
+from .reprbase import ReprBuildError
+from .reprliteral import parse_literal, ReprSyntaxError
+
+# dtype.char of the types whose tolist() values repr() and parse back exactly
+_LIST_DTYPE_CHARS = frozenset("?bhilqBHILQefdFD")
+
+
+def ndarray_spec(array):
+    """Return the text stored as the definition of an ndarray
+    Args:
+        array (np.ndarray): array to be encoded
+    Returns:
+        str: repr() of a dict with the dtype, shape, order, encoding and data of the array,
+             None if the array holds python objects
+    Additional Information:
+        Arrays larger than NDARRAYBASE64 bytes, or with a dtype whose elements do not have
+        an exact literal, store the raw buffer as base64. Smaller arrays store a flat list.
+        Either way the elements are converted in a single call, never one at a time.
+    """
+    import numpy as np
+
+    dtype = array.dtype
+    if dtype.hasobject:
+        return None
+    order = "F" if array.flags.f_contiguous and not array.flags.c_contiguous else "C"
+    if dtype.fields is None and dtype.subdtype is None:
+        dtype_spec = dtype.str
+    else:
+        dtype_spec = dtype.descr
+    if (
+        array.nbytes > NDARRAYBASE64
+        or dtype.char not in _LIST_DTYPE_CHARS
+        # complex values with nan or inf parts do not have a literal repr()
+        or (dtype.kind == "c" and not np.isfinite(array).all())
+    ):
+        encoding = "base64"
+        data = base64.b64encode(array.tobytes(order=order)).decode("ascii")
+    else:
+        encoding = "list"
+        data = array.ravel(order=order).tolist()
+    return repr(
+        {
+            "dtype": dtype_spec,
+            "shape": array.shape,
+            "order": order,
+            "encoding": encoding,
+            "data": data,
+        }
+    )
+
+
+def ndarray_from_spec(spec):
+    """Return the ndarray described by a parsed ndarray_spec() dict
+    Args:
+        spec (dict): dict with the dtype, shape, order, encoding and data of the array
+    Returns:
+        np.ndarray: a new writeable array
+    Raises:
+        KeyError, TypeError, ValueError: if spec does not describe an array
+    """
+    import numpy as np
+
+    dtype = np.dtype(spec["dtype"])
+    if spec["encoding"] == "base64":
+        array = np.frombuffer(bytearray(base64.b64decode(spec["data"])), dtype=dtype)
+    elif spec["encoding"] == "list":
+        array = np.array(spec["data"], dtype=dtype)
+    else:
+        raise ValueError(f"Unknown ndarray encoding {spec['encoding']}")
+    return array.reshape(spec["shape"], order=spec["order"])
+
+
+def ndarray_from_text(text):
+    """Return the ndarray described by the text of its definition
+    Args:
+        text (str): text returned by ndarray_spec()
+    Returns:
+        np.ndarray: a new writeable array
+    Raises:
+        ReprBuildError: if text does not describe an array
+    """
+    try:
+        return ndarray_from_spec(parse_literal(text))
+    except (ReprSyntaxError, KeyError, TypeError, ValueError) as error:
+        raise ReprBuildError(f"Invalid ndarray representation: {error}") from error
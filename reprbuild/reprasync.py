@@ -0,0 +1,258 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Coroutines building and formatting representations without blocking the event loop
+"""
+import functools
+from time import perf_counter
+
+from .constants import MAXRECURSION
+from .reprbase import _BuildState, _get_summary, ReprBuildError
+from .reprbuild import _ReprBuilder, build_repr, is_valid_repr
+from .reprliteral import _literal_steps, ReprSyntaxError
+from .reprparse import _iter_format_lines, ReprParser, format_repr
+from .reprsymbols import _compact_steps, _symbol_steps, is_compact
+from .reprwalk import iter_defn_repr, ReprWalker
+
+# Work stack entries, text chunks, lines or tokens handled before control is given back
+YIELD_STEPS = 1000
+
+# Seconds of work before control is given back, whatever the number of steps
+YIELD_INTERVAL = 0.005
+
+# Steps taken between two reads of the clock, each bounded to a few hundred members
+_SLICE_STEPS = 64
+
+# Options of build_repr the cooperative build supports, the others need offload
+_COOPERATIVE_OPTIONS = frozenset(
+    (
+        "attr_list",
+        "depth",
+        "deepdive",
+        "shared_refs",
+        "engine",
+        "max_recursion",
+        "format",
+    )
+)
+
+
+class _Pacer:
+    """Gives control back to the event loop every few steps or milliseconds of work
+
+    Args:
+        every (int): steps taken before control is given back
+        interval (float): seconds of work before control is given back
+    Raises:
+        ReprBuildError: if every or interval is not a positive number
+    """
+
+    __slots__ = ("every", "interval", "pending", "last")
+
+    def __init__(self, every, interval):
+        if not isinstance(every, int) or isinstance(every, bool) or every < 1:
+            raise ReprBuildError(
+                f"yield_every must be a positive number, not {every!r}"
+            )
+        if (
+            not isinstance(interval, (int, float))
+            or isinstance(interval, bool)
+            or interval <= 0
+        ):
+            raise ReprBuildError(
+                f"yield_interval must be a positive number, not {interval!r}"
+            )
+        self.every = every
+        self.interval = interval
+        self.pending = 0
+        self.last = perf_counter()
+
+    @property
+    def slice_steps(self):
+        """Steps to take before calling step()"""
+        return min(self.every, _SLICE_STEPS)
+
+    @property
+    def deadline(self):
+        """time.perf_counter() value at which control is due to be given back"""
+        return self.last + self.interval
+
+    async def step(self, count):
+        """Record count steps taken, yielding to the event loop if it is due"""
+        self.pending += count
+        if self.pending >= self.every or perf_counter() - self.last >= self.interval:
+            import asyncio
+
+            await asyncio.sleep(0)
+            self.pending = 0
+            self.last = perf_counter()
+
+    async def join(self, chunks):
+        """Return the concatenated chunks of an iterator, taking them a slice at a time.
+        An empty chunk ends the slice early, it marks work done without any text"""
+        parts = []
+        block = []
+        slice_steps = self.slice_steps
+        for chunk in chunks:
+            block.append(chunk)
+            if not chunk or len(block) >= slice_steps:
+                parts.append("".join(block))
+                await self.step(len(block))
+                block = []
+        parts += block
+        return "".join(parts)
+
+    async def drain(self, steps):
+        """Run a generator yielding after every slice_steps steps, returning its value"""
+        slice_steps = self.slice_steps
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+            await self.step(slice_steps)
+
+
+async def _offload(offload, function, *args, **kwargs):
+    """Run function on the executor offload, or the default executor of the loop if True"""
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    executor = None if offload is True else offload
+    return await loop.run_in_executor(
+        executor, functools.partial(function, *args, **kwargs)
+    )
+
+
+async def async_build_repr(
+    source,
+    offload=None,
+    yield_every=YIELD_STEPS,
+    yield_interval=YIELD_INTERVAL,
+    **kwargs,
+):
+    """Create the recursive representation of the source object without blocking the loop
+    Args:
+        source (Type)    : Object to be built into a representation
+        offload (Union[Executor,bool]) : if given call build_repr on this executor, or on
+                              the default executor of the running loop if True, instead of
+                              building on the loop
+        yield_every (int) : work stack entries and text chunks handled before control is
+                            given back to the event loop
+        yield_interval (float) : seconds of work before control is given back, whatever the
+                            number of entries
+        **kwargs (params) : options of build_repr. Without offload only attr_list, depth,
+                            deepdive, shared_refs, engine, max_recursion and format are
+                            supported
+    Returns:
+        Union[str,bytes]: build_repr(source, **kwargs)
+    Raises:
+        ReprBuildError: if an option is not valid, or needs offload
+    Additional Information:
+        The object graph is walked with the work stack of the iterative engine, limited to
+        MAXRECURSION levels for the recursive engine, and the text, compact or binary
+        encoding is produced a slice at a time, so the result is the same as build_repr.
+        The walk reads the clock after every work stack entry, so control is given back
+        about every yield_interval seconds however wide the containers are. The object
+        graph must not change while the representation is built.
+    """
+    if offload is not None and offload is not False:
+        return await _offload(offload, build_repr, source, **kwargs)
+    unsupported = sorted(set(kwargs) - _COOPERATIVE_OPTIONS)
+    if unsupported:
+        raise ReprBuildError(
+            f"{', '.join(unsupported)} can only be used with async_build_repr with offload"
+        )
+    pacer = _Pacer(yield_every, yield_interval)
+    kwargs = dict(kwargs)
+    max_recursion = kwargs.pop("max_recursion", None)
+    builder = _ReprBuilder(kwargs)
+    if builder.engine == "recursive":
+        if max_recursion is not None:
+            raise ReprBuildError("max_recursion needs the iterative engine")
+        max_recursion = MAXRECURSION
+    elif max_recursion is None and not builder.shared_refs:
+        # Without the memo cycles are only cut by the recursion limit
+        max_recursion = MAXRECURSION
+
+    walker = ReprWalker(
+        builder.kwargs.get("depth", -1),
+        builder.kwargs.get("deepdive", False),
+        max_recursion,
+        _BuildState() if builder.shared_refs else None,
+    )
+    walker.start(source, builder.kwargs.get("attr_list"))
+    while not walker.done:
+        await pacer.step(walker.run(pacer.every - pacer.pending, pacer.deadline))
+    obj_defn = walker.result
+    if not is_valid_repr(obj_defn):
+        obj_defn = [_get_summary(source), obj_defn]
+    if builder.output_format == "binary":
+        from .reprbinary import _binary_steps
+
+        return await pacer.drain(_binary_steps(obj_defn, pacer.slice_steps))
+    if builder.output_format == "compact":
+        return await pacer.drain(_compact_steps(obj_defn, pacer.slice_steps))
+    return await pacer.join(iter_defn_repr(obj_defn))
+
+
+async def async_format_repr(
+    obj_repr,
+    indent="    ",
+    offload=None,
+    yield_every=YIELD_STEPS,
+    yield_interval=YIELD_INTERVAL,
+):
+    """Return the user friendly version of a representation without blocking the loop
+    Args:
+        obj_repr (Union[str,bytes,list]): Recursive object representation
+        indent (str): The starting indentation for this representation
+        offload (Union[Executor,bool]) : if given call format_repr on this executor, or on
+                              the default executor of the running loop if True
+        yield_every (int) : tokens parsed or lines formatted before control is given back
+                            to the event loop
+        yield_interval (float) : seconds of work before control is given back
+    Returns:
+        str: format_repr(obj_repr, indent)
+    Raises:
+        ReprBuildError: If argument is not a valid representation
+    Additional Information:
+        A representation string is parsed a slice of tokens at a time and the binary
+        encoding decoded a slice of values at a time. The members of wide containers are
+        formatted over several slices.
+    """
+    if offload is not None and offload is not False:
+        return await _offload(offload, format_repr, obj_repr, indent=indent)
+    pacer = _Pacer(yield_every, yield_interval)
+    if isinstance(obj_repr, str):
+        if is_compact(obj_repr):
+            steps = _symbol_steps(obj_repr, pacer.slice_steps)
+        else:
+            steps = _literal_steps(obj_repr, pacer.slice_steps)
+        try:
+            obj_repr = await pacer.drain(steps)
+        except ReprSyntaxError as error:
+            raise ReprBuildError(
+                f"ReprParser argument is invalid representation: {error}"
+            ) from error
+    elif isinstance(obj_repr, (bytes, bytearray, memoryview)):
+        from .reprbinary import _decode_steps
+
+        try:
+            obj_repr = await pacer.drain(_decode_steps(obj_repr, pacer.slice_steps))
+        except ReprBuildError as error:
+            raise ReprBuildError(
+                f"ReprParser argument is invalid representation: {error}"
+            ) from error
+    # Checks the representation, which is parsed already
+    ReprParser(obj_repr)
+    return await pacer.join(_iter_format_lines(obj_repr, indent, pause=True))
@@ -0,0 +1,286 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Error class, object summaries, attribute plans and build state shared by the build engines
+"""
+from .constants import REFERENCE
+
+# Compiled attribute plans, keyed by class and then by the shape of the attribute list
+_PLAN_CACHE = {}
+
+# ReprProfile of the active profile_repr() block, checked by the profiled calls
+_PROFILE = [None]
+
+
+class ReprBuildError(Exception):
+    """Base class for errors raised while processing a representation."""
+
+    def __init__(self, *message):
+        """Set the error message."""
+        super().__init__(" ".join(message))
+        self.message = " ".join(message)
+
+    def __str__(self):
+        """Return the message."""
+        if not isinstance(self.message, str):
+            return repr(self.message)
+        else:
+            return self.message
+
+
+def _get_summary(source):
+    """Create the summary information about the input object for the recursive representation."""
+    _summary = f"class: {source.__class__.__name__}"
+    _src_name = getattr(source, "name", None)
+    if _src_name is not None:
+        _summary += f",name: {_src_name}"
+
+    return _summary
+
+
+def _shared_summary(source, summaries):
+    """Return the summary of source, taken from summaries if its class can not name it
+    Args:
+        source (Unknown)  : Object the summary is for
+        summaries (dict)  : class mapped to the summary of all of its instances, or False if
+                            an instance can have a name
+    Additional Information:
+        Instances of a class without __dict__, __getattr__ or a name attribute, such as int,
+        float, tuple or list, all have the same summary.
+    """
+    source_class = source.__class__
+    summary = summaries.get(source_class)
+    if summary:
+        return summary
+    if summary is None:
+        if (
+            hasattr(source, "__dict__")
+            or hasattr(source_class, "name")
+            or hasattr(source_class, "__getattr__")
+        ):
+            summaries[source_class] = False
+        else:
+            summary = summaries[source_class] = _get_summary(source)
+            return summary
+    return _get_summary(source)
+
+
+class _ReprPlan:
+    """Resolved attribute plan shared by all instances of a class with the same attribute list
+
+    Args:
+        members (tuple): (attribute name, depth) pairs in representation order, a depth of None
+                         means the depth of the current build level is used
+        deepdive_attrs (tuple): names of the class level attributes added by deepdive, with
+                                dunders and callables already removed
+        class_state (tuple): snapshot of the class namespaces the plan was resolved against
+
+    Additional Information:
+        Instance attributes found in __dict__ can differ between instances of the same class
+        so they are merged in by resolve() on each build.
+    """
+
+    __slots__ = ("members", "deepdive_attrs", "class_state")
+
+    def __init__(self, members, deepdive_attrs=None, class_state=None):
+        self.members = members
+        self.deepdive_attrs = deepdive_attrs
+        self.class_state = class_state
+
+    def resolve(self, source):
+        """Return the (attribute name, depth) pairs to be built for the source object"""
+        if self.deepdive_attrs is None:
+            return self.members
+        members = dict(self.members)
+        obj_dict = getattr(source, "__dict__", None)
+        if obj_dict is not None:
+            for cur_name, cur_value in obj_dict.items():
+                if (
+                    cur_name not in members
+                    and not _is_dunder(cur_name)
+                    and not callable(cur_value)
+                ):
+                    members[cur_name] = None
+        for cur_name in self.deepdive_attrs:
+            if cur_name not in members:
+                members[cur_name] = None
+        return tuple(members.items())
+
+
+def _is_dunder(name):
+    return name.startswith("__") and name.endswith("__")
+
+
+def _class_state(source_class):
+    """Cheap fingerprint of the class namespaces used to detect changes to the class"""
+    return tuple(
+        (id(cur_class), len(cur_class.__dict__)) for cur_class in source_class.__mro__
+    )
+
+
+def _deepdive_attrs(source_class):
+    """List the class level attributes deepdive will include, skipping dunders and methods"""
+    attr_names = set()
+    skipped = set()
+    for cur_class in source_class.__mro__:
+        for cur_name, cur_value in cur_class.__dict__.items():
+            if cur_name in attr_names or cur_name in skipped:
+                continue
+            if _is_dunder(cur_name) or isinstance(
+                cur_value, (staticmethod, classmethod)
+            ):
+                skipped.add(cur_name)
+            elif callable(cur_value) and not isinstance(cur_value, property):
+                skipped.add(cur_name)
+            else:
+                attr_names.add(cur_name)
+    return tuple(sorted(attr_names))
+
+
+def _get_repr_plan(source, attr_list, deepdive):
+    """Return the cached attribute plan for the source object, resolving it if required
+    Args:
+        source (Unknown)   : Object the representation is being built for
+        attr_list (Union[list,dict,None]): Attributes to include in the representation
+        deepdive (boolean) : if True include class level attributes returned by dir()
+    Returns:
+        _ReprPlan: the plan for the class of source and the shape of attr_list
+    Raises:
+        ReprBuildError: if attr_list is not a list or a dict
+    """
+    if attr_list is None:
+        shape = None
+    elif isinstance(attr_list, list):
+        shape = tuple(attr_list)
+    elif isinstance(attr_list, dict):
+        shape = tuple(attr_list.items())
+    else:
+        raise ReprBuildError("member_list not of type list or dict")
+
+    source_class = type(source)
+    try:
+        class_plans = _PLAN_CACHE.get(source_class)
+        if class_plans is None:
+            class_plans = _PLAN_CACHE[source_class] = {}
+        plan = class_plans.get((shape, deepdive))
+    except TypeError:
+        # Unhashable depths in the attribute dict, the plan can not be cached
+        class_plans, plan = None, None
+
+    if plan is not None and (
+        plan.class_state is None or plan.class_state == _class_state(source_class)
+    ):
+        return plan
+
+    if attr_list is None:
+        members = ()
+    elif isinstance(attr_list, dict):
+        members = tuple(attr_list.items())
+    else:
+        members = tuple((cur_member, None) for cur_member in dict.fromkeys(attr_list))
+    if deepdive:
+        plan = _ReprPlan(
+            members, _deepdive_attrs(source_class), _class_state(source_class)
+        )
+    else:
+        plan = _ReprPlan(members)
+    if class_plans is not None:
+        class_plans[(shape, deepdive)] = plan
+    return plan
+
+
+def clear_plan_cache():
+    """Discard all of the cached attribute plans
+    Args:
+    Returns:
+    Raises:
+
+    Additional Information:
+        Plans are refreshed automatically when attributes are added to or removed from a
+        class. Call this after rebinding an existing class attribute to or from a method.
+    """
+    _PLAN_CACHE.clear()
+
+
+class _BuildState:
+    """State shared by every level of a single call to build_repr
+
+    Additional Information:
+        memo maps the id() of each container and object already built, together with the
+        depth and kind of the build, to [object, definition, reference number, owner]. The
+        owner is the ReprCached object whose members held the definition, or None. The object
+        is held so its id can not be reused during the build. All negative depths fully
+        expand the object so they share a single entry.
+        The first definition of an object seen a second time has ",ref: N" appended to its
+        summary and every later occurrence is replaced by [summary, (N, REFERENCE)].
+        events counts the back references and other values that stop the definitions
+        holding them being cached for ReprCached objects, deepest is the largest recursion
+        level reached and cache is the _CacheState once a ReprCached object is built.
+        parallel is the _ParallelBuild used for large containers, or None. budget is the
+        _Budget bounding the build, or None. columnar is the number of objects from which
+        lists and tuples are given columnar definitions, or None. summaries is the dict
+        of summaries shared by the builds of a batch, see _shared_summary(), or None.
+    """
+
+    __slots__ = (
+        "memo",
+        "next_ref",
+        "events",
+        "deepest",
+        "cache",
+        "parallel",
+        "budget",
+        "columnar",
+        "summaries",
+    )
+
+    def __init__(self):
+        self.memo = {}
+        self.next_ref = 0
+        self.events = 0
+        self.deepest = 0
+        self.cache = None
+        self.parallel = None
+        self.budget = None
+        self.columnar = None
+        self.summaries = None
+
+    def lookup(self, source, obj_defn, memo_key):
+        """Return a back reference if source was already built, otherwise record obj_defn"""
+        entry = self.memo.get(memo_key)
+        if entry is not None:
+            return self.reference(entry)
+        if not isinstance(source, (list, tuple, set, dict)) or len(source) > 0:
+            owner = None if self.cache is None else self.cache.owner()
+            self.memo[memo_key] = [source, obj_defn, None, owner]
+        return None
+
+    def reference(self, entry):
+        """Return the back reference marker for a memo entry, tagging its definition"""
+        obj_defn, ref = entry[1], entry[2]
+        self.events += 1
+        if ref is None:
+            self.next_ref += 1
+            ref = entry[2] = self.next_ref
+            obj_defn[0] = f"{obj_defn[0]},ref: {ref}"
+            if entry[3] is not None:
+                self.cache.taint(entry[3])
+        return [obj_defn[0], (str(ref), REFERENCE)]
+
+
+def _memo_lookup(state, source, obj_defn, depth, kind):
+    """Return a back reference if source was already built, otherwise record obj_defn for it"""
+    if state is None:
+        return None
+    return state.lookup(
+        source, obj_defn, (id(source), -1 if depth < 0 else depth, kind)
+    )
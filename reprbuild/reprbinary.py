@@ -0,0 +1,887 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Compact binary encoding of the [summary, definition] lists of the recursive representations
+
+Every value starts with a one byte tag. Strings, bytes and containers follow their tag with
+a one byte length when it is below 256 and a four byte length otherwise. Each distinct string
+is written once, later occurrences are written as its index in the order strings were first
+seen. Builtins of class int, float and complex whose summary is just their class are written
+as a single tag followed by the packed value.
+"""
+import math
+import mmap
+import struct
+from itertools import chain, islice, repeat
+
+from .constants import MAXRECURSION, REFERENCE, REPRATTRIBUTES
+from .reprbase import _get_repr_plan, _get_summary, _shared_summary, ReprBuildError
+from .reprcache import ReprCached
+from .reprhandlers import _builtin_defn, _DISPATCH, _resolve_handler, _UNRESOLVED
+
+BINARY_MAGIC = b"RPRB\x01"
+
+# Tags, the 32 suffix marks the four byte length form
+_NONE, _TRUE, _FALSE, _INT, _BIGINT, _FLOAT, _COMPLEX = range(7)
+_STR, _STR32, _STRREF, _STRREF32, _BYTES, _BYTES32 = range(7, 13)
+_LIST, _LIST32, _TUPLE, _TUPLE32, _DICT, _DICT32, _SET, _SET32 = range(13, 21)
+_INT_DEFN, _FLOAT_DEFN, _COMPLEX_DEFN = range(21, 24)
+
+_HEAD32 = struct.Struct("<BI")
+_U32 = struct.Struct("<I")
+_TAG_INT = struct.Struct("<Bq")
+_TAG_FLOAT = struct.Struct("<Bd")
+_TAG_COMPLEX = struct.Struct("<Bdd")
+_INT64 = struct.Struct("<q")
+_FLOAT64 = struct.Struct("<d")
+_COMPLEX128 = struct.Struct("<dd")
+
+# Tag for each container class
+_CONTAINER_TAGS = {list: _LIST, tuple: _TUPLE, dict: _DICT, set: _SET}
+_MIN_INT64, _MAX_INT64 = -(2**63), 2**63 - 1
+# Classes of the list items written as the string of their repr() without any checks
+_PLAIN_LEAVES = frozenset((str, int, float, complex, bool, bytes))
+# Classes whose subclasses are written as the class itself
+_BASE_CLASSES = (str, list, tuple, set, dict, int, float, complex, bytes)
+# Put between the slices of a wide container by _paced(), written as nothing
+_PAUSE = object()
+# Tag and one byte length of each string, string reference and container below 256 long
+_SHORT_HEADS = [
+    [bytes((tag, size)) for size in range(256)] for tag in range(_SET32 + 1)
+]
+
+
+def _head(tag, size):
+    """Return the tag and length prefix for a string, bytes or container"""
+    if size < 256:
+        return _SHORT_HEADS[tag][size]
+    return _HEAD32.pack(tag + 1, size)
+
+
+def _pack_int_defn(value):
+    """Return the packed form of an int builtin, or None if it does not fit in 64 bits"""
+    if not _MIN_INT64 <= value <= _MAX_INT64:
+        return None
+    return _TAG_INT.pack(_INT_DEFN, value)
+
+
+def _pack_float_defn(value):
+    """Return the packed form of a float builtin"""
+    return _TAG_FLOAT.pack(_FLOAT_DEFN, value)
+
+
+def _pack_complex_defn(value):
+    """Return the packed form of a complex builtin"""
+    return _TAG_COMPLEX.pack(_COMPLEX_DEFN, value.real, value.imag)
+
+
+def _pack_float_attr(value):
+    """Return the packed form of a float attribute, or None if it is a nan whose bits
+    are not the ones float(repr(value)) gives back"""
+    if math.isnan(value):
+        return None
+    return _TAG_FLOAT.pack(_FLOAT_DEFN, value)
+
+
+# Class, function giving back the text and packing function of each builtin class written
+# as a packed value
+_NUMBER_DEFNS = {
+    "int": (int, str, _pack_int_defn),
+    "float": (float, repr, _pack_float_defn),
+    "complex": (complex, repr, _pack_complex_defn),
+}
+# Summary a builtin of each of these classes has
+_NUMBER_SUMMARIES = {class_name: f"class: {class_name}" for class_name in _NUMBER_DEFNS}
+# Function packing an attribute of each class straight from its value, see _BinaryWriter
+_ATTR_PACKERS = {int: _pack_int_defn, float: _pack_float_attr}
+
+
+def _pack_number(defn):
+    """Return the packed form of the (repr, 'int') style definition of a builtin
+    Returns:
+        bytes: the tag and packed value, empty if the builtin is not written packed
+    """
+    number = _NUMBER_DEFNS.get(defn[1])
+    if number is None:
+        return b""
+    number_type, to_text, pack = number
+    try:
+        value = number_type(defn[0])
+    except ValueError:
+        return b""
+    # Only pack values that give back exactly the same text
+    if to_text(value) != defn[0]:
+        return b""
+    return pack(value) or b""
+
+
+def encode_binary(obj_defn):
+    """Encode a representation definition as bytes
+    Args:
+        obj_defn (Union[list,tuple,dict,set,str,bytes,int,float,complex,bool,None]):
+                    the [summary, definition] list of a representation, or any literal value
+                    made of the same types
+    Returns:
+        bytes: the binary representation, starting with BINARY_MAGIC
+    Raises:
+        ReprBuildError: if obj_defn holds a value of another type
+    Additional Information:
+        The definition is walked with a stack of the iterators over the open containers, so
+        there is no nesting depth limit. Strings and numbers are written as they are met,
+        only containers are pushed. decode_binary() returns a value equal to obj_defn.
+        Encoding a built definition takes about one and a half to three times as long as
+        repr(obj_defn), build_repr(format="binary") writes the bytes during the walk of the
+        object graph instead, see _BinaryWriter.
+    """
+    encoder = _BinaryEncoder()
+    encoder.write(obj_defn)
+    return bytes(encoder.out)
+
+
+def _paced(members, every):
+    """Yield the members of a wide container with _PAUSE after every every members"""
+    members = iter(members)
+    block = list(islice(members, every))
+    while block:
+        yield from block
+        yield _PAUSE
+        block = list(islice(members, every))
+
+
+def _binary_steps(obj_defn, pause_items):
+    """Generator encoding a definition as encode_binary() does, returning the bytes when it
+    stops. Yields None after every pause_items items, never if 0"""
+    encoder = _BinaryEncoder()
+    yield from encoder.steps(obj_defn, pause_items)
+    return bytes(encoder.out)
+
+
+class _BinaryEncoder:
+    """Binary representation being written and the string table of its decoder
+
+    Additional Information:
+        strings maps each string written to the bytes referring to its index in the table.
+        pending maps the summaries written by _BinaryWriter that can still be given a
+        ",ref: N" tag to their memo entry, they have an index in the table but are not
+        referred to. numbers holds the packed form of each (text, class name) builtin seen
+        so far, empty if it is not packed.
+    """
+
+    __slots__ = ("out", "strings", "pending", "numbers")
+
+    def __init__(self):
+        self.out = bytearray(BINARY_MAGIC)
+        self.strings = {}
+        self.pending = {}
+        self.numbers = {}
+
+    def claim(self, item):
+        """Make a pending summary an ordinary string of the table, it can not be tagged"""
+        index = self.pending.pop(item)[2]
+        self.strings[item] = (
+            _SHORT_HEADS[_STRREF][index]
+            if index < 256
+            else _HEAD32.pack(_STRREF32, index)
+        )
+
+    def string(self, item):
+        """Write a string, as a reference to the table if it was written before"""
+        string_ref = self.strings.get(item)
+        if string_ref is None:
+            if item in self.pending:
+                self.claim(item)
+                string_ref = self.strings[item]
+            else:
+                index = len(self.strings) + len(self.pending)
+                self.strings[item] = (
+                    _SHORT_HEADS[_STRREF][index]
+                    if index < 256
+                    else _HEAD32.pack(_STRREF32, index)
+                )
+                data = item.encode("utf-8", "surrogatepass")
+                self.out += _head(_STR, len(data))
+                self.out += data
+                return
+        self.out += string_ref
+
+    def write(self, obj_defn):
+        """Write a value made of literal types, see encode_binary()"""
+        for _ in self.steps(obj_defn, 0):
+            pass
+
+    def steps(self, obj_defn, pause_items):
+        """Generator writing a value as write() does, yielding None after every
+        pause_items containers and every pause_items members of a wide container, never
+        if 0"""
+        countdown = pause_items
+        wide = pause_items or math.inf
+        members_of = (
+            (lambda item: iter(item) if len(item) <= wide else _paced(item, wide))
+            if pause_items
+            else iter
+        )
+        out = self.out
+        strings = self.strings
+        strings_get = strings.get
+        pending = self.pending
+        str_heads, ref_heads = _SHORT_HEADS[_STR], _SHORT_HEADS[_STRREF]
+        list_heads, dict_heads = _SHORT_HEADS[_LIST], _SHORT_HEADS[_DICT]
+        pack_tagged_int, pack_tagged_float = _TAG_INT.pack, _TAG_FLOAT.pack
+        numbers = self.numbers
+        numbers_get = numbers.get
+        items_of = chain.from_iterable
+        stack = [iter((obj_defn,))]
+        while stack:
+            if countdown:
+                countdown -= 1
+                if not countdown:
+                    yield None
+                    countdown = pause_items
+            for item in stack[-1]:
+                item_class = item.__class__
+                if item_class is str:
+                    string_ref = strings_get(item)
+                    if string_ref is not None:
+                        out += string_ref
+                        continue
+                    if pending and item in pending:
+                        self.claim(item)
+                        out += strings[item]
+                        continue
+                    index = len(strings) + len(pending)
+                    strings[item] = (
+                        ref_heads[index]
+                        if index < 256
+                        else _HEAD32.pack(_STRREF32, index)
+                    )
+                    data = item.encode("utf-8", "surrogatepass")
+                    size = len(data)
+                    out += str_heads[size] if size < 256 else _HEAD32.pack(_STR32, size)
+                    out += data
+                elif item_class is list:
+                    size = len(item)
+                    if size == 2:
+                        defn = item[1]
+                        if (
+                            defn.__class__ is tuple
+                            and len(defn) == 2
+                            and defn[0].__class__ is str
+                            and defn[1].__class__ is str
+                        ):
+                            packed = numbers_get(defn)
+                            if packed is None:
+                                packed = numbers[defn] = _pack_number(defn)
+                            if packed and item[0] == _NUMBER_SUMMARIES.get(defn[1]):
+                                out += packed
+                                continue
+                    out += (
+                        list_heads[size] if size < 256 else _HEAD32.pack(_LIST32, size)
+                    )
+                    if size:
+                        stack.append(members_of(item))
+                        break
+                elif item_class is dict:
+                    size = len(item)
+                    out += (
+                        dict_heads[size] if size < 256 else _HEAD32.pack(_DICT32, size)
+                    )
+                    if size:
+                        members = items_of(item.items())
+                        stack.append(members if size <= wide else _paced(members, wide))
+                        break
+                elif item_class is tuple or item_class is set:
+                    out += _head(_CONTAINER_TAGS[item_class], len(item))
+                    if item:
+                        stack.append(members_of(item))
+                        break
+                elif item is None:
+                    out.append(_NONE)
+                elif item is True:
+                    out.append(_TRUE)
+                elif item is False:
+                    out.append(_FALSE)
+                elif item_class is int:
+                    if _MIN_INT64 <= item <= _MAX_INT64:
+                        out += pack_tagged_int(_INT, item)
+                    else:
+                        data = str(item).encode("ascii")
+                        out += _HEAD32.pack(_BIGINT, len(data))
+                        out += data
+                elif item_class is float:
+                    out += pack_tagged_float(_FLOAT, item)
+                elif item_class is complex:
+                    out += _TAG_COMPLEX.pack(_COMPLEX, item.real, item.imag)
+                elif item_class is bytes:
+                    out += _head(_BYTES, len(item))
+                    out += item
+                else:
+                    if item is _PAUSE:
+                        yield None
+                        continue
+                    # Subclasses of the supported types are written as the base type
+                    for base_class in _BASE_CLASSES:
+                        if isinstance(item, base_class):
+                            stack.append(iter((base_class(item),)))
+                            break
+                    else:
+                        raise ReprBuildError(
+                            f"Can not encode {type(item)} in binary format"
+                        )
+                    break
+            else:
+                stack.pop()
+
+    def builtin(self, summary, defn):
+        """Write the [summary, defn] definition a type handler built for a value"""
+        if (
+            defn.__class__ is tuple
+            and len(defn) == 2
+            and defn[0].__class__ is str
+            and defn[1].__class__ is str
+        ):
+            packed = self.numbers.get(defn)
+            if packed is None:
+                packed = self.numbers[defn] = _pack_number(defn)
+            if packed and summary == _NUMBER_SUMMARIES.get(defn[1]):
+                self.out += packed
+                return
+        self.write([summary, defn])
+
+
+class _Unwritable(Exception):
+    """Raised by _BinaryWriter for a graph whose bytes it can not write in one pass"""
+
+
+class _BinaryWriter(_BinaryEncoder):
+    """Write the binary representation build_object_defn would build, without building it
+
+    Args:
+        deepdive (bool): include the attributes found by deepdive
+        shared_refs (bool): replace repeated objects by back references, as build_repr does
+        summaries (dict): summaries shared with the other builds of a batch, or None
+
+    Raises:
+        _Unwritable: from object() for the graphs left to build_object_defn and
+                     encode_binary(), see below
+
+    Additional Information:
+        The traversal, memo keys and recursion counts follow the recursive engine, so the
+        bytes equal encode_binary() of the definition build_repr builds. memo maps each memo
+        key to [source, summary, table index, start, end, reference number]. The first
+        definition of an object seen a second time has ",ref: N" appended to its summary,
+        which is already written, so the summary of each memoised object is written as a
+        new string of the table, kept pending until a later string refers to it. The tag is
+        then spliced into its bytes when the writer is done, the index of the string does
+        not change. Graphs where a tagged summary was referred to, sets holding objects and
+        clean ReprCached objects, whose definitions are cached, raise _Unwritable.
+        packers maps int and float, once an attribute of the class was found to use the
+        builtin handler, to the function packing its values without building the text.
+    """
+
+    __slots__ = ("deepdive", "memo", "summaries", "patches", "next_ref", "packers")
+
+    def __init__(self, deepdive=False, shared_refs=True, summaries=None):
+        super().__init__()
+        self.deepdive = deepdive
+        self.memo = {} if shared_refs else None
+        self.summaries = summaries
+        self.patches = []
+        self.next_ref = 0
+        self.packers = {}
+
+    def getvalue(self):
+        """Return the bytes written, with the ",ref: N" tags spliced into their summaries"""
+        if not self.patches:
+            return bytes(self.out)
+        self.patches.sort()
+        view = memoryview(self.out)
+        pieces = []
+        start = 0
+        for cur_start, cur_end, data in self.patches:
+            pieces.append(view[start:cur_start])
+            pieces.append(data)
+            start = cur_end
+        pieces.append(view[start:])
+        return b"".join(pieces)
+
+    def _new_strings(self, texts):
+        """Write distinct strings none of which was written before and return True,
+        otherwise write nothing and return False"""
+        strings = self.strings
+        if (
+            len(set(texts)) != len(texts)
+            or any(map(strings.__contains__, texts))
+            or any(map(self.pending.__contains__, texts))
+        ):
+            return False
+        # The texts are repr() of builtins, so they have no lone surrogates
+        encoded = list(map(str.encode, texts))
+        sizes = list(map(len, encoded))
+        if sizes and max(sizes) > 255:
+            return False
+        start = len(strings) + len(self.pending)
+        end = start + len(texts)
+        refs = chain(
+            _SHORT_HEADS[_STRREF][start:end],
+            map(_HEAD32.pack, repeat(_STRREF32), range(max(start, 256), end)),
+        )
+        strings.update(zip(texts, refs))
+        heads = map(_SHORT_HEADS[_STR].__getitem__, sizes)
+        self.out += b"".join(chain.from_iterable(zip(heads, encoded)))
+        return True
+
+    def _lookup(self, source, summary, memo_key):
+        """Write a back reference and return True if source was already written, otherwise
+        write the list head and summary of its definition and record it"""
+        memo = self.memo
+        if memo is None:
+            self.out += _SHORT_HEADS[_LIST][2]
+            self.string(summary)
+            return False
+        entry = memo.get(memo_key)
+        if entry is not None:
+            self._reference(entry)
+            return True
+        self.out += _SHORT_HEADS[_LIST][2]
+        if isinstance(source, (list, tuple, set, dict)) and len(source) == 0:
+            self.string(summary)
+            return False
+        entry = memo[memo_key] = [source, summary, None, None, None, None]
+        if summary in self.strings:
+            self.out += self.strings[summary]
+        elif summary in self.pending:
+            self.claim(summary)
+            self.out += self.strings[summary]
+        else:
+            entry[2] = len(self.strings) + len(self.pending)
+            entry[3] = len(self.out)
+            data = summary.encode("utf-8", "surrogatepass")
+            self.out += _head(_STR, len(data))
+            self.out += data
+            entry[4] = len(self.out)
+            self.pending[summary] = entry
+        return False
+
+    def _reference(self, entry):
+        """Write the back reference to a memo entry, tagging the summary of its definition"""
+        if entry[5] is None:
+            summary = entry[1]
+            self.next_ref += 1
+            entry[5] = str(self.next_ref)
+            entry[1] = f"{summary},ref: {entry[5]}"
+            if (
+                self.pending.get(summary) is not entry
+                or entry[1] in self.strings
+                or entry[1] in self.pending
+            ):
+                raise _Unwritable(f"the summary {summary} is referred to")
+            del self.pending[summary]
+            self.pending[entry[1]] = entry
+            self.claim(entry[1])
+            data = entry[1].encode("utf-8", "surrogatepass")
+            self.patches.append((entry[3], entry[4], _head(_STR, len(data)) + data))
+        self.out += _SHORT_HEADS[_LIST][2]
+        self.string(entry[1])
+        self.out += _SHORT_HEADS[_TUPLE][2]
+        self.string(entry[5])
+        self.string(REFERENCE)
+
+    def object(self, source, attr_list, depth, recursion):
+        """Write build_object_defn(source, attr_list)"""
+        plan = _get_repr_plan(source, attr_list, self.deepdive)
+        memo_key = (
+            id(source),
+            -1 if depth < 0 else depth,
+            "members" if attr_list is None else "object",
+        )
+        if self._lookup(source, _get_summary(source), memo_key):
+            return
+        if recursion > MAXRECURSION:
+            self.string(f"<Recursion limit of {MAXRECURSION} exceeded>")
+            return
+        if (
+            self.memo is not None
+            and not self.deepdive
+            and isinstance(source, ReprCached)
+            and attr_list is getattr(source, REPRATTRIBUTES, None)
+        ):
+            raise _Unwritable("ReprCached objects reuse their cached definitions")
+        members = []
+        for cur_member, cur_depth in plan.resolve(source):
+            attr = getattr(source, cur_member, None)
+            if attr is not None:
+                members.append((cur_member, attr, cur_depth))
+        out = self.out
+        out += _head(_DICT, len(members))
+        strings_get = self.strings.get
+        packers = self.packers
+        for cur_member, attr, cur_depth in members:
+            string_ref = strings_get(cur_member)
+            if string_ref is None:
+                self.string(cur_member)
+            else:
+                out += string_ref
+            if attr.__class__ is str:
+                string_ref = strings_get(attr)
+                if string_ref is None:
+                    self.string(attr)
+                else:
+                    out += string_ref
+                continue
+            pack = packers.get(attr.__class__)
+            packed = None if pack is None else pack(attr)
+            if packed is not None:
+                out += packed
+            else:
+                self.attribute(
+                    attr, depth if cur_depth is None else cur_depth, recursion + 1
+                )
+
+    def attribute(self, attr, depth, recursion):
+        """Write build_attribute_defn for an attribute value that is not None"""
+        if isinstance(attr, str):
+            self.string(attr)
+            return
+        if self.summaries is None:
+            summary = _get_summary(attr)
+        else:
+            summary = _shared_summary(attr, self.summaries)
+        handler = _DISPATCH.get(attr.__class__, _UNRESOLVED)
+        if handler is _UNRESOLVED:
+            handler = _resolve_handler(attr.__class__)
+        if handler is not None:
+            if (
+                handler[0] is _builtin_defn
+                and attr.__class__ in _ATTR_PACKERS
+                and summary == _NUMBER_SUMMARIES[attr.__class__.__name__]
+            ):
+                self.packers[attr.__class__] = _ATTR_PACKERS[attr.__class__]
+            self.builtin(summary, handler[0](attr))
+        elif depth == 0:
+            self.out += _SHORT_HEADS[_LIST][2]
+            self.string(summary)
+            self.out.append(_NONE)
+        elif hasattr(attr, REPRATTRIBUTES):
+            self.object(attr, getattr(attr, REPRATTRIBUTES), depth - 1, recursion + 1)
+        elif isinstance(attr, (list, tuple, set, dict)):
+            memo_key = (id(attr), -1 if depth < 0 else depth, "container")
+            if self._lookup(attr, summary, memo_key):
+                return
+            if isinstance(attr, dict):
+                self._dict(attr, depth, recursion)
+            else:
+                self._list(attr, depth, recursion)
+        else:
+            self.out += _SHORT_HEADS[_LIST][2]
+            self.string(summary)
+            self.string(repr(attr))
+
+    def _list(self, attr, depth, recursion):
+        """Write _build_list_defn"""
+        items = [cur_attr for cur_attr in attr if cur_attr is not None]
+        if isinstance(attr, set):
+            if any(
+                hasattr(cur_attr, REPRATTRIBUTES)
+                or isinstance(cur_attr, (list, tuple, set, dict))
+                for cur_attr in items
+            ):
+                raise _Unwritable("sets of objects are left to build_object_defn")
+            self.write({repr(cur_attr) for cur_attr in items})
+            return
+        tag = _TUPLE if isinstance(attr, tuple) else _LIST
+        out = self.out
+        out += _head(tag, len(items))
+        if _PLAIN_LEAVES.issuperset(map(type, items)) and self._new_strings(
+            list(map(repr, items))
+        ):
+            return
+        strings = self.strings
+        strings_get = strings.get
+        pending = self.pending
+        str_heads, ref_heads = _SHORT_HEADS[_STR], _SHORT_HEADS[_STRREF]
+        for cur_attr in items:
+            if cur_attr.__class__ in _PLAIN_LEAVES:
+                # Inlined string() for the leaves of wide lists
+                text = repr(cur_attr)
+                string_ref = strings_get(text)
+                if string_ref is not None:
+                    out += string_ref
+                elif pending and text in pending:
+                    self.string(text)
+                else:
+                    index = len(strings) + len(pending)
+                    strings[text] = (
+                        ref_heads[index]
+                        if index < 256
+                        else _HEAD32.pack(_STRREF32, index)
+                    )
+                    data = text.encode("utf-8", "surrogatepass")
+                    size = len(data)
+                    out += str_heads[size] if size < 256 else _HEAD32.pack(_STR32, size)
+                    out += data
+            elif hasattr(cur_attr, REPRATTRIBUTES):
+                self.object(
+                    cur_attr,
+                    getattr(cur_attr, REPRATTRIBUTES),
+                    depth - 1,
+                    recursion + 1,
+                )
+            elif isinstance(cur_attr, (list, tuple, set, dict)):
+                self.object(cur_attr, None, depth - 1, recursion + 1)
+            else:
+                self.string(repr(cur_attr))
+
+    def _dict(self, attr, depth, recursion):
+        """Write _build_dict_defn"""
+        items = [
+            (cur_key, cur_attr)
+            for cur_key, cur_attr in attr.items()
+            if cur_attr is not None
+        ]
+        self.out += _head(_DICT, len(items))
+        for cur_key, cur_attr in items:
+            if cur_key.__class__ is str:
+                self.string(cur_key)
+            else:
+                self.write(cur_key)
+            if hasattr(cur_attr, REPRATTRIBUTES):
+                self.object(
+                    cur_attr,
+                    getattr(cur_attr, REPRATTRIBUTES),
+                    depth - 1,
+                    recursion + 1,
+                )
+            elif isinstance(cur_attr, (list, tuple, set, dict)):
+                self.attribute(cur_attr, depth - 1, recursion + 1)
+            else:
+                self.string(repr(cur_attr))
+
+
+def write_binary(
+    source, attr_list=None, depth=-1, deepdive=False, recursion=0, **options
+):
+    """Return the binary representation of an object built by the recursive engine
+    Args:
+        source (Unknown): Object to be represented
+        attr_list (list): List of the object's attributes to include, as for
+                          build_object_defn
+        depth (int): levels of attributes to expand, -1 for all of them
+        deepdive (bool): if True include the attributes returned from dir()
+        recursion (int): recursion count of source
+        **options (params):
+            shared_refs (bool): if True (default) repeated objects are back references
+            summaries (dict): summaries shared with the other builds of a batch, or None
+    Returns:
+        bytes: encode_binary() of the representation build_repr builds, None if the
+               graph has to be built and encoded instead, see _BinaryWriter
+    """
+    writer = _BinaryWriter(
+        deepdive, options.get("shared_refs", True), options.get("summaries")
+    )
+    try:
+        writer.object(source, attr_list, depth, recursion)
+    except _Unwritable:
+        return None
+    return writer.getvalue()
+
+
+def decode_binary(data):
+    """Decode bytes produced by encode_binary()
+    Args:
+        data (Union[bytes,mmap.mmap]): binary representation starting with BINARY_MAGIC
+    Returns:
+        Union[list,tuple,dict,set,str,bytes,int,float,complex,bool,None]: the decoded value
+    Raises:
+        ReprBuildError: if data is not a valid binary representation
+    Additional Information:
+        Only literal values are created, so decoding data from an untrusted source can not
+        execute code.
+    """
+    steps = _decode_steps(data, 0)
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+def _decode_steps(data, pause_values):
+    """Generator decoding data as decode_binary() does, returning the value when it stops
+    Args:
+        data (Union[bytes,mmap.mmap]): binary representation starting with BINARY_MAGIC
+        pause_values (int): yield None after every this many values, never if 0
+    Raises:
+        ReprBuildError: if data is not a valid binary representation
+
+    Additional Information:
+        Lets a caller such as async_format_repr decode a large representation a slice at a
+        time.
+    """
+    if not isinstance(data, (bytes, mmap.mmap)):
+        data = bytes(data)
+    if data[: len(BINARY_MAGIC)] != BINARY_MAGIC:
+        raise ReprBuildError("Binary representation does not start with BINARY_MAGIC")
+    try:
+        value, pos = yield from _decode(data, len(BINARY_MAGIC), pause_values)
+    except (IndexError, struct.error, UnicodeDecodeError, TypeError) as error:
+        raise ReprBuildError(f"Invalid binary representation: {error}") from error
+    if pos != len(data):
+        raise ReprBuildError(
+            f"Invalid binary representation: unexpected data at offset {pos}"
+        )
+    return value
+
+
+def _decode(data, pos, pause_values):
+    """Generator returning the value starting at pos and the offset after it, yielding
+    None after every pause_values values, never if 0"""
+    countdown = pause_values
+    strings = []
+    # Each open container is (tag, members, members still to read) of the enclosing one
+    frames = []
+    tag_open, members, remaining = None, [], 1
+    while True:
+        if countdown:
+            countdown -= 1
+            if not countdown:
+                yield None
+                countdown = pause_values
+        tag = data[pos]
+        pos += 1
+        if tag == _STRREF:
+            value = strings[data[pos]]
+            pos += 1
+        elif tag in (_STR, _STR32):
+            if tag == _STR:
+                size = data[pos]
+                pos += 1
+            else:
+                size = _U32.unpack_from(data, pos)[0]
+                pos += 4
+            end = pos + size
+            if end > len(data):
+                raise IndexError("string extends past the end of the data")
+            value = str(data[pos:end], "utf-8", "surrogatepass")
+            strings.append(value)
+            pos = end
+        elif tag == _INT_DEFN:
+            value = ["class: int", (str(_INT64.unpack_from(data, pos)[0]), "int")]
+            pos += 8
+        elif tag == _FLOAT_DEFN:
+            value = [
+                "class: float",
+                (repr(_FLOAT64.unpack_from(data, pos)[0]), "float"),
+            ]
+            pos += 8
+        elif tag == _COMPLEX_DEFN:
+            value = [
+                "class: complex",
+                (repr(complex(*_COMPLEX128.unpack_from(data, pos))), "complex"),
+            ]
+            pos += 16
+        elif _LIST <= tag <= _SET32:
+            if (tag - _LIST) % 2:
+                size = _U32.unpack_from(data, pos)[0]
+                pos += 4
+                tag -= 1
+            else:
+                size = data[pos]
+                pos += 1
+            if tag == _DICT:
+                size *= 2
+            if size:
+                frames.append((tag_open, members, remaining))
+                tag_open, members, remaining = tag, [], size
+                continue
+            value = _close_container(tag, [])
+        elif tag == _STRREF32:
+            value = strings[_U32.unpack_from(data, pos)[0]]
+            pos += 4
+        elif tag == _NONE:
+            value = None
+        elif tag == _TRUE:
+            value = True
+        elif tag == _FALSE:
+            value = False
+        elif tag == _INT:
+            value = _INT64.unpack_from(data, pos)[0]
+            pos += 8
+        elif tag == _FLOAT:
+            value = _FLOAT64.unpack_from(data, pos)[0]
+            pos += 8
+        elif tag == _COMPLEX:
+            value = complex(*_COMPLEX128.unpack_from(data, pos))
+            pos += 16
+        elif tag in (_BIGINT, _BYTES, _BYTES32):
+            if tag == _BYTES:
+                size = data[pos]
+                pos += 1
+            else:
+                size = _U32.unpack_from(data, pos)[0]
+                pos += 4
+            end = pos + size
+            if end > len(data):
+                raise IndexError("value extends past the end of the data")
+            value = int(data[pos:end]) if tag == _BIGINT else data[pos:end]
+            pos = end
+        else:
+            raise TypeError(f"unknown tag {tag} at offset {pos - 1}")
+
+        members.append(value)
+        remaining -= 1
+        while remaining == 0:
+            if not frames:
+                return members[0], pos
+            if (
+                pause_values
+                and tag_open in (_DICT, _SET)
+                and len(members) > pause_values
+            ):
+                value = yield from _close_hashed_steps(tag_open, members, pause_values)
+            else:
+                value = _close_container(tag_open, members)
+            tag_open, members, remaining = frames.pop()
+            members.append(value)
+            remaining -= 1
+
+
+def _close_container(tag, members):
+    """Return the container for a tag and its decoded members"""
+    if tag == _LIST:
+        return members
+    if tag == _TUPLE:
+        return tuple(members)
+    if tag == _DICT:
+        return dict(zip(members[::2], members[1::2]))
+    return set(members)
+
+
+def _close_hashed_steps(tag, members, pause_values):
+    """Generator returning the dict or set for a tag and its decoded members, hashing
+    pause_values members between yields"""
+    if tag == _DICT:
+        value = {}
+        step = 2 * pause_values
+        for start in range(0, len(members), step):
+            value.update(
+                zip(
+                    members[start : start + step : 2],
+                    members[start + 1 : start + step : 2],
+                )
+            )
+            yield None
+        return value
+    value = set()
+    for start in range(0, len(members), pause_values):
+        value.update(members[start : start + pause_values])
+        yield None
+    return value
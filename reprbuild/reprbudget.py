@@ -0,0 +1,122 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Item, size and time budgets bounding the cost of a call to build_repr
+"""
+from time import perf_counter
+
+from .constants import ELIDED, REFERENCE
+
+# Key of the elision marker in the definition of an object or dict
+ELIDED_KEY = "..."
+
+# Values built between two reads of the clock
+_CLOCK_ITEMS = 64
+
+
+def _elision(count):
+    """Return the marker standing in for count members that were not built"""
+    return ["class: ...", (str(count), ELIDED)]
+
+
+# Characters of an elision marker with its key and separator, at most, kept back for each
+# open object and container so their markers fit in max_bytes
+_MARKER_SIZE = len(f", {ELIDED_KEY!r}: ") + len(repr(repr(_elision(10**15))))
+
+# Characters a back reference takes beyond the summary it repeats, at most, with the tag
+# added to the summary of the first occurrence
+_REF_SIZE = len(repr(["", (str(10**12), REFERENCE)])) + 2 * len(f",ref: {10**12}")
+
+# Characters of the brackets and separators around the members of an object or container
+# and of the separator before it
+_OPEN_SIZE = len("[, (,)]") + len(", ")
+
+# Characters that have to fit before an object or container, or a back reference to it,
+# is built
+_ENTRY_SIZE = max(_REF_SIZE, _OPEN_SIZE + _MARKER_SIZE)
+
+
+class _Budget:
+    """Limits on the values a single call to build_repr can build
+
+    Args:
+        max_items (int): number of objects, containers and values that can be built, the
+                         root object included
+        max_bytes (int): characters the text of the representation can take
+        max_time (float): seconds the build can take
+
+    Additional Information:
+        Every value is checked with fits() before it is built and charged with spend()
+        once it is kept, with the characters it adds to the text of the representation.
+        A value that does not fit is left out and every member after it is elided, the
+        members left out of each open object and container being counted by a single
+        marker, whose size is kept back from max_bytes while the object is open. Values
+        built by a type handler and strings are checked against the least size of their
+        text before they are built, so an array or string too large for max_bytes is never
+        converted. The clock is only read every _CLOCK_ITEMS values, so a build can run
+        past max_time by the time it takes to build that many values.
+    """
+
+    __slots__ = ("items_left", "bytes_left", "deadline", "count", "spent", "reserved")
+
+    def __init__(self, max_items=None, max_bytes=None, max_time=None):
+        self.items_left = float("inf") if max_items is None else max_items
+        self.bytes_left = float("inf") if max_bytes is None else max_bytes
+        self.deadline = float("inf") if max_time is None else perf_counter() + max_time
+        self.count = 0
+        self.spent = False
+        self.reserved = 0
+
+    def fits(self, size):
+        """Return True if a value of size characters can be built, False once used up"""
+        if (
+            self.spent
+            or self.items_left < 1
+            or size + self.reserved > self.bytes_left
+            or (self.count % _CLOCK_ITEMS == 0 and perf_counter() >= self.deadline)
+        ):
+            self.spent = True
+            return False
+        return True
+
+    def spend(self, size, items=1):
+        """Charge values that are kept with the characters they add to the text"""
+        self.count += items
+        self.items_left -= items
+        self.bytes_left -= size
+
+    def keep(self, defn, size=0):
+        """Charge a built definition and size more characters, return False if it does not fit"""
+        size += len(repr(defn))
+        if not self.fits(size):
+            return False
+        self.spend(size)
+        return True
+
+    def admits(self, summary):
+        """Return True if an object or container, or a back reference to it, fits"""
+        return self.fits(len(repr(summary)) + _ENTRY_SIZE)
+
+    def reference(self, summary):
+        """Charge a back reference to an object or container with this summary"""
+        self.spend(len(repr(summary)) + _REF_SIZE)
+
+    def open(self, summary):
+        """Charge an object or container whose members are built next, keeping back the
+        room for its marker until close()
+        """
+        self.spend(len(repr(summary)) + _OPEN_SIZE)
+        self.reserved += _MARKER_SIZE
+
+    def close(self):
+        """Release the room kept back for the marker of an object or container"""
+        self.reserved -= _MARKER_SIZE
@@ -14,35 +14,14 @@ Build a representation such that eval(repr(A)) is a dictionary which can be
 unambiguous enough that we can build a class method such that cls(A).build_repr(eval(A))
 is equivalent to A for most reasonable definitions of equivalence.
 """
-import numpy as np
-
-from reprbuild.constants import REPRATTRIBUTES, MAXRECURSION
-
-
-class ReprBuildError(Exception):
-    """Base class for errors raised while processing a representation."""
-
-    def __init__(self, *message):
-        """Set the error message."""
-        super().__init__(" ".join(message))
-        self.message = " ".join(message)
-
-    def __str__(self):
-        """Return the message."""
-        if not isinstance(self.message, str):
-            return repr(self.message)
-        else:
-            return self.message
-
-
-def _get_summary(source):
-    """Create the summary information about the input object for the recursive representation."""
-    _summary = f"class: {source.__class__.__name__}"
-    _src_name = getattr(source, "name", None)
-    if _src_name is not None:
-        _summary += f",name: {_src_name}"
-
-    return _summary
+from reprbuild.constants import COLUMNARTHRESHOLD, PARALLELTHRESHOLD, REFERENCE
+from reprbuild.reprbase import _BuildState, _get_summary, _PROFILE, ReprBuildError
+from reprbuild.reprbudget import _Budget
+from reprbuild.reprcache import _CacheConflict
+from reprbuild.reprdefn import (  # pylint: disable=unused-import
+    build_attribute_defn,
+    build_object_defn,
+)
 
 
 def split_repr(obj_repr):
@@ -61,12 +40,28 @@ def split_repr(obj_repr):
             class: The name of the original class
             name:   The name, if it was assgined, of the original object
             is_builtin: A boolean indicating if the class is to be treated at a builtin
+            ref:    The back reference number of a shared object, None if it is not shared
+            is_reference: A boolean indicating if the definition is a back reference to the
+                    shared object defined earlier in the representation
     """
-    (summary, repr_defn) = (None, None)
+    if _PROFILE[0] is not None:
+        return _PROFILE[0]._call("split_repr", _split_repr, obj_repr)
+    return _split_repr(obj_repr)
+
+
+def _split_repr(obj_repr):
+    """Return the summary and definition of a representation, see split_repr()"""
+    summary, repr_defn = (None, None)
     if isinstance(obj_repr, str):
+        from .reprliteral import parse_literal, ReprSyntaxError
+        from .reprsymbols import decode_symbols, is_compact
+
         try:
-            obj_repr = eval(obj_repr)  # pylint: disable=eval-used
-        except:  # pylint: disable=bare-except
+            if is_compact(obj_repr):
+                obj_repr = decode_symbols(obj_repr)
+            else:
+                obj_repr = parse_literal(obj_repr)
+        except ReprSyntaxError:
             obj_repr = None
 
     if isinstance(obj_repr, list) and len(obj_repr) == 2:
@@ -93,6 +88,12 @@ def split_repr(obj_repr):
                     and isinstance(repr_defn[0], str)
                     and isinstance(repr_defn[1], str)
                 )
+                summary["ref"] = None
+                if len(summary_list) > 1 and summary_list[-1].startswith("ref: "):
+                    summary["ref"] = summary_list[-1][len("ref: ") :]
+                summary["is_reference"] = (
+                    summary["is_builtin"] and repr_defn[1] == REFERENCE
+                )
 
     return summary, repr_defn
 
@@ -111,176 +112,201 @@ def is_valid_repr(obj_repr):
     return split_repr(obj_repr)[0] is not None
 
 
-def build_attribute_defn(
-    source,
-    attribute,
-    depth=-1,
-    deepdive=False,
-    recursion=0,
-):
-    """
-    Args:
-        source (Unknown)    : Source object containing the attribute to be defined
-        attribute (Unknown) : Name of the source's attribute to define
-        depth (int)         : if == 0 : return object summary only as string
-                              if != 1 : return a recursively build representation for the attribute
-                                       a starting depth -1 will fully expand all attributes
-        deepdive (boolean)  : if True append attributes returned from dir() to list
-        recursion (int)     : prevent unlimited recursion in case of circular references
-    Raises:
-        ValueError: invalid value
+# Options of build_object_defn the binary writer takes
+_WRITER_OPTIONS = frozenset(("attr_list", "depth", "deepdive", "recursion"))
+
+
+def _has_summary(obj_defn):
+    """Return is_valid_repr(obj_defn) for a definition list, without splitting the summary"""
+    return (
+        isinstance(obj_defn, list)
+        and len(obj_defn) == 2
+        and isinstance(obj_defn[0], str)
+        and obj_defn[0].startswith(("class: ", "<class '"))
+    )
+
+
+def _parallel_build(kwargs, engine, shared_refs):
+    """Remove the parallel build options from kwargs and return their _ParallelBuild or None"""
+    workers = kwargs.pop("workers", None)
+    executor = kwargs.pop("executor", None)
+    threshold = kwargs.pop("parallel_threshold", PARALLELTHRESHOLD)
+    if executor is None and workers in (None, 1):
+        return None
+    if engine != "recursive" or not shared_refs:
+        raise ReprBuildError(
+            "workers and executor need the recursive engine with shared_refs"
+        )
+    from .reprparallel import _ParallelBuild
+
+    return _ParallelBuild(executor, workers, threshold)
+
+
+def _budget_limits(kwargs, engine, shared_refs, parallel):
+    """Remove the budget options from kwargs and return (max_items, max_bytes, max_time)
     Returns:
-        list: [summary, dictionary] representation of attribute
+        tuple: the limits, None if no budget was given
     Raises:
-    Additional Information:
-            attr_defn[0]: Summary of the attribute
-            attr_defn[1]: Representation of a dictionary for members of the attribute
-                                listed in _repr_attrs for its class
+        ReprBuildError: if a limit is not a positive number or can not be applied to the build
     """
-    if attribute is None:
-        attr = source
-    else:
-        attr = getattr(source, attribute, None)
-    attr_defn = [_get_summary(attr), None]
-    if attr is None:
-        attr_defn = None
-    elif isinstance(attr, str):
-        attr_defn = attr
-    elif isinstance(attr, (int, float, complex)):
-        attr_defn[1] = (repr(attr), attr.__class__.__name__)
-    elif isinstance(attr, (np.integer, np.floating, np.complexfloating, np.ndarray)):
-        attr_defn[1] = (repr(attr), attr.__class__.__name__)
-    elif depth != 0:
-        if hasattr(attr, REPRATTRIBUTES):
-            attr_defn = build_object_defn(
-                attr,
-                getattr(attr, REPRATTRIBUTES),
-                depth=depth - 1,
-                deepdive=deepdive,
-                recursion=recursion + 1,
-            )
-        elif isinstance(attr, (list, tuple, set)):
-            repr_list = []
-            if len(attr) > 0:
-                for cur_attr in attr:
-                    if cur_attr is None:
-                        pass
-                    elif hasattr(cur_attr, REPRATTRIBUTES):
-                        cur_repr = build_object_defn(
-                            cur_attr,
-                            getattr(cur_attr, REPRATTRIBUTES),
-                            depth=depth - 1,
-                            deepdive=deepdive,
-                            recursion=recursion + 1,
-                        )
-                    elif isinstance(cur_attr, (list, tuple, set, dict)):
-                        cur_repr = build_object_defn(
-                            cur_attr,
-                            None,
-                            depth=depth - 1,
-                            deepdive=deepdive,
-                            recursion=recursion + 1,
-                        )
-                    else:
-                        cur_repr = repr(cur_attr)
-                    repr_list.append(cur_repr)
-            if isinstance(attr, tuple):
-                repr_list = tuple(repr_list)
-            elif isinstance(attr, set):
-                repr_list = set(repr_list)
-            attr_defn[1] = repr_list
-        elif isinstance(attr, dict):
-            repr_list = {}
-            if len(attr) > 0:
-                repr_list = {}
-                for cur_key, cur_attr in attr.items():
-                    if cur_attr is None:
-                        pass
-                    elif hasattr(cur_attr, REPRATTRIBUTES):
-                        cur_repr = build_object_defn(
-                            cur_attr,
-                            getattr(cur_attr, REPRATTRIBUTES),
-                            depth=depth - 1,
-                            deepdive=deepdive,
-                            recursion=recursion + 1,
-                        )
-                    elif isinstance(cur_attr, (list, tuple, set, dict)):
-                        list_dict = build_attribute_defn(
-                            cur_attr,
-                            None,
-                            depth=depth - 1,
-                            deepdive=deepdive,
-                            recursion=recursion + 1,
-                        )
-                        cur_repr = list_dict
-                    else:
-                        cur_repr = repr(cur_attr)
-                    repr_list[cur_key] = cur_repr
-            attr_defn[1] = repr_list
-        else:
-            attr_defn[1] = repr(attr)
+    names = ("max_items", "max_bytes", "max_time")
+    limits = tuple(kwargs.pop(name, None) for name in names)
+    if limits == (None, None, None):
+        return None
+    for name, limit in zip(names, limits):
+        if limit is None:
+            continue
+        valid_types = (int, float) if name == "max_time" else int
+        if not isinstance(limit, valid_types) or isinstance(limit, bool) or limit <= 0:
+            raise ReprBuildError(f"{name} must be a positive number, not {limit!r}")
+    if engine != "recursive" or not shared_refs or parallel is not None:
+        raise ReprBuildError(
+            "max_items, max_bytes and max_time need the serial recursive engine with "
+            "shared_refs"
+        )
+    return limits
+
 
-    return attr_defn
+def _columnar_rows(kwargs, engine, shared_refs, limits):
+    """Remove the columnar option from kwargs and return its row threshold or None
+    Raises:
+        ReprBuildError: if columnar is not valid or can not be applied to the build
+    """
+    columnar = kwargs.pop("columnar", False)
+    if columnar is None or columnar is False:
+        return None
+    if columnar is True:
+        columnar = COLUMNARTHRESHOLD
+    elif not isinstance(columnar, int) or columnar < 1:
+        raise ReprBuildError(
+            f"columnar must be True or a positive number, not {columnar!r}"
+        )
+    if engine != "recursive" or not shared_refs:
+        raise ReprBuildError("columnar needs the recursive engine with shared_refs")
+    if limits is not None:
+        raise ReprBuildError(
+            "columnar can not be used with max_items, max_bytes or max_time"
+        )
+    return columnar
 
 
-def build_object_defn(
-    source,
-    attr_list=None,
-    depth=-1,
-    deepdive=False,
-    recursion=0,
-):
-    """Create a list with the summary string and recursive representation for the object
+class _ReprBuilder:
+    """The options of build_repr, checked once and applied to any number of objects
+
     Args:
-        source (Unknown)    : Object to be built into a dictionary
-        attr_list  (list)   : List of the object's attributes to include
-        depth (int)         : if == 0 : return object summary only as string
-                              if != 1 : return list[ object summary, dict{ attribute :,repr to depth -1]
-                                       a starting depth -1 will fully expand all attributes
-        deepdive (boolean)  : if True append attributes returned from dir() to list
-        recursion (int)     : number of levels of recursion allowable for this representation
-    Returns:
-        list: summary of source object in element [0]
-              object definition in element[1]
+        kwargs (dict): keyword arguments of build_repr
     Raises:
-        ReprBuildError: if a valid list of attributes is not found
-    Additional Information:
+        ReprBuildError: if the engine, format, parallel, budget or columnar options are not
+                        valid
     """
-    attr_depths = {}
-    if isinstance(attr_list, dict):
-        attr_depths = attr_list
-    elif isinstance(attr_list, list):
-        for cur_member in attr_list:
-            attr_depths[cur_member] = depth
-    elif attr_list is not None:
-        raise ReprBuildError("member_list not of type list or dict")
-    if deepdive:
-        __obj_dict__ = getattr(source, "__dict__", None)
-        if __obj_dict__ is not None:
-            for i in __obj_dict__:
-                attr_depths[i] = depth
-        for i in dir(source):
-            attr_depths[i] = depth
-
-    if recursion > MAXRECURSION:
-        member_dict = f"<Recursion limit of {MAXRECURSION} exceeded>"
-    else:
-        member_dict = {}
-        for cur_member, cur_depth in attr_depths.items():
-            cur_defn = build_attribute_defn(
-                source,
-                cur_member,
-                depth=cur_depth,
-                deepdive=deepdive,
-                recursion=recursion + 1,
+
+    __slots__ = (
+        "kwargs",
+        "output_format",
+        "shared_refs",
+        "engine",
+        "parallel",
+        "limits",
+        "columnar",
+    )
+
+    def __init__(self, kwargs):
+        kwargs = dict(kwargs)
+        self.output_format = kwargs.pop("format", "text")
+        if self.output_format not in ("text", "binary", "compact"):
+            raise ReprBuildError(f"Unknown representation format {self.output_format}")
+        self.shared_refs = kwargs.pop("shared_refs", True)
+        self.engine = kwargs.pop("engine", "recursive")
+        if self.engine not in ("recursive", "iterative"):
+            raise ReprBuildError(f"Unknown build engine {self.engine}")
+        self.parallel = _parallel_build(kwargs, self.engine, self.shared_refs)
+        try:
+            self.limits = _budget_limits(
+                kwargs, self.engine, self.shared_refs, self.parallel
             )
-            if cur_defn is not None:
-                member_dict[cur_member] = cur_defn
+            self.columnar = _columnar_rows(
+                kwargs, self.engine, self.shared_refs, self.limits
+            )
+        except ReprBuildError:
+            self.close()
+            raise
+        self.kwargs = kwargs
 
-    if is_valid_repr(member_dict):
-        return member_dict
-    else:
-        return [_get_summary(source), member_dict]
+    def close(self):
+        """Release the executor of a parallel build"""
+        if self.parallel is not None:
+            self.parallel.close()
+
+    def _writes_binary(self):
+        """Return True if the binary representation can be written during the walk of the
+        object graph, without building its definition, see reprbinary._BinaryWriter"""
+        return (
+            self.output_format == "binary"
+            and self.engine == "recursive"
+            and self.parallel is None
+            and self.limits is None
+            and self.columnar is None
+            and _PROFILE[0] is None
+            and _WRITER_OPTIONS.issuperset(self.kwargs)
+        )
+
+    def build(self, source, summaries=None):
+        """Return the representation of source, as build_repr does
+        Args:
+            source (Type): Object to be represented
+            summaries (dict): summaries shared with the other builds of a batch, or None
+        """
+        if self._writes_binary():
+            from .reprbinary import write_binary
+
+            data = write_binary(
+                source, shared_refs=self.shared_refs, summaries=summaries, **self.kwargs
+            )
+            if data is not None:
+                return data
+        state = _BuildState() if self.shared_refs else None
+        if self.engine == "iterative":
+            from .reprwalk import build_object_defn_iterative, defn_text
+
+            obj_defn = build_object_defn_iterative(source, state=state, **self.kwargs)
+            if self.output_format == "text":
+                return defn_text(obj_defn)
+        else:
+            while True:
+                if state is not None:
+                    state.parallel = self.parallel
+                    state.columnar = self.columnar
+                    state.summaries = summaries
+                    if self.limits is not None:
+                        state.budget = _Budget(*self.limits)
+                try:
+                    obj_defn = build_object_defn(source, state=state, **self.kwargs)
+                    break
+                except _CacheConflict as conflict:
+                    # A reused definition repeats an object found elsewhere, build it again
+                    conflict.source.mark_repr_dirty()
+                    state = _BuildState()
+            if state is not None and state.cache is not None:
+                state.cache.commit()
+            if not _has_summary(obj_defn):
+                obj_defn = [_get_summary(source), obj_defn]
+            if self.output_format == "text":
+                if state is not None and state.cache is not None:
+                    return state.cache.repr_text(obj_defn)
+                return repr(obj_defn)
+        if self.output_format == "compact":
+            from .reprsymbols import encode_symbols
+
+            return encode_symbols(obj_defn)
+        from .reprbinary import encode_binary
+
+        return encode_binary(obj_defn)
+
+    def build_many(self, objects):
+        """Yield the representation of each object, sharing one dict of summaries"""
+        summaries = {}
+        for source in objects:
+            yield self.build(source, summaries)
 
 
 def build_repr(source, **kwargs):
@@ -296,13 +322,94 @@ def build_repr(source, **kwargs):
                                             decrementing depth at each level of recursion
                                             A starting depth -1 will fully expand all attributes
             deepdive (boolean)  : if True append attributes returned from dir() to the representation
+            shared_refs (boolean) : if True (default) an object reached more than once is built
+                                  the first time and replaced by a back reference after that
+            engine (str)        : "recursive" (default) or "iterative" to walk the object graph
+                                  with an explicit work stack, which has no nesting depth limit
+            max_recursion (int) : iterative engine only, optional limit on the nesting depth
+            format (str)        : "text" (default) for the repr() string of the definition,
+                                  "binary" for the bytes returned by encode_binary() or
+                                  "compact" for the string returned by encode_symbols()
+            workers (int)       : recursive engine with shared_refs only, build the members of
+                                  large lists, tuples, sets and dicts in chunks on this many
+                                  workers, defaults to the number of CPUs if executor is given
+            executor (Executor) : pool the chunks are built on, a ProcessPoolExecutor is
+                                  created for the call if workers is given without one. A
+                                  ThreadPoolExecutor only overlaps work that releases the GIL
+            parallel_threshold (int) : containers with fewer members are built serially,
+                                  PARALLELTHRESHOLD by default
+            max_items (int)     : serial recursive engine with shared_refs only, stop the
+                                  build once this many objects, containers and values are
+                                  built, the root included
+            max_bytes (int)     : as max_items, bound the characters of the representation
+            max_time (float)    : as max_items, stop once the build has taken this many seconds
+            columnar (Union[bool,int]) : recursive engine with shared_refs only, if True give
+                                  lists and tuples of COLUMNARTHRESHOLD or more objects of one
+                                  class a columnar definition, or from this many objects if
+                                  an int. Can not be combined with a budget
+    Returns:
+        Union[str,bytes]: string representation of the representation definition, or its
+                          binary or compact encoding
+    Raises:
+        ReprBuildError: if the engine or format is not known, workers is used with the
+                        iterative engine or without shared_refs, or a budget or columnar is not
+                        valid
+    Additional Information:
+        The recursive engine reuses the definitions cached for clean ReprCached objects.
+        A parallel build gives the same representation as a serial one if the repr() of
+        the values kept as text depends only on their value, see _ParallelBuild.
+        Once a budget runs out, the members not yet built of every open object, list, tuple,
+        set and dict are replaced by a single ["class: ...", (str(count), ELIDED)] marker
+        holding the number left out, under the key "..." in an object or dict. Each value is
+        checked before it is built with room kept for these markers, so the text is at most
+        max_bytes long unless max_bytes is below the root summary and one marker. Definitions
+        cached for ReprCached objects are neither reused nor stored by a budgeted build.
+        A columnar definition stores the class and attribute names once and the values of
+        each attribute as a column, see reprcolumns. Lists and tuples built in the chunks of
+        a parallel build are not made columnar.
+    """
+    builder = _ReprBuilder(kwargs)
+    try:
+        return builder.build(source)
+    finally:
+        builder.close()
+
+
+def build_repr_many(objects, as_generator=False, **kwargs):
+    """Create the recursive representations of a batch of objects
+    Args:
+        objects (Iterable): Objects to be built, each into its own representation
+        as_generator (boolean): if True return an iterator yielding each representation as
+                                it is built, otherwise a list
+        **kwargs (params)   : options of build_repr, applied to every object
+            workers (int)       : build the objects in chunks on this many workers
+            executor (Executor) : pool the chunks of objects are built on, a
+                                  ProcessPoolExecutor is created if workers is given
+                                  without one
     Returns:
-        str: string representation of the representation definition
+        Union[list,Iterator]: build_repr(obj, **kwargs) for each object, in order
     Raises:
+        ReprBuildError: if an option or the number of workers is not valid
     Additional Information:
+        The options are checked once for the batch, the attribute plans of each class are
+        shared by every object of the class and, with the recursive engine and shared_refs,
+        so are the summaries of the values whose class can not give them a name. With
+        workers or an executor whole objects are spread over the pool rather than the
+        members of their containers, each chunk of objects sharing its summaries, and the
+        representation of each object is the same as a serial build.
     """
-    obj_defn = build_object_defn(source, **kwargs)
-    if not is_valid_repr(obj_defn):
-        obj_defn = [_get_summary(source), obj_defn]
+    kwargs = dict(kwargs)
+    workers = kwargs.pop("workers", None)
+    executor = kwargs.pop("executor", None)
+    kwargs.pop("parallel_threshold", None)
+    builder = _ReprBuilder(kwargs)
+    if executor is None and workers in (None, 1):
+        results = builder.build_many(objects)
+    else:
+        from .reprhandlers import _HANDLERS
+        from .reprparallel import _build_batch, _iter_batch
 
-    return repr(obj_defn)
+        results = _iter_batch(
+            _build_batch, objects, (builder, dict(_HANDLERS)), executor, workers
+        )
+    return results if as_generator else list(results)
@@ -0,0 +1,320 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Opt-in caching of the definitions built for long lived objects between calls to build_repr
+"""
+import weakref
+
+from .constants import REPRATTRIBUTES
+
+# Instance attributes used for the cache, dunder names so deepdive leaves them out
+_CACHE = "__repr_cache__"
+_PARENTS = "__repr_parents__"
+_CHILDREN = "__repr_children__"
+
+
+class ReprCached:
+    """Mixin caching the member definitions build_repr builds for an instance
+
+    Additional Information:
+        Assigning an attribute listed in _repr_attrs, name or _repr_attrs itself marks the
+        instance dirty, and so does every object whose cached definition holds it. A repeat
+        build_repr reuses the cached definitions of clean objects without walking them, so
+        its cost follows the objects that changed rather than the size of the graph.
+        Only plain attribute assignment is seen. Call mark_repr_dirty() after changing a
+        list, dict, set or ndarray member in place, or after sharing a container that is
+        already held by another object.
+        Definitions are only cached for the default recursive engine with shared_refs, and
+        only when everything below the object is a ReprCached instance or a literal value.
+        Pickled and copied instances leave the cache out, their first build is a fresh one.
+    """
+
+    def __getstate__(self):
+        """Return the instance dict without the cache, which holds weak references to the
+        objects above this one and definitions that only hold for this instance"""
+        state = self.__dict__.copy()
+        for name in (_CACHE, _PARENTS, _CHILDREN):
+            state.pop(name, None)
+        return state
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if (
+            name == "name"
+            or name == REPRATTRIBUTES
+            or name in getattr(self, REPRATTRIBUTES, ())
+        ):
+            self.mark_repr_dirty()
+
+    def mark_repr_dirty(self):
+        """Discard the cached definitions of this object and of every object holding it
+        Args:
+        Returns:
+        Raises:
+
+        Additional Information:
+        """
+        seen = set()
+        stack = [self]
+        while stack:
+            cur_obj = stack.pop()
+            if id(cur_obj) in seen:
+                continue
+            seen.add(id(cur_obj))
+            obj_dict = cur_obj.__dict__
+            cache = obj_dict.get(_CACHE)
+            if cache:
+                cache.clear()
+            parents = obj_dict.get(_PARENTS)
+            if parents:
+                for parent_ref in parents.values():
+                    parent = parent_ref()
+                    if parent is not None:
+                        stack.append(parent)
+
+
+class _CacheConflict(Exception):
+    """Raised when a reused definition holds an object that is also reached elsewhere"""
+
+    def __init__(self, source):
+        super().__init__()
+        self.source = source
+
+
+class _CacheState:
+    """Cache bookkeeping for a single call to build_repr
+
+    Additional Information:
+        owners is the stack of ReprCached objects being built, with the ReprCached objects
+        found directly below each one in children. An object is claimed once an object
+        below it has been reached in this build: its cached definition could then repeat
+        that object in full where a fresh build gives a back reference, so it is not reused.
+        Definitions are only stored by commit() at the end of the build, once it is known
+        that no later back reference tagged a summary inside them. Each cache entry is
+        [members, height, text, descendants], text is the repr() of members kept once it
+        has been reused.
+        spliced holds the [summary, members] lists of this build holding reused members.
+        The ReprCached objects below each object are kept per cache key, as a build at one
+        depth can reach fewer of them than the definition cached for another depth holds.
+        relinked holds the objects whose members were built with their children for each
+        key, which commit() links once the build is complete.
+        descendants is the stack of the ids of the ReprCached objects found anywhere below
+        each object being built, kept in its cache entry. reached holds the ids of every
+        ReprCached object built or held by a reused definition in this build. A definition
+        holding an object already reached is not reused, as a fresh build could give a
+        back reference in place of one of the two copies.
+    """
+
+    __slots__ = (
+        "owners",
+        "children",
+        "claimed",
+        "reused",
+        "tainted",
+        "pending",
+        "spliced",
+        "relinked",
+        "descendants",
+        "reached",
+    )
+
+    def __init__(self):
+        self.owners = []
+        self.children = []
+        self.claimed = set()
+        self.reused = set()
+        self.tainted = set()
+        self.pending = []
+        self.spliced = []
+        self.relinked = {}
+        self.descendants = []
+        self.reached = set()
+
+    def owner(self):
+        """Return the ReprCached object whose members are being built, or None"""
+        return self.owners[-1] if self.owners else None
+
+    def visit(self, source):
+        """Link source to the object being built and claim the objects above it
+        Raises:
+            _CacheConflict: if source is held by a definition already reused in this build
+        """
+        self.reached.add(id(source))
+        if self.owners:
+            owner = self.owners[-1]
+            self.children[-1][id(source)] = source
+            self.descendants[-1].add(id(source))
+            parents = source.__dict__.get(_PARENTS)
+            if parents is None:
+                parents = {}
+                object.__setattr__(source, _PARENTS, parents)
+            parent_ref = parents.get(id(owner))
+            if parent_ref is None or parent_ref() is not owner:
+                # The id() of a parent that has been collected can be reused by owner
+                _prune(parents)
+                parents[id(owner)] = weakref.ref(owner)
+        claimed, reused = self.claimed, self.reused
+        stack = _parents(source)
+        while stack:
+            parent = stack.pop()
+            if id(parent) in claimed:
+                continue
+            if id(parent) in reused:
+                raise _CacheConflict(parent)
+            claimed.add(id(parent))
+            stack.extend(_parents(parent))
+
+    def reuse(self, source, obj_defn, key, recursion, max_recursion):
+        """Set the cached members of source in obj_defn if they can be reused
+        Returns:
+            int: the height of the cached build, None if source has to be built
+        """
+        if id(source) in self.claimed:
+            return None
+        cache = source.__dict__.get(_CACHE)
+        entry = None if cache is None else cache.get(key)
+        if (
+            entry is None
+            or recursion + entry[1] > max_recursion
+            or not self.reached.isdisjoint(entry[3])
+        ):
+            return None
+        self.reached.update(entry[3])
+        if self.descendants:
+            self.descendants[-1].update(entry[3])
+        self.reused.add(id(source))
+        self.spliced.append((obj_defn, entry))
+        obj_defn[1] = entry[0]
+        return entry[1]
+
+    def enter(self, source):
+        """Start building the members of source"""
+        self.owners.append(source)
+        self.children.append({})
+        self.descendants.append(set())
+
+    def leave(self, source, key, members, height, cacheable):
+        """Finish building the members of source, queueing them to be cached if possible"""
+        self.owners.pop()
+        children = self.children.pop()
+        descendants = self.descendants.pop()
+        if self.descendants:
+            self.descendants[-1].update(descendants)
+        self.relinked.setdefault(id(source), (source, {}))[1][key] = children
+        if cacheable:
+            self.pending.append((source, key, members, height, descendants))
+        else:
+            _discard(source, key)
+
+    def taint(self, owner):
+        """Stop owner and the objects above it being cached, a summary below them changed"""
+        tainted = self.tainted
+        stack = [owner]
+        while stack:
+            cur_obj = stack.pop()
+            if id(cur_obj) not in tainted:
+                tainted.add(id(cur_obj))
+                stack.extend(_parents(cur_obj))
+
+    def commit(self):
+        """Store the definitions built in this build that are safe to reuse"""
+        for source, key, members, height, descendants in self.pending:
+            if id(source) in self.tainted:
+                _discard(source, key)
+                continue
+            cache = source.__dict__.get(_CACHE)
+            if cache is None:
+                cache = {}
+                object.__setattr__(source, _CACHE, cache)
+            cache[key] = [members, height, None, descendants]
+        self.pending = []
+        for source, children in self.relinked.values():
+            _relink(source, children)
+        self.relinked = {}
+
+    def repr_text(self, obj_defn):
+        """Return repr(obj_defn), copying the kept text of every reused definition"""
+        spliced = self.spliced
+        for cur_defn, entry in spliced:
+            if entry[2] is None:
+                entry[2] = repr(entry[0])
+            cur_defn[1] = _Text(entry[2])
+        try:
+            return repr(obj_defn)
+        finally:
+            for cur_defn, entry in spliced:
+                cur_defn[1] = entry[0]
+
+
+class _Text:
+    """Value whose repr() is a text built earlier"""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return self.text
+
+
+def _discard(source, key):
+    """Drop a definition cached by an earlier build that no longer matches a fresh build"""
+    cache = source.__dict__.get(_CACHE)
+    if cache:
+        cache.pop(key, None)
+
+
+def _relink(source, children):
+    """Replace the children of the keys of source built again, unlinking those left behind
+    Args:
+        source (ReprCached): object whose members were built
+        children (dict): for each key built, the children reached keyed by their id()
+    Additional Information:
+        Children are held until source is built again at the same key, even once its own
+        definition is no longer cached, as the definitions cached for the objects above it
+        can still hold the one built. A child stops marking source dirty once no key of
+        source holds it.
+    """
+    linked = source.__dict__.get(_CHILDREN)
+    if linked is None:
+        linked = {}
+        object.__setattr__(source, _CHILDREN, linked)
+    old_children = {}
+    for key, cur_children in children.items():
+        old_children.update(linked.get(key, {}))
+        linked[key] = cur_children
+    for child_id, child in old_children.items():
+        if not any(child_id in cur_children for cur_children in linked.values()):
+            child.__dict__.get(_PARENTS, {}).pop(id(source), None)
+
+
+def _prune(parents):
+    """Remove the references to collected objects from a dict of parents"""
+    for parent_id, parent_ref in list(parents.items()):
+        if parent_ref() is None:
+            del parents[parent_id]
+
+
+def _parents(source):
+    """Return the live objects holding source in their last built definition"""
+    parents = source.__dict__.get(_PARENTS)
+    if not parents:
+        return []
+    live = []
+    for parent_id, parent_ref in list(parents.items()):
+        parent = parent_ref()
+        if parent is None:
+            del parents[parent_id]
+        else:
+            live.append(parent)
+    return live
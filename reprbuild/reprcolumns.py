@@ -0,0 +1,214 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Columnar definitions of the lists and tuples holding objects of a single class
+
+A columnar definition replaces the [summary, members] list of each object by a dict:
+    {COLUMNS: class name, "rows": count, "names": [name or None, ...] or None,
+     "refs": {row: reference number}, "columns": {attribute: column}}
+"names" is the string "name" when the names are those held in the name column. Each column
+holds the definition of its attribute for every row, None where the row has no such
+attribute. A column whose values are all [f"class: {name}", (text, name)] builtins of the
+same class is stored as the tuple (name, [text, ...]).
+"""
+from .constants import COLUMNS
+from .reprarray import ndarray_from_text
+from .reprliteral import _BUILTIN_CLASSES
+
+
+class _RowSummary:
+    """Stands in for the definition of a row in the memo of a build
+
+    Args:
+        prefix (str): "class: <class name>" summary of the rows
+        name (str): name of the row, None if it has none
+        refs (dict): the "refs" of the columnar definition, given the reference number of
+                     the row if it is shared
+
+    Additional Information:
+        _BuildState.reference() reads and appends ",ref: N" to the summary of a shared
+        object, here the reference number is recorded in refs instead.
+    """
+
+    __slots__ = ("prefix", "name", "refs", "row")
+
+    def __init__(self, prefix, name, refs, row):
+        self.prefix = prefix
+        self.name = name
+        self.refs = refs
+        self.row = row
+
+    def __getitem__(self, index):
+        if index != 0:
+            raise IndexError(index)
+        summary = _row_summary(self.prefix, self.name)
+        ref = self.refs.get(self.row)
+        return summary if ref is None else f"{summary},ref: {ref}"
+
+    def __setitem__(self, index, summary):
+        if index != 0:
+            raise IndexError(index)
+        self.refs[self.row] = summary.rpartition(",ref: ")[2]
+
+
+def _row_summary(prefix, name):
+    """Return the summary of a row, as _get_summary() gives it"""
+    return prefix if name is None else f"{prefix},name: {name}"
+
+
+def _compact_column(cells):
+    """Return a column of definitions, as (class name, texts) if they are all one builtin"""
+    class_name = summary = None
+    texts = []
+    for cell in cells:
+        if cell is None:
+            texts.append(None)
+            continue
+        if cell.__class__ is not list:
+            return cells
+        defn = cell[1]
+        if defn.__class__ is not tuple or len(defn) != 2:
+            return cells
+        if class_name is None:
+            class_name = defn[1]
+            summary = f"class: {class_name}"
+        if defn[1] != class_name or cell[0] != summary or defn[0].__class__ is not str:
+            return cells
+        texts.append(defn[0])
+    if class_name is None or class_name.__class__ is not str:
+        return cells
+    return (class_name, texts)
+
+
+def is_columnar(obj_defn):
+    """Return True if obj_defn is the columnar definition of a list or tuple"""
+    return obj_defn.__class__ is dict and COLUMNS in obj_defn
+
+
+def expand_columns(obj_defn):
+    """Return the [summary, members] list of each row of a columnar definition
+    Args:
+        obj_defn (dict): columnar definition of a list or tuple
+    Returns:
+        list: the members of the list or tuple, as a row by row build gives them
+    """
+    return list(ReprColumns(obj_defn))
+
+
+class ReprColumns:
+    """Read only view of the columnar definition of a list or tuple of objects
+
+    Args:
+        obj_defn (dict): the columnar definition
+
+    Additional Information:
+        Columns are read without building the definition of each row. Rows are only built
+        by row() and iteration, one at a time.
+    """
+
+    __slots__ = ("_defn",)
+
+    def __init__(self, obj_defn):
+        self._defn = obj_defn
+
+    def __repr__(self):
+        return f"ReprColumns for {len(self)} {self.class_name}"
+
+    def __len__(self):
+        return self._defn["rows"]
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.row(row)
+
+    @property
+    def class_name(self):
+        """Return the class of the objects in the rows"""
+        return self._defn[COLUMNS]
+
+    @property
+    def attributes(self):
+        """Return the names of the columns, in representation order"""
+        return tuple(self._defn["columns"])
+
+    @property
+    def names(self):
+        """Return the name of the object in each row, "" for objects without a name"""
+        names = self._row_names()
+        if names is None:
+            return [""] * len(self)
+        return ["" if name is None else name for name in names]
+
+    def _row_names(self):
+        """Return the stored name of each row, None if no row has a name"""
+        names = self._defn["names"]
+        if names.__class__ is str:
+            return self._defn["columns"][names]
+        return names
+
+    def column(self, attr_name, default=None):
+        """Return the value of an attribute for every row
+        Args:
+            attr_name (str): attribute of the rows
+            default (list): returned if the rows have no such attribute
+        Returns:
+            list: for a column of ints, floats, complex, bools or ndarrays the values,
+                  otherwise the definition of each row as stored, None where a row has no
+                  value
+        Raises:
+            ReprBuildError: if an ndarray definition is invalid
+        """
+
+        column = self._defn["columns"].get(attr_name)
+        if column is None:
+            return default
+        if column.__class__ is not tuple:
+            return list(column)
+        class_name, texts = column
+        if class_name == "ndarray":
+            to_value = ndarray_from_text
+        else:
+            to_value = _BUILTIN_CLASSES.get(class_name)
+        if to_value is None:
+            return list(texts)
+        return [None if text is None else to_value(text) for text in texts]
+
+    def row(self, row):
+        """Return the [summary, members] representation of the object in a row
+        Args:
+            row (int): index of the row, negative indexes count from the end
+        Returns:
+            list: the representation of the row object
+        Raises:
+            IndexError: if there is no such row
+        """
+        count = len(self)
+        if row < 0:
+            row += count
+        if not 0 <= row < count:
+            raise IndexError(f"row {row} out of range")
+        names = self._row_names()
+        summary = _row_summary(
+            f"class: {self.class_name}", None if names is None else names[row]
+        )
+        ref = self._defn["refs"].get(row)
+        if ref is not None:
+            summary = f"{summary},ref: {ref}"
+        members = {}
+        for attr_name, column in self._defn["columns"].items():
+            if column.__class__ is tuple:
+                text = column[1][row]
+                if text is not None:
+                    members[attr_name] = [f"class: {column[0]}", (text, column[0])]
+            elif column[row] is not None:
+                members[attr_name] = column[row]
+        return [summary, members]
@@ -0,0 +1,529 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Recursive engine of build_repr, building the definition of an object and its attributes
+"""
+from .constants import COLUMNS, REPRATTRIBUTES, MAXRECURSION
+from .reprbase import (
+    _get_repr_plan,
+    _get_summary,
+    _memo_lookup,
+    _PROFILE,
+    _shared_summary,
+)
+from .reprbudget import _elision, ELIDED_KEY
+from .reprcache import ReprCached, _CacheState
+from .reprcolumns import _compact_column, _RowSummary
+from .reprhandlers import _DISPATCH, _resolve_handler, _UNRESOLVED
+
+# Classes of values whose repr() can not change while they are held
+_LITERAL_TYPES = frozenset((str, int, float, complex, bool, bytes, type(None)))
+
+
+def build_attribute_defn(
+    source,
+    attribute,
+    depth=-1,
+    deepdive=False,
+    recursion=0,
+    *,
+    state=None,
+):
+    """
+    Args:
+        source (Unknown)    : Source object containing the attribute to be defined
+        attribute (Unknown) : Name of the source's attribute to define
+        depth (int)         : if == 0 : return object summary only as string
+                              if != 1 : return a recursively build representation for the attribute
+                                       a starting depth -1 will fully expand all attributes
+        deepdive (boolean)  : if True append attributes returned from dir() to list
+        recursion (int)     : prevent unlimited recursion in case of circular references
+        state (_BuildState) : shared state for the build, if None repeated objects are not
+                              replaced by back references
+    Raises:
+        ValueError: invalid value
+    Returns:
+        list: [summary, dictionary] representation of attribute
+    Raises:
+    Additional Information:
+            attr_defn[0]: Summary of the attribute
+            attr_defn[1]: Representation of a dictionary for members of the attribute
+                                listed in _repr_attrs for its class
+    """
+    if _PROFILE[0] is not None:
+        return _PROFILE[0]._call(
+            "build_attribute_defn",
+            _attribute_defn,
+            source,
+            attribute,
+            depth,
+            deepdive,
+            recursion,
+            state=state,
+        )
+    return _attribute_defn(source, attribute, depth, deepdive, recursion, state=state)
+
+
+def _attribute_defn(source, attribute, depth, deepdive, recursion, *, state):
+    """Build the definition of an attribute, see build_attribute_defn()"""
+    if attribute is None:
+        attr = source
+    else:
+        attr = getattr(source, attribute, None)
+    if attr is None:
+        return None
+    budget = None if state is None else state.budget
+    if isinstance(attr, str):
+        if budget is not None and not (
+            budget.fits(len(attr) + 2) and budget.keep(attr)
+        ):
+            return None
+        return attr
+    if state is None or state.summaries is None:
+        attr_defn = [_get_summary(attr), None]
+    else:
+        attr_defn = [_shared_summary(attr, state.summaries), None]
+    handler = _DISPATCH.get(attr.__class__, _UNRESOLVED)
+    if handler is _UNRESOLVED:
+        handler = _resolve_handler(attr.__class__)
+    kept = True
+    if handler is not None:
+        if budget is not None:
+            attr_defn = _build_handler_defn(attr, attr_defn, handler, budget, state)
+        else:
+            attr_defn[1] = handler[0](attr)
+            if state is not None and not handler[1]:
+                state.events += 1
+    elif depth != 0:
+        if hasattr(attr, REPRATTRIBUTES):
+            attr_defn = build_object_defn(
+                attr,
+                getattr(attr, REPRATTRIBUTES),
+                depth=depth - 1,
+                deepdive=deepdive,
+                recursion=recursion + 1,
+                state=state,
+            )
+        elif isinstance(attr, (list, tuple, set, dict)):
+            attr_defn = _build_container_defn(
+                attr, attr_defn, depth, deepdive, recursion, state=state
+            )
+        else:
+            attr_defn[1] = repr(attr)
+            if state is not None:
+                state.events += 1
+            kept = budget is None or budget.keep(attr_defn)
+    elif state is not None:
+        _summary_only(attr, state)
+        kept = budget is None or budget.keep(attr_defn)
+
+    return attr_defn if kept else None
+
+
+def _build_handler_defn(attr, attr_defn, handler, budget, state):
+    """Build the definition of a value with a type handler if it fits in the budget
+    Returns:
+        list: attr_defn with the definition set, None if it does not fit
+    """
+    size = len(repr(attr_defn[0])) + len("[, ]")
+    if handler[2] is not None:
+        # The least size of the text, so values that can not fit are never built
+        size += handler[2](attr)
+    if not budget.fits(size):
+        return None
+    attr_defn[1] = handler[0](attr)
+    if not handler[1]:
+        state.events += 1
+    if not budget.keep(attr_defn):
+        return None
+    return attr_defn
+
+
+def _build_container_defn(attr, attr_defn, depth, deepdive, recursion, *, state):
+    """Build the definition of a list, tuple, set or dict attribute
+    Returns:
+        list: the definition or a back reference, None if it does not fit in the budget
+    """
+    budget = None if state is None else state.budget
+    if budget is not None and not budget.admits(attr_defn[0]):
+        return None
+    ref_defn = _memo_lookup(state, attr, attr_defn, depth, "container")
+    if ref_defn is not None:
+        if budget is not None:
+            budget.reference(attr_defn[0])
+        return ref_defn
+    if budget is not None:
+        budget.open(attr_defn[0])
+        if isinstance(attr, dict):
+            attr_defn[1] = _build_dict_defn(attr, depth, deepdive, recursion, state)
+        else:
+            attr_defn[1] = _build_list_defn(attr, depth, deepdive, recursion, state)
+        budget.close()
+        return attr_defn
+    columns_defn = None
+    if (
+        state is not None
+        and state.columnar is not None
+        and (attr.__class__ is list or attr.__class__ is tuple)
+        and len(attr) >= state.columnar
+    ):
+        columns_defn = _build_columns_defn(attr, depth, deepdive, recursion, state)
+    if columns_defn is not None:
+        attr_defn[1] = columns_defn
+    elif (
+        state is not None
+        and state.parallel is not None
+        and state.parallel.wants(attr, state)
+    ):
+        attr_defn[1] = state.parallel.build(attr, depth, deepdive, recursion, state)
+    elif isinstance(attr, dict):
+        attr_defn[1] = _build_dict_defn(attr, depth, deepdive, recursion, state)
+    else:
+        attr_defn[1] = _build_list_defn(attr, depth, deepdive, recursion, state)
+    return attr_defn
+
+
+def _summary_only(attr, state):
+    """Record what the summary of an object built to depth 0 depends on"""
+    if isinstance(attr, ReprCached):
+        if state.cache is not None and state.cache.owners:
+            state.cache.visit(attr)
+    elif not isinstance(attr, (list, tuple, set, dict)):
+        state.events += 1
+
+
+def _build_list_defn(attr, depth, deepdive, recursion, state):
+    """Build the definition of the members of a list, tuple or set"""
+    repr_list = []
+    if len(attr) > 0:
+        budget = None if state is None else state.budget
+        for cur_attr in attr:
+            if cur_attr is None:
+                continue
+            if hasattr(cur_attr, REPRATTRIBUTES):
+                cur_repr = build_object_defn(
+                    cur_attr,
+                    getattr(cur_attr, REPRATTRIBUTES),
+                    depth=depth - 1,
+                    deepdive=deepdive,
+                    recursion=recursion + 1,
+                    state=state,
+                )
+            elif isinstance(cur_attr, (list, tuple, set, dict)):
+                cur_repr = build_object_defn(
+                    cur_attr,
+                    None,
+                    depth=depth - 1,
+                    deepdive=deepdive,
+                    recursion=recursion + 1,
+                    state=state,
+                )
+            else:
+                cur_repr = repr(cur_attr)
+                if state is not None and cur_attr.__class__ not in _LITERAL_TYPES:
+                    state.events += 1
+                if budget is not None and not budget.keep(cur_repr, len(", ")):
+                    cur_repr = None
+            if budget is not None and budget.spent:
+                # cur_repr is None if it did not fit, or was cut short by the budget
+                if cur_repr is not None:
+                    repr_list.append(cur_repr)
+                if len(repr_list) < len(attr):
+                    marker = _elision(len(attr) - len(repr_list))
+                    # Set members are repr() strings, so is the marker of a set
+                    repr_list.append(repr(marker) if isinstance(attr, set) else marker)
+                break
+            repr_list.append(cur_repr)
+    if isinstance(attr, tuple):
+        repr_list = tuple(repr_list)
+    elif isinstance(attr, set):
+        repr_list = set(repr_list)
+    return repr_list
+
+
+def _build_columns_defn(attr, depth, deepdive, recursion, state):
+    """Build the columnar definition of a list or tuple of objects of a single class
+    Returns:
+        dict: the definition, see reprcolumns, None if the members can not be put in columns
+
+    Additional Information:
+        The members must all be of one class, other than ReprCached, with the same resolved
+        attributes, and none of them may have been built already, so no row is a back
+        reference. None members are left out as they are from a list built row by row. The
+        rows are built in order with each member memoised, so later occurrences of a row
+        are back references to it.
+    """
+    rows = [cur_attr for cur_attr in attr if cur_attr is not None]
+    if len(rows) < state.columnar or recursion + 1 > MAXRECURSION:
+        return None
+    row_class = rows[0].__class__
+    if issubclass(row_class, ReprCached):
+        return None
+    memo_depth = -1 if depth - 1 < 0 else depth - 1
+    members = None
+    seen = set()
+    for cur_row in rows:
+        attr_list = getattr(cur_row, REPRATTRIBUTES, None)
+        if (
+            cur_row.__class__ is not row_class
+            or attr_list is None
+            or id(cur_row) in seen
+            or (id(cur_row), memo_depth, "object") in state.memo
+        ):
+            return None
+        seen.add(id(cur_row))
+        cur_members = _get_repr_plan(cur_row, attr_list, deepdive).resolve(cur_row)
+        if members is None:
+            members = cur_members
+        elif cur_members != members:
+            return None
+
+    state.deepest = max(state.deepest, recursion + 1)
+    state.events += 1
+    prefix = f"class: {row_class.__name__}"
+    names = []
+    refs = {}
+    columns = {cur_member: [] for cur_member, _ in members}
+    for row, cur_row in enumerate(rows):
+        name = getattr(cur_row, "name", None)
+        if name is not None:
+            name = f"{name}"
+        names.append(name)
+        state.lookup(
+            cur_row,
+            _RowSummary(prefix, name, refs, row),
+            (id(cur_row), memo_depth, "object"),
+        )
+        for cur_member, cur_depth in members:
+            columns[cur_member].append(
+                build_attribute_defn(
+                    cur_row,
+                    cur_member,
+                    depth=depth - 1 if cur_depth is None else cur_depth,
+                    deepdive=deepdive,
+                    recursion=recursion + 2,
+                    state=state,
+                )
+            )
+    if names.count(None) == len(names):
+        names = None
+    elif names == columns.get("name"):
+        # The summaries repeat the name attribute, read them from its column
+        names = "name"
+    return {
+        COLUMNS: row_class.__name__,
+        "rows": len(rows),
+        "names": names,
+        "refs": refs,
+        "columns": {
+            cur_member: _compact_column(cells) for cur_member, cells in columns.items()
+        },
+    }
+
+
+def _build_dict_defn(attr, depth, deepdive, recursion, state):
+    """Build the definition of the members of a dict"""
+    repr_list = {}
+    if len(attr) > 0:
+        repr_list = {}
+        budget = None if state is None else state.budget
+        for cur_key, cur_attr in attr.items():
+            if cur_attr is None:
+                continue
+            if budget is not None:
+                # Room for the key is kept back while the value is built
+                key_size = len(repr(cur_key)) + len(": , ")
+                budget.reserved += key_size
+            if hasattr(cur_attr, REPRATTRIBUTES):
+                cur_repr = build_object_defn(
+                    cur_attr,
+                    getattr(cur_attr, REPRATTRIBUTES),
+                    depth=depth - 1,
+                    deepdive=deepdive,
+                    recursion=recursion + 1,
+                    state=state,
+                )
+            elif isinstance(cur_attr, (list, tuple, set, dict)):
+                list_dict = build_attribute_defn(
+                    cur_attr,
+                    None,
+                    depth=depth - 1,
+                    deepdive=deepdive,
+                    recursion=recursion + 1,
+                    state=state,
+                )
+                cur_repr = list_dict
+            else:
+                cur_repr = repr(cur_attr)
+                if state is not None and cur_attr.__class__ not in _LITERAL_TYPES:
+                    state.events += 1
+                if budget is not None and not budget.keep(cur_repr):
+                    cur_repr = None
+            if budget is not None:
+                budget.reserved -= key_size
+                if cur_repr is not None:
+                    budget.spend(key_size, 0)
+                if budget.spent:
+                    if cur_repr is not None:
+                        repr_list[cur_key] = cur_repr
+                    if len(repr_list) < len(attr):
+                        repr_list[ELIDED_KEY] = _elision(len(attr) - len(repr_list))
+                    break
+            repr_list[cur_key] = cur_repr
+    return repr_list
+
+
+def build_object_defn(
+    source,
+    attr_list=None,
+    depth=-1,
+    deepdive=False,
+    recursion=0,
+    *,
+    state=None,
+):
+    """Create a list with the summary string and recursive representation for the object
+    Args:
+        source (Unknown)    : Object to be built into a dictionary
+        attr_list  (list)   : List of the object's attributes to include
+        depth (int)         : if == 0 : return object summary only as string
+                              if != 1 : return list[ object summary, dict{ attribute :,repr to depth -1]
+                                       a starting depth -1 will fully expand all attributes
+        deepdive (boolean)  : if True append attributes returned from dir() to list
+        recursion (int)     : number of levels of recursion allowable for this representation
+        state (_BuildState) : shared state for the build, if None repeated objects are not
+                              replaced by back references
+    Returns:
+        list: summary of source object in element [0]
+              object definition in element[1]
+    Raises:
+        ReprBuildError: if a valid list of attributes is not found
+    Additional Information:
+    """
+    if _PROFILE[0] is not None:
+        return _PROFILE[0]._call(
+            "build_object_defn",
+            _object_defn,
+            source,
+            attr_list,
+            depth,
+            deepdive,
+            recursion,
+            state=state,
+        )
+    return _object_defn(source, attr_list, depth, deepdive, recursion, state=state)
+
+
+def _object_defn(source, attr_list, depth, deepdive, recursion, *, state):
+    """Build the definition of an object, see build_object_defn()"""
+    plan = _get_repr_plan(source, attr_list, deepdive)
+
+    obj_defn = [_get_summary(source), None]
+    budget = None if state is None else state.budget
+    if budget is not None and recursion > 0 and not budget.admits(obj_defn[0]):
+        return None
+    ref_defn = _memo_lookup(
+        state, source, obj_defn, depth, "members" if attr_list is None else "object"
+    )
+    if ref_defn is not None:
+        if budget is not None:
+            budget.reference(obj_defn[0])
+        return ref_defn
+    if budget is not None:
+        budget.open(obj_defn[0])
+
+    if state is not None and recursion > state.deepest:
+        state.deepest = recursion
+    if recursion > MAXRECURSION:
+        obj_defn[1] = f"<Recursion limit of {MAXRECURSION} exceeded>"
+        if state is not None:
+            state.events += 1
+        if budget is not None:
+            # Shorter than the marker the room was kept back for
+            budget.spend(len(repr(obj_defn[1])), 0)
+    elif (
+        state is not None
+        and state.budget is None
+        and not deepdive
+        and isinstance(source, ReprCached)
+        and attr_list is getattr(source, REPRATTRIBUTES, None)
+    ):
+        _build_cached_members(source, obj_defn, plan, depth, recursion, state=state)
+    else:
+        if state is not None and not isinstance(source, (list, tuple, set, dict)):
+            state.events += 1
+        obj_defn[1] = _build_members(
+            source, plan, depth, deepdive, recursion, state=state
+        )
+    if budget is not None:
+        budget.close()
+
+    return obj_defn
+
+
+def _build_members(source, plan, depth, deepdive, recursion, *, state):
+    """Build the dict of member definitions of an object"""
+    member_dict = {}
+    members = plan.resolve(source)
+    budget = None if state is None else state.budget
+    for cur_member, cur_depth in members:
+        if budget is not None:
+            # Room for the name is kept back while the value is built
+            key_size = len(repr(cur_member)) + len(": , ")
+            budget.reserved += key_size
+        cur_defn = build_attribute_defn(
+            source,
+            cur_member,
+            depth=depth if cur_depth is None else cur_depth,
+            deepdive=deepdive,
+            recursion=recursion + 1,
+            state=state,
+        )
+        if cur_defn is not None:
+            member_dict[cur_member] = cur_defn
+        if budget is not None:
+            budget.reserved -= key_size
+            if cur_defn is not None:
+                budget.spend(key_size, 0)
+            if budget.spent:
+                if len(member_dict) < len(members):
+                    member_dict[ELIDED_KEY] = _elision(len(members) - len(member_dict))
+                break
+    return member_dict
+
+
+def _build_cached_members(source, obj_defn, plan, depth, recursion, *, state):
+    """Set the member definitions of a ReprCached object, reusing its cached ones if clean
+
+    Additional Information:
+        The members are cached if nothing built below source added a back reference, hit
+        the recursion limit or used a value that can change without a tracked assignment.
+        The height of the build is kept so a definition is not reused where a fresh build
+        would reach the recursion limit.
+    """
+    cache = state.cache
+    if cache is None:
+        cache = state.cache = _CacheState()
+    cache.visit(source)
+    key = (plan, -1 if depth < 0 else depth)
+    height = cache.reuse(source, obj_defn, key, recursion, MAXRECURSION)
+    if height is not None:
+        state.deepest = max(state.deepest, recursion + height)
+        return
+
+    events, deepest = state.events, state.deepest
+    state.deepest = recursion
+    cache.enter(source)
+    obj_defn[1] = _build_members(source, plan, depth, False, recursion, state=state)
+    height = state.deepest - recursion
+    state.deepest = max(deepest, state.deepest)
+    cache.leave(source, key, obj_defn[1], height, state.events == events)
@@ -0,0 +1,181 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Structural differences between two parsed representations
+
+A change is a (kind, path, old, new) tuple. kind is "added", "removed", "changed" or
+"class_changed". path is the tuple of list indexes and dict keys leading from the root of the
+parsed representation to the value, so the members of an object are reached through index 1
+of its [summary, definition] list and its summary is index 0. old is None for added values
+and new is None for removed values.
+"""
+from .reprbinary import decode_binary
+from .reprbase import ReprBuildError
+from .reprhash import _SubtreeDigests
+from .reprindex import LazyMembers
+from .reprliteral import parse_literal, ReprSyntaxError
+from .reprparse import ReprParser
+from .reprsymbols import decode_symbols, is_compact
+
+
+def _parsed(obj_repr):
+    """Return the parsed representation and the digests to use for it"""
+    if isinstance(obj_repr, ReprParser):
+        tree = obj_repr._tree
+        if tree.digests is None:
+            tree.digests = _SubtreeDigests()
+        return obj_repr._repr_node, tree.digests
+    if isinstance(obj_repr, str):
+        try:
+            if is_compact(obj_repr):
+                obj_repr = decode_symbols(obj_repr)
+            else:
+                obj_repr = parse_literal(obj_repr)
+        except ReprSyntaxError as error:
+            raise ReprBuildError(f"Invalid representation: {error}") from error
+    elif isinstance(obj_repr, (bytes, bytearray, memoryview)):
+        obj_repr = decode_binary(obj_repr)
+    return obj_repr, _SubtreeDigests()
+
+
+def _summary_class(node):
+    """Return the class in the summary of a [summary, definition] list, or None"""
+    if node.__class__ is list and len(node) == 2 and isinstance(node[0], str):
+        summary = node[0]
+        if summary.startswith("class: ") or summary.startswith("<class '"):
+            return summary.split(",", 1)[0]
+    return None
+
+
+def diff_repr(old_repr, new_repr):
+    """Return the changes that turn one representation into another
+    Args:
+        old_repr (Union[str,bytes,list,ReprParser]): the earlier representation
+        new_repr (Union[str,bytes,list,ReprParser]): the later representation
+    Returns:
+        list: (kind, path, old, new) tuples in the order of the representation, see the
+              module documentation
+    Raises:
+        ReprBuildError: if a representation string or bytes can not be parsed
+    Additional Information:
+        Both representations are walked together and a pair of values is only descended
+        into if their digests differ, so unchanged regions are skipped after a single
+        digest comparison. The digests of a ReprParser are kept with its parsed
+        representation and reused by later calls. An object whose class changed is
+        reported once with its old and new definitions. Lists and tuples are compared by
+        position, with the extra members of the longer one added or removed at the end.
+    """
+    old_root, old_digests = _parsed(old_repr)
+    new_root, new_digests = _parsed(new_repr)
+    changes = []
+    stack = [((), old_root, new_root)]
+    while stack:
+        path, old, new = stack.pop()
+        if old is new or old_digests.digest(old) == new_digests.digest(new):
+            continue
+        old_class, new_class = _summary_class(old), _summary_class(new)
+        if old_class is not None and new_class is not None:
+            if old_class != new_class:
+                changes.append(("class_changed", path, old, new))
+                continue
+            if old[0] != new[0]:
+                changes.append(("changed", path + (0,), old[0], new[0]))
+            stack.append((path + (1,), old[1], new[1]))
+        elif isinstance(old, (dict, LazyMembers)) and isinstance(
+            new, (dict, LazyMembers)
+        ):
+            kept = [key for key in old if key in new]
+            added = [key for key in new if key not in old]
+            if kept + added != list(new):
+                # Added keys are applied at the end, any other order needs the whole dict
+                changes.append(("changed", path, old, new))
+                continue
+            for key, old_value in old.items():
+                if key not in new:
+                    changes.append(("removed", path + (key,), old_value, None))
+            changes.extend(("added", path + (key,), None, new[key]) for key in added)
+            stack.extend((path + (key,), old[key], new[key]) for key in reversed(kept))
+        elif old.__class__ is new.__class__ and isinstance(old, (list, tuple)):
+            common = min(len(old), len(new))
+            # Removed from the end first so the indexes stay valid when applied in order
+            for index in range(len(old) - 1, common - 1, -1):
+                changes.append(("removed", path + (index,), old[index], None))
+            for index in range(common, len(new)):
+                changes.append(("added", path + (index,), None, new[index]))
+            stack.extend(
+                (path + (index,), old[index], new[index])
+                for index in range(common - 1, -1, -1)
+            )
+        else:
+            changes.append(("changed", path, old, new))
+    return changes
+
+
+def apply_diff(obj_repr, changes):
+    """Return the representation obtained by applying changes from diff_repr()
+    Args:
+        obj_repr (Union[str,bytes,list,ReprParser]): the representation the changes were
+                    found against
+        changes (list): (kind, path, old, new) tuples returned by diff_repr()
+    Returns:
+        list: the changed parsed representation
+    Raises:
+        ReprBuildError: if a change does not match the representation
+    Additional Information:
+        obj_repr is not modified. Only the containers on the path of a change are copied,
+        everything else is shared with obj_repr.
+    """
+    root_holder = [_parsed(obj_repr)[0]]
+    # id() of each container copied so far, mapped to the copy
+    copies = {}
+    # (copy, parent, key) for each tuple copied as a list, converted back at the end
+    tuples = []
+    for kind, path, _, new in changes:
+        if kind not in ("added", "removed", "changed", "class_changed"):
+            raise ReprBuildError(f"Unknown change {kind}")
+        try:
+            container, key = root_holder, 0
+            for step in path:
+                container = _writable_child(container, key, copies, tuples)
+                key = step
+            if kind == "removed":
+                del container[key]
+            elif kind == "added" and isinstance(container, list):
+                container.insert(key, new)
+            else:
+                container[key] = new
+        except (IndexError, KeyError, TypeError) as error:
+            raise ReprBuildError(
+                f"Change {kind} at {path} does not match the representation: {error!r}"
+            ) from error
+    for copy, parent, key in reversed(tuples):
+        parent[key] = tuple(copy)
+    return root_holder[0]
+
+
+def _writable_child(container, key, copies, tuples):
+    """Return a copy of container[key] that can be changed, stored in its place"""
+    child = container[key]
+    if id(child) in copies:
+        return child
+    if isinstance(child, list):
+        copy = list(child)
+    elif isinstance(child, tuple):
+        copy = list(child)
+        tuples.append((copy, container, key))
+    elif isinstance(child, (dict, LazyMembers)):
+        copy = dict(child)
+    else:
+        raise TypeError(f"{type(child).__name__} value can not hold a change")
+    container[key] = copy
+    copies[id(copy)] = copy
+    return copy
@@ -0,0 +1,138 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Registry of the handlers building the definition of values such as numbers and arrays
+"""
+from .reprbase import ReprBuildError
+
+# Handler entry registered for a class, (handler, immutable, size), also used by its
+# subclasses
+_HANDLERS = {}
+
+# Handler entry, or None, resolved for each exact class seen by a build
+_DISPATCH = {}
+
+# Returned by _DISPATCH.get() for the classes not resolved yet
+_UNRESOLVED = object()
+
+# Top level module mapped to the function registering its handlers the first time one of
+# its classes is seen, so the module is only imported by builds that use it
+_LAZY_HANDLERS = {}
+
+
+def _builtin_defn(attr):
+    """Return the (text, class name) definition of a number"""
+    return (repr(attr), attr.__class__.__name__)
+
+
+def _ndarray_defn(attr):
+    """Return the (text, "ndarray") definition of an ndarray, its repr() if not lossless"""
+    import numpy as np
+
+    if attr.__class__ is np.ndarray:
+        from .reprarray import ndarray_spec
+
+        spec = ndarray_spec(attr)
+        if spec is not None:
+            return (spec, "ndarray")
+    # Stored like a value without a handler, so only lossless definitions carry the tag
+    return repr(attr)
+
+
+def _ndarray_size(attr):
+    """Return the least number of characters of the definition of an ndarray"""
+    import numpy as np
+
+    if attr.__class__ is not np.ndarray or attr.dtype.hasobject:
+        # Stored with repr(), which numpy summarises for large arrays
+        return 0
+    # Listed elements take at least a digit and a separator, base64 four characters for
+    # every three bytes
+    return min(attr.size * 2, attr.nbytes * 4 // 3)
+
+
+def _register_numpy():
+    """Register the handlers of the numpy scalars and ndarray"""
+    import numpy as np
+
+    # Handlers the user registered for these classes before numpy was seen are kept
+    for np_class in (np.integer, np.floating, np.complexfloating):
+        _HANDLERS.setdefault(np_class, (_builtin_defn, True, None))
+    _HANDLERS.setdefault(np.ndarray, (_ndarray_defn, True, _ndarray_size))
+
+
+for _builtin_class in (int, float, complex):
+    _HANDLERS[_builtin_class] = (_builtin_defn, True, None)
+_LAZY_HANDLERS["numpy"] = _register_numpy
+
+
+def register_type_handler(value_class, handler, immutable=False, size=None):
+    """Build the definition of the instances of a class with a handler
+    Args:
+        value_class (type): class whose instances, and those of its subclasses without a
+                    handler of their own, are built by handler
+        handler (callable): called with the value, returns the definition stored after its
+                    summary, by convention a (text, class name) tuple such as
+                    (value.isoformat(), "datetime") which ReprParser treats as a builtin
+        immutable (bool): True if a value can not change while it is held, so the
+                    definitions holding it can be cached for ReprCached objects
+        size (callable): optional, called with the value, returns the least number of
+                    characters the text of its definition takes, so a build with max_bytes
+                    leaves out the values that can not fit without building them
+    Returns:
+    Raises:
+        ReprBuildError: if value_class is not a class or handler is not callable
+
+    Additional Information:
+        Handlers are used for the attributes of objects, at any depth, in place of the
+        representation of objects with _repr_attrs and of the repr() of other values. The
+        members of lists, tuples, sets and dicts are still stored as their repr(). Strings
+        and None can not be given a handler.
+    """
+    if not isinstance(value_class, type) or value_class in (str, type(None)):
+        raise ReprBuildError(f"Can not register a handler for {value_class!r}")
+    if not callable(handler) or (size is not None and not callable(size)):
+        raise ReprBuildError(f"Handler for {value_class.__name__} is not callable")
+    _HANDLERS[value_class] = (handler, immutable, size)
+    _DISPATCH.clear()
+
+
+def unregister_type_handler(value_class):
+    """Remove the handler registered for a class
+    Args:
+        value_class (type): class passed to register_type_handler()
+    Returns:
+    Raises:
+        ReprBuildError: if no handler is registered for value_class
+    """
+    if _HANDLERS.pop(value_class, None) is None:
+        raise ReprBuildError(f"No handler registered for {value_class!r}")
+    _DISPATCH.clear()
+
+
+def _resolve_handler(value_class):
+    """Return the handler entry of a class, None if it has none, caching the result"""
+    mro = value_class.__mro__
+    if _LAZY_HANDLERS:
+        for cur_class in mro:
+            module = getattr(cur_class, "__module__", None) or ""
+            register = _LAZY_HANDLERS.pop(module.partition(".")[0], None)
+            if register is not None:
+                register()
+                _DISPATCH.clear()
+    entry = None
+    for cur_class in mro:
+        entry = _HANDLERS.get(cur_class)
+        if entry is not None:
+            break
+    _DISPATCH[value_class] = entry
+    return entry
@@ -0,0 +1,703 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Merkle fingerprints of objects and of their representations
+
+A container is hashed as its class tag and the parts of its members, where the part of a
+container is its digest and the part of any other value is its tagged, length prefixed
+bytes. A [summary, definition] list is hashed with the bytes of its definition in one go,
+and a [summary, (text, class name)] builtin is hashed inline like a value that is not a
+container, so there is one digest to compute per object or container. The members of dicts
+and sets are sorted by part, and the ",ref: N" tag on the summary of a shared object is
+left out, so the fingerprint does not depend on their order.
+A back reference is hashed as the object it refers to, so it does not matter which
+occurrence of a shared object is the definition. A back reference to an object that holds
+it, closing a cycle, is hashed as the reference without its number.
+"""
+import struct
+from functools import lru_cache
+from hashlib import blake2b
+
+from .constants import MAXRECURSION, REFERENCE, REPRATTRIBUTES
+from .reprbase import _get_repr_plan, _get_summary, _shared_summary
+from .reprcolumns import expand_columns, is_columnar
+from .reprhandlers import _builtin_defn, _DISPATCH, _resolve_handler, _UNRESOLVED
+from .reprindex import LazyMembers
+
+_DIGEST_SIZE = 16
+_LENGTH = struct.Struct("<I")
+_pack_length = _LENGTH.pack
+
+# Leading byte of the bytes of each class of value that is not a container
+_LEAF_TAGS = {
+    str: b"s",
+    int: b"i",
+    float: b"f",
+    complex: b"c",
+    bool: b"b",
+    bytes: b"y",
+    type(None): b"n",
+}
+_NONE_PART = b"n" + _LENGTH.pack(4) + b"None"
+
+# Classes of the list items that are hashed as the text of their repr() without any checks
+_PLAIN_LEAVES = frozenset((str, int, float, complex, bool, bytes))
+
+
+def _leaf_bytes(leaf):
+    """Return the tagged, length prefixed bytes a value that is not a container is hashed as"""
+    tag = _LEAF_TAGS.get(leaf.__class__, b"o")
+    if tag == b"s":
+        data = leaf.encode("utf-8", "surrogatepass")
+    elif tag == b"y":
+        data = leaf
+    else:
+        data = repr(leaf).encode("utf-8", "surrogatepass")
+    return tag + _pack_length(len(data)) + data
+
+
+def _text_bytes(text):
+    """Return the bytes a str is hashed as, _leaf_bytes(text) without the class lookup"""
+    data = text.encode("utf-8", "surrogatepass")
+    return b"s" + _pack_length(len(data)) + data
+
+
+# Bytes of the attribute names, class names and summaries of values without a name, which
+# recur throughout a representation
+_name_bytes = lru_cache(maxsize=4096)(_leaf_bytes)
+
+
+def _leaf_digest(leaf):
+    """Return the digest of a value that is not a container"""
+    return blake2b(_leaf_bytes(leaf), digest_size=_DIGEST_SIZE).digest()
+
+
+def _container_body(tag, parts, ordered=True):
+    """Return the bytes a container is hashed as, from the parts of its members"""
+    if not ordered:
+        parts.sort()
+    parts.append(tag)
+    return b"".join(parts)
+
+
+def _container_digest(tag, parts, ordered=True):
+    """Return the digest of a container from the parts of its members"""
+    return blake2b(
+        _container_body(tag, parts, ordered), digest_size=_DIGEST_SIZE
+    ).digest()
+
+
+class ReprFingerprint:
+    """Node of the hash tree of an object or representation
+
+    Args:
+        digest (bytes): digest of the value and everything below it
+        children (Union[dict,list,None]): fingerprints of the members, or of the items of a
+                    list or tuple, stored as the bytes hashed for builtins and values that
+                    are not containers. None for values with no members
+
+    Additional Information:
+        Fingerprints compare and hash by digest.
+    """
+
+    __slots__ = ("digest", "_children")
+
+    def __init__(self, digest, children=None):
+        self.digest = digest
+        self._children = children
+
+    def __eq__(self, other):
+        if isinstance(other, ReprFingerprint):
+            return self.digest == other.digest
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __repr__(self):
+        return f"ReprFingerprint({self.hexdigest()})"
+
+    def hexdigest(self):
+        """Return the digest as a string of hex digits"""
+        return self.digest.hex()
+
+    def get(self, path):
+        """Return the fingerprint of a member
+        Args:
+            path (Union[str,int,tuple,list]): attribute name, list index or dict key, or a
+                        sequence of them leading down from this fingerprint
+        Returns:
+            ReprFingerprint: fingerprint of the member, None if there is no such member
+        """
+        if not isinstance(path, (tuple, list)):
+            path = (path,)
+        node = self
+        for step in path:
+            if node._children is None:
+                return None
+            try:
+                child = node._children[step]
+            except (IndexError, KeyError, TypeError):
+                return None
+            if not isinstance(child, ReprFingerprint):
+                child = ReprFingerprint(
+                    blake2b(child, digest_size=_DIGEST_SIZE).digest()
+                )
+            node = child
+        return node
+
+
+def _part(entry):
+    """Return the bytes a member fingerprint or leaf is hashed as in its container"""
+    if isinstance(entry, ReprFingerprint):
+        return b"C" + entry.digest
+    return entry
+
+
+def _repr_node(summary, defn_part, children=None):
+    """Return the fingerprint of a [summary, definition] list"""
+    return ReprFingerprint(
+        _container_digest(b"l", [_leaf_bytes(summary), defn_part]), children
+    )
+
+
+def _object_node(summary, defn_body, children=None):
+    """Return the fingerprint of a [summary, definition] list whose definition is a
+    container, hashed with the bytes of the definition in one go"""
+    return ReprFingerprint(
+        blake2b(
+            b"R" + _text_bytes(summary) + defn_body, digest_size=_DIGEST_SIZE
+        ).digest(),
+        children,
+    )
+
+
+def _builtin_part(summary, text, class_name):
+    """Return the bytes a [summary, (text, class name)] builtin is hashed as in its container
+
+    Additional Information:
+        Builtins are hashed inline as values that are not containers are, so building the
+        fingerprint of an object hashes none of them on its own. Their digest is computed by
+        get() when it is asked for.
+    """
+    return b"B" + _name_bytes(summary) + _text_bytes(text) + _name_bytes(class_name)
+
+
+def _is_builtin_shaped(items):
+    """Return True if the item entries of a tuple are those of a (text, class name) builtin"""
+    return (
+        len(items) == 2
+        and items[0].__class__ is bytes
+        and items[1].__class__ is bytes
+        and items[0][:1] == b"s"
+        and items[1][:1] == b"s"
+    )
+
+
+def _cycle_part(summary):
+    """Return the bytes a back reference to an object that holds it is hashed as"""
+    return _builtin_part(summary, "", REFERENCE)
+
+
+class _Fingerprinter:
+    """Hash the representation build_object_defn would build, without building it
+
+    Args:
+        deepdive (bool): include the attributes found by deepdive
+        shared_refs (bool): replace repeated objects by back references, as build_repr does
+
+    Additional Information:
+        The traversal and memo keys follow build_object_defn, so the fingerprint equals the
+        one of the parsed representation build_repr returns. memo maps each memo key to
+        [source, fingerprint], the fingerprint is None while source is being hashed.
+        summaries holds the summary shared by all instances of a class, see _shared_summary,
+        names the bytes of each member name and numbers the bytes before and after the text
+        of the builtins of each number class, so they are hashed without a handler call.
+    """
+
+    __slots__ = ("deepdive", "memo", "summaries", "names", "numbers")
+
+    def __init__(self, deepdive=False, shared_refs=True):
+        self.deepdive = deepdive
+        self.memo = {} if shared_refs else None
+        self.summaries = {}
+        self.names = {}
+        self.numbers = {}
+
+    def _lookup(self, source, summary, memo_key):
+        """Return the fingerprint of source if it was already hashed, else None"""
+        if self.memo is None:
+            return None
+        entry = self.memo.get(memo_key)
+        if entry is None:
+            if not isinstance(source, (list, tuple, set, dict)) or len(source) > 0:
+                self.memo[memo_key] = [source, None]
+            return None
+        if entry[1] is None:
+            return _cycle_part(summary)
+        return entry[1]
+
+    def _store(self, node, memo_key):
+        """Keep the fingerprint of a source for the later back references to it"""
+        if self.memo is not None and memo_key in self.memo:
+            self.memo[memo_key][1] = node
+        return node
+
+    def object(self, source, attr_list, depth, recursion):
+        """Fingerprint of build_object_defn(source, attr_list)"""
+        plan = _get_repr_plan(source, attr_list, self.deepdive)
+        summary = _get_summary(source)
+        memo_key = (
+            id(source),
+            -1 if depth < 0 else depth,
+            "members" if attr_list is None else "object",
+        )
+        ref_node = self._lookup(source, summary, memo_key)
+        if ref_node is not None:
+            return ref_node
+        if recursion > MAXRECURSION:
+            return self._store(
+                _repr_node(
+                    summary,
+                    _leaf_bytes(f"<Recursion limit of {MAXRECURSION} exceeded>"),
+                ),
+                memo_key,
+            )
+        members = {}
+        parts = []
+        names = self.names
+        numbers = self.numbers
+        for cur_member, cur_depth in plan.resolve(source):
+            attr = getattr(source, cur_member, None)
+            if attr.__class__ is str:
+                entry = _text_bytes(attr)
+            elif attr.__class__ in numbers:
+                prefix, suffix = numbers[attr.__class__]
+                data = repr(attr).encode("utf-8", "surrogatepass")
+                entry = prefix + _pack_length(len(data)) + data + suffix
+            else:
+                entry = self.attribute(
+                    attr, depth if cur_depth is None else cur_depth, recursion + 1
+                )
+            if entry is not None:
+                members[cur_member] = entry
+                name = names.get(cur_member)
+                if name is None:
+                    name = names[cur_member] = _leaf_bytes(cur_member)
+                if entry.__class__ is ReprFingerprint:
+                    parts.append(name + b"C" + entry.digest)
+                else:
+                    parts.append(name + entry)
+        return self._store(
+            _object_node(summary, _container_body(b"d", parts, False), members),
+            memo_key,
+        )
+
+    def attribute(self, attr, depth, recursion):
+        """Fingerprint of build_attribute_defn for an attribute value"""
+        if attr is None:
+            return None
+        if isinstance(attr, str):
+            return _leaf_bytes(attr)
+        summary = _shared_summary(attr, self.summaries)
+        handler = _DISPATCH.get(attr.__class__, _UNRESOLVED)
+        if handler is _UNRESOLVED:
+            handler = _resolve_handler(attr.__class__)
+        if handler is not None:
+            if handler[0] is _builtin_defn and self.summaries.get(attr.__class__):
+                self.numbers[attr.__class__] = (
+                    b"B" + _name_bytes(summary) + b"s",
+                    _name_bytes(attr.__class__.__name__),
+                )
+            defn = handler[0](attr)
+            if (
+                defn.__class__ is tuple
+                and len(defn) == 2
+                and defn[0].__class__ is str
+                and defn[1].__class__ is str
+            ):
+                return _builtin_part(summary, *defn)
+            return fingerprint_repr([summary, defn])
+        if depth == 0:
+            node = _repr_node(summary, _NONE_PART)
+        elif hasattr(attr, REPRATTRIBUTES):
+            node = self.object(
+                attr, getattr(attr, REPRATTRIBUTES), depth - 1, recursion + 1
+            )
+        elif isinstance(attr, (list, tuple, set, dict)):
+            node = self._container(attr, summary, depth, recursion)
+        else:
+            node = _repr_node(summary, _leaf_bytes(repr(attr)))
+        return node
+
+    def _container(self, attr, summary, depth, recursion):
+        """Fingerprint of build_attribute_defn for a list, tuple, set or dict"""
+        memo_key = (id(attr), -1 if depth < 0 else depth, "container")
+        ref_node = self._lookup(attr, summary, memo_key)
+        if ref_node is not None:
+            return ref_node
+        if isinstance(attr, dict):
+            defn_body, children = self._dict(attr, depth, recursion)
+        else:
+            defn_body, children = self._list(attr, depth, recursion)
+            if attr.__class__ is tuple and _is_builtin_shaped(children):
+                # Parsed back, [summary, (text, text)] can not be told from a builtin
+                part = b"B" + _name_bytes(summary) + children[0] + children[1]
+                return self._store(part, memo_key)
+        return self._store(_object_node(summary, defn_body, children), memo_key)
+
+    def _list(self, attr, depth, recursion):
+        """Hashed bytes and item fingerprints of _build_list_defn"""
+        items = []
+        parts = []
+        for cur_attr in attr:
+            if cur_attr.__class__ in _PLAIN_LEAVES:
+                data = repr(cur_attr).encode("utf-8", "surrogatepass")
+                entry = b"s" + _pack_length(len(data)) + data
+                items.append(entry)
+                parts.append(entry)
+                continue
+            if cur_attr is None:
+                continue
+            if hasattr(cur_attr, REPRATTRIBUTES):
+                entry = self.object(
+                    cur_attr,
+                    getattr(cur_attr, REPRATTRIBUTES),
+                    depth - 1,
+                    recursion + 1,
+                )
+            elif isinstance(cur_attr, (list, tuple, set, dict)):
+                entry = self.object(cur_attr, None, depth - 1, recursion + 1)
+            else:
+                entry = _text_bytes(repr(cur_attr))
+            items.append(entry)
+            parts.append(entry if entry.__class__ is bytes else b"C" + entry.digest)
+        if isinstance(attr, tuple):
+            return _container_body(b"t", parts), items
+        if isinstance(attr, set):
+            return _container_body(b"e", parts, False), None
+        return _container_body(b"l", parts), items
+
+    def _dict(self, attr, depth, recursion):
+        """Hashed bytes and value fingerprints of _build_dict_defn"""
+        values = {}
+        parts = []
+        for cur_key, cur_attr in attr.items():
+            if cur_attr is None:
+                continue
+            if hasattr(cur_attr, REPRATTRIBUTES):
+                entry = self.object(
+                    cur_attr,
+                    getattr(cur_attr, REPRATTRIBUTES),
+                    depth - 1,
+                    recursion + 1,
+                )
+            elif isinstance(cur_attr, (list, tuple, set, dict)):
+                entry = self.attribute(cur_attr, depth - 1, recursion + 1)
+            else:
+                entry = _text_bytes(repr(cur_attr))
+            values[cur_key] = entry
+            parts.append(_leaf_bytes(cur_key) + _part(entry))
+        return _container_body(b"d", parts, False), values
+
+
+def fingerprint(source, **kwargs):
+    """Return the Merkle fingerprint of the representation of an object
+    Args:
+        source (Unknown): Object to be fingerprinted
+        **kwargs (params):
+            attr_list (Union[list,dict]): attributes to include, as for build_repr
+            depth (int): depth of the representation, as for build_repr
+            deepdive (bool): include class level attributes, as for build_repr
+            shared_refs (bool): if True (default) repeated objects are back references
+    Returns:
+        ReprFingerprint: fingerprint of the representation, with the fingerprint of every
+                         member available through get()
+    Raises:
+        ReprBuildError: if attr_list is not a list or a dict
+    Additional Information:
+        The object graph is walked as build_repr walks it but no definition or string is
+        built. The result equals ReprParser(build_repr(source, **kwargs)).fingerprint().
+    """
+    fingerprinter = _Fingerprinter(
+        deepdive=kwargs.get("deepdive", False),
+        shared_refs=kwargs.get("shared_refs", True),
+    )
+    return fingerprinter.object(
+        source, kwargs.get("attr_list"), kwargs.get("depth", -1), 0
+    )
+
+
+def fingerprint_repr(obj_repr):
+    """Return the Merkle fingerprint of a parsed representation
+    Args:
+        obj_repr (list): parsed representation, from parse_literal() or decode_binary()
+    Returns:
+        ReprFingerprint: fingerprint of the representation
+    Additional Information:
+        The representation is walked with an explicit stack so deep representations do not
+        hit the recursion limit. Columnar definitions are hashed as the list of their rows,
+        so they have the fingerprint of the same list built row by row. Each back reference
+        is hashed once the definition it refers to is.
+    """
+    done = {}
+    rows = {}
+    bodies = {}
+    targets, cycles = _index_references(obj_repr, rows)
+    stack = [(obj_repr, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if id(node) in done:
+            continue
+        number = _reference(node)
+        if number is not None:
+            target = targets.get(number)
+            if target is None or id(node) in cycles:
+                done[id(node)] = (node, _cycle_part(_untagged(node[0])))
+            elif id(target) in done:
+                done[id(node)] = (node, done[id(target)][1])
+            else:
+                stack.append((node, False))
+                stack.append((target, False))
+            continue
+        walked = node
+        if is_columnar(node):
+            if id(node) not in rows:
+                rows[id(node)] = expand_columns(node)
+            walked = rows[id(node)]
+        members = _members(walked)
+        if not children_done:
+            stack.append((node, True))
+            stack.extend(
+                (child, False)
+                for child in members
+                if _members(child) is not None and id(child) not in done
+            )
+            continue
+        done[id(node)] = (node, _tree_node(walked, done, bodies))
+        if walked is not node and id(walked) in bodies:
+            bodies[id(node)] = bodies[id(walked)]
+    if id(obj_repr) not in done:
+        return None
+    found = done[id(obj_repr)][1]
+    if found.__class__ is bytes:
+        return ReprFingerprint(blake2b(found, digest_size=_DIGEST_SIZE).digest())
+    return found
+
+
+def _index_references(obj_repr, rows):
+    """Return the node defining each reference number of a parsed representation and the
+    ids of the back references made from inside the node they refer to"""
+    targets = {}
+    cycles = set()
+    open_refs = set()
+    stack = [(obj_repr, None)]
+    while stack:
+        node, closed = stack.pop()
+        if closed is not None:
+            open_refs.discard(closed)
+            continue
+        number = _reference(node)
+        if number is not None:
+            if number in open_refs:
+                cycles.add(id(node))
+            continue
+        if is_columnar(node):
+            if id(node) not in rows:
+                rows[id(node)] = expand_columns(node)
+            node = rows[id(node)]
+        members = _members(node)
+        if members is None:
+            continue
+        if node.__class__ is list and len(node) == 2 and node[0].__class__ is str:
+            summary = node[0]
+            number = summary[summary.rfind(",ref: ") + 6 :]
+            if _untagged(summary) is not summary and number not in open_refs:
+                targets[number] = node
+                open_refs.add(number)
+                stack.append((None, number))
+        stack.extend((member, None) for member in members)
+    return targets, cycles
+
+
+def _reference(node):
+    """Return the number of a [summary, (number, REFERENCE)] back reference, else None"""
+    if node.__class__ is list and len(node) == 2 and node[0].__class__ is str:
+        defn = node[1]
+        if defn.__class__ is tuple and len(defn) == 2 and defn[1] == REFERENCE:
+            return defn[0]
+    return None
+
+
+def _untagged(summary):
+    """Return a summary without its ",ref: N" tag, the same string if it has none"""
+    ref_at = summary.rfind(",ref: ")
+    if ref_at >= 0 and "," not in summary[ref_at + 1 :]:
+        return summary[:ref_at]
+    return summary
+
+
+def _members(node):
+    """Return the values of a container of a parsed representation, None for other values"""
+    node_class = node.__class__
+    if node_class is dict or node_class is LazyMembers:
+        return [*node.keys(), *node.values()]
+    if node_class in (list, tuple, set, frozenset):
+        return node
+    return None
+
+
+def _tree_entry(value, done):
+    """Return the fingerprint or leaf bytes of a value of a parsed representation"""
+    if id(value) in done and done[id(value)][0] is value:
+        return done[id(value)][1]
+    return _leaf_bytes(value)
+
+
+def _tree_node(node, done, bodies):
+    """Return the fingerprint of a container whose members have been fingerprinted
+
+    Additional Information:
+        bodies maps the id() of each container that is not a [summary, definition] list to
+        the bytes it was hashed as and its member fingerprints, so the list holding it as a
+        definition hashes them again with its summary. The entry is kept, a parsed
+        representation can share one definition, such as (), between several lists.
+    """
+    if (
+        node.__class__ is list
+        and len(node) == 2
+        and isinstance(node[0], str)
+        and (node[0].startswith("class: ") or node[0].startswith("<class '"))
+    ):
+        # A [summary, definition] list, its members are those of the definition
+        summary = _untagged(node[0])
+        body = bodies.get(id(node[1]))
+        if body is None:
+            defn_entry = _tree_entry(node[1], done)
+            return _repr_node(
+                summary,
+                _part(defn_entry),
+                (
+                    defn_entry._children
+                    if isinstance(defn_entry, ReprFingerprint)
+                    else None
+                ),
+            )
+        if node[1].__class__ is tuple and _is_builtin_shaped(body[1]):
+            return b"B" + _name_bytes(summary) + b"".join(body[1])
+        return _object_node(summary, *body)
+    body = _tree_body(node, done)
+    bodies[id(node)] = body
+    return ReprFingerprint(blake2b(body[0], digest_size=_DIGEST_SIZE).digest(), body[1])
+
+
+def _tree_body(node, done):
+    """Return the bytes a container is hashed as and the fingerprints of its members"""
+    node_class = node.__class__
+    if node_class is dict or node_class is LazyMembers:
+        children = {key: _tree_entry(value, done) for key, value in node.items()}
+        parts = [
+            _part(_tree_entry(key, done)) + _part(entry)
+            for key, entry in children.items()
+        ]
+        return _container_body(b"d", parts, False), children
+    if node_class is set or node_class is frozenset:
+        parts = [_part(_tree_entry(value, done)) for value in node]
+        return _container_body(b"e", parts, False), None
+    children = [_tree_entry(value, done) for value in node]
+    parts = [_part(entry) for entry in children]
+    tag = b"t" if node_class is tuple else b"l"
+    return _container_body(tag, parts), children
+
+
+# Leading byte of the digest input for each class of container, matched on the exact class
+_CONTAINER_TAGS = {
+    list: b"l",
+    tuple: b"t",
+    dict: b"d",
+    LazyMembers: b"d",
+    set: b"e",
+    frozenset: b"e",
+}
+
+
+class _SubtreeDigests:
+    """Digests of the containers of a parsed representation, computed once per container
+
+    Additional Information:
+        The digest of a container covers its class and every value below it, in order
+        apart from set members which are sorted by digest. digests maps the id() of each
+        container to (container, digest), holding the container so its id can not be
+        reused.
+    """
+
+    __slots__ = ("digests",)
+
+    def __init__(self):
+        self.digests = {}
+
+    def digest(self, node):
+        """Return the digest of a value of the representation"""
+        if node.__class__ not in _CONTAINER_TAGS:
+            return _leaf_digest(node)
+        digests = self.digests
+        entry = digests.get(id(node))
+        if entry is not None:
+            return entry[1]
+
+        stack = [(node, False)]
+        while stack:
+            cur_node, children_done = stack.pop()
+            if id(cur_node) in digests:
+                continue
+            if not children_done:
+                stack.append((cur_node, True))
+                stack.extend(
+                    (child, False)
+                    for child in _children(cur_node)
+                    if child.__class__ in _CONTAINER_TAGS and id(child) not in digests
+                )
+                continue
+            digests[id(cur_node)] = (cur_node, self._container_digest(cur_node))
+        return digests[id(node)][1]
+
+    def _container_digest(self, node):
+        """Return the digest of a container whose child containers have digests"""
+        digests = self.digests
+
+        def child_bytes(child):
+            if child.__class__ in _CONTAINER_TAGS:
+                return b"C" + digests[id(child)][1]
+            return _leaf_bytes(child)
+
+        tag = _CONTAINER_TAGS[node.__class__]
+        if tag == b"d":
+            parts = [
+                child_bytes(key) + child_bytes(value) for key, value in node.items()
+            ]
+        elif tag == b"e":
+            # Members are sorted by digest so the order of a set does not matter
+            parts = sorted(
+                blake2b(child_bytes(child), digest_size=_DIGEST_SIZE).digest()
+                for child in node
+            )
+        else:
+            parts = [child_bytes(child) for child in node]
+        parts.append(tag)
+        return blake2b(b"".join(parts), digest_size=_DIGEST_SIZE).digest()
+
+
+def _children(node):
+    """Return the keys and values, or the members, of a container"""
+    if _CONTAINER_TAGS[node.__class__] == b"d":
+        return [*node.keys(), *node.values()]
+    return node
@@ -0,0 +1,268 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Offset index of the members of a representation string, used to parse members on demand
+"""
+import re
+from collections.abc import Mapping
+
+from .reprliteral import parse_literal, ReprSyntaxError
+
+_STRING = r"""'[^'\\\n]*(?:\\.[^'\\\n]*)*'|"[^"\\\n]*(?:\\.[^"\\\n]*)*\""""
+
+
+class _Syntax:
+    """Patterns and characters for scanning str, or bytes-like text such as an mmap
+
+    Args:
+        kind (type): str or bytes
+    """
+
+    __slots__ = (
+        "string",
+        "value_token",
+        "bracket_skip",
+        "space",
+        "opens",
+        "closes",
+        "ends",
+        "decode",
+    )
+
+    def __init__(self, kind):
+        def compile_pattern(pattern):
+            return re.compile(pattern if kind is str else pattern.encode("ascii"))
+
+        self.string = compile_pattern(_STRING)
+        # Tokens that can end a value, or hold a ',' or bracket that does not
+        self.value_token = compile_pattern(_STRING + r"|[\[\](){},]")
+        # Text up to the next bracket, including any strings
+        self.bracket_skip = compile_pattern(r"""(?:[^'"\[\](){}]+|""" + _STRING + ")*")
+        self.space = compile_pattern(r"\s*")
+        # Sets of the items returned by text[pos], 1 character strings or byte values
+        self.opens = frozenset("[({" if kind is str else b"[({")
+        self.closes = frozenset(")]}" if kind is str else b")]}")
+        self.ends = frozenset(",)]}" if kind is str else b",)]}")
+        self.decode = str if kind is str else _decode_utf8
+
+
+def _decode_utf8(data):
+    return str(data, "utf-8")
+
+
+_STR_SYNTAX = _Syntax(str)
+_BYTES_SYNTAX = _Syntax(bytes)
+
+
+def lazy_repr(text, start=0, end=None):
+    """Return a representation whose members are parsed when they are first used
+    Args:
+        text (Union[str,bytes,mmap.mmap]): text holding the representation, bytes-like text
+                    is decoded as utf-8 and offsets are byte offsets
+        start (int): offset of the representation in text
+        end (int): offset of the end of the representation, defaults to the end of text
+    Returns:
+        list: [summary, LazyMembers] for a representation of an object with members,
+              None if the representation has another form and must be parsed in full
+    Raises:
+        ReprSyntaxError: if the brackets and strings of the representation are not valid
+    Additional Information:
+        Text is scanned once for the strings, brackets and commas that mark the start and
+        end of each member. Members are checked for errors when they are parsed, until then
+        their text is only held as offsets into text.
+    """
+    syntax = _STR_SYNTAX if isinstance(text, str) else _BYTES_SYNTAX
+    if end is None:
+        end = len(text)
+    summary_match, pos = _summary_match(syntax, text, start, end)
+    if summary_match is None:
+        return None
+
+    spans = {}
+    char, pos = _next_char(syntax, text, pos + 1, end)
+    while char != "}":
+        key_match = syntax.string.match(text, pos, end)
+        if key_match is None:
+            return None
+        char, pos = _next_char(syntax, text, key_match.end(), end)
+        if char != ":":
+            raise _syntax_error("Expecting ':' in dict", syntax, text, pos)
+        value_start = _skip_space(syntax, text, pos + 1, end)
+        value_end = _value_end(syntax, text, value_start, end)
+        spans[_string_value(syntax, key_match.group())] = (value_start, value_end)
+        char, pos = _next_char(syntax, text, value_end, end)
+        if char == ",":
+            char, pos = _next_char(syntax, text, pos + 1, end)
+        elif char != "}":
+            raise _syntax_error("Expecting ',' or '}'", syntax, text, pos)
+
+    char, pos = _next_char(syntax, text, pos + 1, end)
+    if char != "]":
+        return None
+    if _skip_space(syntax, text, pos + 1, end) != end:
+        raise _syntax_error("Unexpected text after the value", syntax, text, pos + 1)
+    return [
+        _string_value(syntax, summary_match.group()),
+        LazyMembers(text, spans),
+    ]
+
+
+def _summary_match(syntax, text, start, end):
+    """Match the summary of a representation of an object with members
+    Args:
+        syntax (_Syntax): patterns for the kind of text
+        text (Union[str,bytes,mmap.mmap]): text holding the representation
+        start (int): offset of the representation in text
+        end (int): offset of the end of the representation
+    Returns:
+        tuple: match of the summary string and the offset of the opening '{' of the
+               members, (None, start) if the text does not start as such a representation
+    """
+    char, pos = _next_char(syntax, text, start, end)
+    if char != "[":
+        return None, start
+    summary_match = syntax.string.match(
+        text, _skip_space(syntax, text, pos + 1, end), end
+    )
+    if summary_match is None:
+        return None, start
+    char, pos = _next_char(syntax, text, summary_match.end(), end)
+    if char != ",":
+        return None, start
+    char, pos = _next_char(syntax, text, pos + 1, end)
+    if char != "{":
+        return None, start
+    return summary_match, pos
+
+
+class LazyMembers(Mapping):
+    """Read only mapping of member names to definitions parsed from spans of a text
+
+    Args:
+        text (Union[str,bytes,mmap.mmap]): text holding the representation
+        spans (dict): (start, end) offsets in text of the definition of each member
+    """
+
+    __slots__ = ("_text", "_syntax", "_spans", "_values", "_nodes")
+
+    def __init__(self, text, spans):
+        self._text = text
+        self._syntax = _STR_SYNTAX if isinstance(text, str) else _BYTES_SYNTAX
+        self._spans = spans
+        self._values = {}
+        self._nodes = {}
+
+    def __getitem__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        start, end = self._spans[name]
+        value = parse_literal(self._syntax.decode(self._text[start:end]))
+        self._values[name] = value
+        return value
+
+    def __iter__(self):
+        return iter(self._spans)
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __contains__(self, name):
+        return name in self._spans
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def node(self, name):
+        """Return the definition of a member, with its own members parsed on demand if possible
+        Args:
+            name (str): member name
+        Returns:
+            Union[list, object]: lazy_repr() of the member, or the parsed member if it is not
+                                 the representation of an object with members, or if it has
+                                 already been parsed. None if there is no such member
+        """
+        if name in self._values or name not in self._spans:
+            return self.get(name)
+        node = self._nodes.get(name)
+        if node is None:
+            node = lazy_repr(self._text, *self._spans[name])
+            if node is None:
+                return self[name]
+            self._nodes[name] = node
+        return node
+
+
+def _skip_space(syntax, text, pos, end):
+    return syntax.space.match(text, pos, end).end()
+
+
+def _next_char(syntax, text, pos, end):
+    """Return the first character after any white space at pos as a str, and its offset"""
+    pos = syntax.space.match(text, pos, end).end()
+    char = text[pos : pos + 1] if pos < end else text[0:0]
+    return (char if syntax is _STR_SYNTAX else char.decode("latin-1")), pos
+
+
+def _string_value(syntax, token):
+    """Return the value of a string token"""
+    token = syntax.decode(token)
+    if "\\" in token:
+        return parse_literal(token)
+    return token[1:-1]
+
+
+def _syntax_error(message, syntax, text, position):
+    """Return a ReprSyntaxError for an offset in a str or bytes-like text"""
+    if syntax is _STR_SYNTAX:
+        return ReprSyntaxError(message, text, position)
+    # Line and column are counted in the text up to the error
+    return ReprSyntaxError(message, syntax.decode(text[:position]), position)
+
+
+def _value_end(syntax, text, pos, end):
+    """Return the offset of the ',' or closing bracket that ends the value starting at pos"""
+    search = syntax.value_token.search
+    ends, opens = syntax.ends, syntax.opens
+    while True:
+        match = search(text, pos, end)
+        if match is None:
+            raise _syntax_error("Expecting ',' or '}'", syntax, text, end)
+        char = text[match.start()]
+        if char in ends:
+            return match.start()
+        pos = match.end()
+        if char in opens:
+            pos = _close_end(syntax, text, pos, end)
+
+
+def _close_end(syntax, text, pos, end):
+    """Return the offset after the bracket closing the container opened before pos"""
+    opened = pos - 1
+    depth = 1
+    skip = syntax.bracket_skip.match
+    opens, closes = syntax.opens, syntax.closes
+    while True:
+        pos = skip(text, pos, end).end()
+        if pos >= end:
+            raise _syntax_error("Unclosed bracket", syntax, text, opened)
+        char = text[pos]
+        if char in opens:
+            depth += 1
+        elif char in closes:
+            depth -= 1
+            if depth == 0:
+                return pos + 1
+        else:
+            raise _syntax_error("Unterminated string", syntax, text, pos)
+        pos += 1
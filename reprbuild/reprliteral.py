@@ -0,0 +1,393 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Parser for the subset of python literals used by the recursive representations
+"""
+import ast
+import re
+
+from .reprbase import ReprBuildError
+
+_REAL = r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?"
+_IMAGINARY = r"(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?[jJ]"
+_SINGLE_QUOTED = r"'[^'\\\n]*(?:\\.[^'\\\n]*)*'"
+_DOUBLE_QUOTED = r'"[^"\\\n]*(?:\\.[^"\\\n]*)*"'
+_TOKENS = rf"""
+        (?P<squote>{_SINGLE_QUOTED})
+        |(?P<dquote>{_DOUBLE_QUOTED})
+        |(?P<integer>\d+(?![\d.eEjJ+-]))
+        |(?P<complex>\({_REAL}[-+]{_IMAGINARY}\)|{_REAL}[-+]{_IMAGINARY})
+        |(?P<open>[\[({{])
+        |(?P<close>[\])}}])
+        |(?P<comma>,)
+        |(?P<colon>:)
+        |(?P<number>{_REAL}[jJ]?)
+        |(?P<name>None|True|False|set\(\)|[-+]?inf|nan)
+        |(?P<bytes>b(?:{_SINGLE_QUOTED}|{_DOUBLE_QUOTED}))
+    """
+_TOKEN_PATTERN = re.compile(rf"\s*(?:{_TOKENS})", re.VERBOSE | re.DOTALL)
+# Tokens of the body of a compact document, see reprsymbols, with the slots that hold a
+# symbol index read as one token: the opening of a [summary, definition] list, a complete
+# (text, class name) builtin and a dict key with its ':'
+_SYMBOL_TOKEN_PATTERN = re.compile(
+    rf"""\s*(?:
+        (?P<summary>\[\s*\d+\s*,)
+        |(?P<builtin>\((?:{_SINGLE_QUOTED}|{_DOUBLE_QUOTED}),\s*\d+\s*\))
+        |(?P<key>\d+\s*:)
+        |{_TOKENS}
+    )""",
+    re.VERBOSE | re.DOTALL,
+)
+_TRAILING_SPACE = re.compile(r"\s*")
+(
+    _SQUOTE,
+    _DQUOTE,
+    _INTEGER,
+    _COMPLEX,
+    _OPEN,
+    _CLOSE,
+    _COMMA,
+    _COLON,
+    _NUMBER,
+    _NAME,
+    _BYTES,
+) = range(1, 12)
+# Kinds of the slot tokens of _SYMBOL_TOKEN_PATTERN, whose groups come first
+_SYMBOL_GROUPS = 3
+_SUMMARY, _BUILTIN, _KEY = range(1 - _SYMBOL_GROUPS, 1)
+_NAMES = {
+    "None": None,
+    "True": True,
+    "False": False,
+    "inf": float("inf"),
+    "+inf": float("inf"),
+    "-inf": float("-inf"),
+    "nan": float("nan"),
+}
+_CLOSERS = {"[": "]", "(": ")", "{": "}"}
+
+# Classes constructed from the text of a (text, class name) definition
+_BUILTIN_CLASSES = {
+    "str": str,
+    "int": int,
+    "float": float,
+    "complex": complex,
+    "bool": lambda text: text == "True",
+}
+
+# Distinct strings held by the table shared by the representations of a batch
+_STRING_TABLE_SIZE = 65536
+
+
+class ReprSyntaxError(ReprBuildError):
+    """Raised when a representation string is not a valid literal
+
+    Args:
+        message (str) : Description of the error
+        text (str)    : The text being parsed
+        position (int): Offset in text at which the error was found
+    """
+
+    def __init__(self, message, text, position):
+        line = text.count("\n", 0, position) + 1
+        column = position - (text.rfind("\n", 0, position) + 1) + 1
+        super().__init__(
+            f"{message} at line {line} column {column} (offset {position})"
+        )
+        self.position = position
+        self.line = line
+        self.column = column
+
+
+def _number(token):
+    if token[-1] in "jJ":
+        return complex(token)
+    if "." in token or "e" in token or "E" in token:
+        return float(token)
+    return int(token)
+
+
+def _symbol(value, symbols, text, position):
+    """Return the value at a position of a compact document that can hold a symbol index"""
+    if value.__class__ is int:
+        try:
+            return symbols[value]
+        except IndexError:
+            raise ReprSyntaxError(f"Unknown symbol {value}", text, position) from None
+    if value.__class__ is tuple and len(value) == 1:
+        # A value that would read as a symbol index, escaped by the encoder
+        return value[0]
+    return value
+
+
+def _close_braces(items, is_dict, text, position):
+    """Return the dict or set for the members of a pair of braces"""
+    try:
+        if is_dict or not items:
+            if len(items) % 2:
+                raise ReprSyntaxError("Expecting ':' in dict", text, position)
+            return dict(zip(items[::2], items[1::2]))
+        return set(items)
+    except TypeError as error:
+        raise ReprSyntaxError(str(error), text, position) from error
+
+
+def _close_braces_steps(items, is_dict, text, position, pause_tokens):
+    """Generator returning what _close_braces returns, hashing pause_tokens members
+    between yields"""
+    if is_dict and len(items) % 2:
+        raise ReprSyntaxError("Expecting ':' in dict", text, position)
+    try:
+        if is_dict:
+            value = {}
+            step = 2 * pause_tokens
+            for start in range(0, len(items), step):
+                value.update(
+                    zip(
+                        items[start : start + step : 2],
+                        items[start + 1 : start + step : 2],
+                    )
+                )
+                yield None
+            return value
+        value = set()
+        for start in range(0, len(items), pause_tokens):
+            value.update(items[start : start + pause_tokens])
+            yield None
+        return value
+    except TypeError as error:
+        raise ReprSyntaxError(str(error), text, position) from error
+
+
+def parse_literal(text):
+    """Parse a representation string without eval()
+    Args:
+        text (str): Literal made of lists, tuples, dicts, sets, strings, numbers, None,
+                    True and False as written by repr()
+    Returns:
+        Union[list,tuple,dict,set,str,int,float,complex,None]: the parsed value
+    Raises:
+        ReprSyntaxError: if text is not a valid literal, with the offset of the error
+    Additional Information:
+        Only literal values are accepted so parsing a representation from an untrusted source
+        can not execute code. Strings without escape sequences are sliced from the input
+        directly.
+    """
+    return _parse_strings(text, None)
+
+
+def _parse_strings(text, strings):
+    """Parse text as parse_literal does, taking repeated strings from a shared table
+    Args:
+        text (str): the representation string
+        strings (dict): quoted string token mapped to its value, filled as strings are
+                    found, shared by the representations of a batch. None for no table
+    Returns:
+        Union[list,tuple,dict,set,str,int,float,complex,None]: the parsed value
+    Raises:
+        ReprSyntaxError: if text is not a valid literal
+    """
+    steps = _literal_steps(text, 0, strings=strings)
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+def _literal_steps(text, pause_tokens, symbols=None, strings=None):
+    """Generator parsing text as parse_literal does, returning the value when it stops
+    Args:
+        text (str): the representation string
+        pause_tokens (int): yield None after every this many tokens, never if 0
+        symbols (list): symbol table of a compact document whose body is text, see
+                    reprsymbols. The slots holding an index are read as single tokens of
+                    _SYMBOL_TOKEN_PATTERN and resolved as they are read
+        strings (dict): table of the strings already parsed, see _parse_strings. Only
+                    the first _STRING_TABLE_SIZE distinct strings are added to it
+    Raises:
+        ReprSyntaxError: if text is not a valid literal or an index is not in symbols
+
+    Additional Information:
+        Lets a caller such as async_format_repr parse a long text a slice at a time.
+    """
+    if not isinstance(text, str):
+        raise ReprBuildError(f"Expecting a representation string got {type(text)}")
+    countdown = pause_tokens
+    if symbols is None:
+        next_match = _TOKEN_PATTERN.scanner(text).match
+        shift = 0
+    else:
+        next_match = _SYMBOL_TOKEN_PATTERN.scanner(text).match
+        shift = _SYMBOL_GROUPS
+    # Each open container is [opening bracket, members, is dict, offset of the bracket]
+    # where is dict stays None for braces until a ':' or a second member is found. A list
+    # opened by a summary token holds the index of its first member instead, which is put
+    # back if the list does not have two members
+    stack = []
+    members = root = []
+    expect_value = True
+    match = last_match = None
+    while True:
+        if countdown:
+            countdown -= 1
+            if not countdown:
+                yield None
+                countdown = pause_tokens
+        last_match = match or last_match
+        match = next_match()
+        if match is None:
+            break
+        group = match.lastindex
+        kind = group - shift
+        if kind == _COMMA:
+            if expect_value or not stack:
+                raise ReprSyntaxError("Unexpected ','", text, match.start(group))
+            if stack[-1][2] is True and len(members) % 2:
+                raise ReprSyntaxError("Expecting ':' in dict", text, match.start(group))
+            expect_value = True
+            continue
+        if kind == _CLOSE:
+            bracket = match.group(group)
+            if not stack or _CLOSERS[stack[-1][0]] != bracket:
+                raise ReprSyntaxError(
+                    f"Unexpected '{bracket}'", text, match.start(group)
+                )
+            opener, items, is_dict, bracket_start = stack.pop()
+            if opener == "[":
+                if is_dict.__class__ is int:
+                    if len(items) != 2:
+                        # Not a [summary, definition] list, the index was an int
+                        items[0] = is_dict
+                    elif is_dict >= len(symbols):
+                        _symbol(is_dict, symbols, text, bracket_start)
+                elif (
+                    symbols is not None
+                    and len(items) == 2
+                    and items[0].__class__ is not str
+                ):
+                    items[0] = _symbol(items[0], symbols, text, match.start(group))
+                value = items
+            elif opener == "(":
+                if len(items) == 1 and not expect_value:
+                    raise ReprSyntaxError(
+                        "Expecting ',' in tuple", text, match.start(group)
+                    )
+                if (
+                    symbols is not None
+                    and len(items) == 2
+                    and items[1].__class__ is not str
+                ):
+                    items[1] = _symbol(items[1], symbols, text, match.start(group))
+                value = tuple(items)
+            elif pause_tokens and len(items) > pause_tokens:
+                value = yield from _close_braces_steps(
+                    items, is_dict, text, match.start(group), pause_tokens
+                )
+            else:
+                value = _close_braces(items, is_dict, text, match.start(group))
+            members = stack[-1][1] if stack else root
+        elif kind == _COLON:
+            if (
+                expect_value
+                or not stack
+                or stack[-1][0] != "{"
+                or stack[-1][2] is False
+                or len(members) % 2 == 0
+            ):
+                raise ReprSyntaxError("Unexpected ':'", text, match.start(group))
+            if (
+                symbols is not None
+                and members[-1].__class__ is tuple
+                and len(members[-1]) == 1
+            ):
+                # A key that would read as a symbol index, escaped by the encoder
+                members[-1] = members[-1][0]
+            stack[-1][2] = True
+            expect_value = True
+            continue
+        elif not expect_value:
+            if not stack:
+                raise ReprSyntaxError(
+                    "Unexpected text after the value", text, match.start(group)
+                )
+            raise ReprSyntaxError(
+                "Expecting ',' or a closing bracket", text, match.start(group)
+            )
+        elif kind == _OPEN:
+            members = []
+            stack.append([match.group(group), members, None, match.start(group)])
+            continue
+        elif kind == _SUMMARY:
+            index = int(match.group(group)[1:-1])
+            # Left as the index if it is not in the table, for a list of other lengths
+            members = [symbols[index] if index < len(symbols) else index]
+            stack.append(["[", members, index, match.start(group)])
+            continue
+        elif kind == _KEY:
+            if (
+                not stack
+                or stack[-1][0] != "{"
+                or stack[-1][2] is False
+                or len(members) % 2
+            ):
+                raise ReprSyntaxError("Unexpected ':'", text, match.end(group) - 1)
+            members.append(
+                _symbol(int(match.group(group)[:-1]), symbols, text, match.start(group))
+            )
+            stack[-1][2] = True
+            continue
+        else:
+            token = match.group(group)
+            if kind in (_SQUOTE, _DQUOTE):
+                if "\\" in token:
+                    value = ast.literal_eval(token)
+                elif strings is None:
+                    value = token[1:-1]
+                else:
+                    value = strings.get(token)
+                    if value is None:
+                        value = token[1:-1]
+                        if len(strings) < _STRING_TABLE_SIZE:
+                            strings[token] = value
+            elif kind == _BUILTIN:
+                quoted, _, index = token[1:-1].rpartition(",")
+                value = (
+                    ast.literal_eval(quoted) if "\\" in quoted else quoted[1:-1],
+                    _symbol(int(index), symbols, text, match.start(group)),
+                )
+            elif kind == _INTEGER:
+                value = int(token)
+            elif kind == _NUMBER:
+                value = _number(token)
+            elif kind == _NAME:
+                value = set() if token == "set()" else _NAMES[token]
+            elif kind == _COMPLEX:
+                value = complex(token.strip("()"))
+            else:
+                value = ast.literal_eval(token)
+
+        members.append(value)
+        if stack and stack[-1][2] is None and len(members) > 1:
+            # Two members without a ':' between them, the braces hold a set
+            stack[-1][2] = False
+        expect_value = False
+
+    position = 0 if last_match is None else last_match.end()
+    position = _TRAILING_SPACE.match(text, position).end()
+    if position != len(text):
+        raise ReprSyntaxError("Invalid token", text, position)
+    if stack:
+        raise ReprSyntaxError(f"Unclosed '{stack[-1][0]}'", text, stack[-1][3])
+    if not root:
+        raise ReprSyntaxError("Empty representation", text, position)
+    return root[0]
@@ -0,0 +1,369 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Build the members of large containers in chunks on a thread or process pool
+"""
+import io
+import os
+import pickle
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from types import FunctionType, MethodType
+
+from .constants import REFERENCE, REPRATTRIBUTES
+from .reprhandlers import _DISPATCH, _HANDLERS
+from .reprbase import _BuildState, ReprBuildError
+from .reprdefn import _build_dict_defn, _build_list_defn
+
+# Chunks each worker is given for a container, so uneven chunks balance out
+_CHUNKS_PER_WORKER = 4
+
+# Objects or representations handled by each task of a batch
+_BATCH_CHUNK = 256
+
+
+class _SerialOnly(Exception):
+    """Raised when a chunk reaches a ReprCached object, which is only built serially"""
+
+
+class _NoCache:
+    """Stands in for the _CacheState of a chunk, refusing the ReprCached build path"""
+
+    __slots__ = ()
+
+    owners = ()
+
+    def owner(self):
+        """Return None, a chunk never builds the members of a ReprCached object"""
+        return None
+
+    def visit(self, source):
+        """Stop the chunk, the ReprCached object source is built serially instead"""
+        raise _SerialOnly()
+
+
+class _ChunkState(_BuildState):
+    """Build state for one chunk of a container, with reference numbers starting at 1
+
+    Additional Information:
+        markers holds (memo entry, back reference) for every back reference returned, so
+        the numbers can be moved past those of the build once the chunk is merged into it.
+    """
+
+    __slots__ = ("markers",)
+
+    def __init__(self):
+        super().__init__()
+        self.cache = _NoCache()
+        self.markers = []
+
+    def reference(self, entry):
+        marker = super().reference(entry)
+        self.markers.append((entry, marker))
+        return marker
+
+
+class _ParallelBuild:
+    """Builds the members of large containers for build_repr on an executor
+
+    Args:
+        executor (concurrent.futures.Executor): pool to build chunks on, a
+                    ProcessPoolExecutor with workers processes is created for the build if
+                    None. The objects are shared with a ThreadPoolExecutor, any other executor
+                    is given each chunk pickled and is expected to run it in another process
+        workers (int): number of workers the chunks are spread over, defaults to the number
+                    of CPUs
+        threshold (int): containers with fewer members than this are built serially
+    Raises:
+        ReprBuildError: if workers is not a positive number
+
+    Additional Information:
+        Each chunk is built with its own memo. A chunk is merged in order only if none of
+        the objects it built were already built earlier in the representation, then its
+        back references are renumbered to follow those already given out. The rest of a
+        container is built serially from the first chunk that is shared with earlier parts
+        of the representation, holds a ReprCached object or can not be pickled or built,
+        so the result is the same as a serial build.
+        A chunk sent to another process is built from unpickled copies of its objects with
+        the type handlers registered in the build, which are pickled with it. It is built
+        serially if it holds a function, method or an object using the repr() of object,
+        whose text gives its address. The repr() of any other value kept as text, and the
+        handlers, must depend only on the value for the chunk to match a serial build.
+        Threads only run chunks at once while the GIL is released, such as by handlers
+        converting large arrays, so the default executor is a ProcessPoolExecutor.
+    """
+
+    __slots__ = ("executor", "workers", "threshold", "processes", "owned")
+
+    def __init__(self, executor, workers=None, threshold=1000):
+        self.workers = _worker_count(workers)
+        self.owned = executor is None
+        if executor is None:
+            executor = ProcessPoolExecutor(self.workers)
+        self.executor = executor
+        self.threshold = threshold
+        self.processes = not isinstance(executor, ThreadPoolExecutor)
+
+    def close(self):
+        """Shut down the executor if it was created for the build"""
+        if self.owned:
+            self.executor.shutdown()
+
+    def wants(self, attr, state):
+        """Return True if the members of container attr should be built in parallel"""
+        if len(attr) < self.threshold or (
+            state.cache is not None and state.cache.owners
+        ):
+            return False
+        # A container of objects already built, such as an index, gives back references
+        built = {memo_key[0] for memo_key in state.memo}
+        members = attr.values() if isinstance(attr, dict) else attr
+        return not any(id(member) in built for member in members)
+
+    def build(self, attr, depth, deepdive, recursion, state):
+        """Build the definition of the members of a list, tuple, set or dict
+        Args:
+            attr (Union[list,tuple,set,dict]): container whose members are built
+            depth (int): depth of the container, as for _build_list_defn
+            deepdive (boolean): if True append attributes returned from dir()
+            recursion (int): recursion level of the container
+            state (_BuildState): state of the build, updated with the merged chunks
+        Returns:
+            Union[list,tuple,set,dict]: the same definition _build_list_defn or
+                                        _build_dict_defn return
+        """
+        is_dict = isinstance(attr, dict)
+        items = list(attr.items()) if is_dict else list(attr)
+        size = -(-len(items) // (self.workers * _CHUNKS_PER_WORKER))
+        jobs = []
+        for start in range(0, len(items), size):
+            try:
+                jobs.append(
+                    self._submit(
+                        is_dict, items[start : start + size], depth, deepdive, recursion
+                    )
+                )
+            except Exception:  # pylint: disable=broad-except
+                # Not picklable, the rest of the container is built serially
+                break
+
+        defns = []
+        built = 0
+        for index, (future, objects, count) in enumerate(jobs):
+            try:
+                result = future.result()
+            except Exception:  # pylint: disable=broad-except
+                # Built again serially below, which raises any error of the build itself
+                result = None
+            if result is None or not _merge_chunk(state, result, objects):
+                for later_future, _, _ in jobs[index + 1 :]:
+                    later_future.cancel()
+                break
+            defns.append(result[0])
+            built += count
+        if built < len(items):
+            rest = items[built:]
+            if is_dict:
+                defns.append(
+                    _build_dict_defn(dict(rest), depth, deepdive, recursion, state)
+                )
+            else:
+                defns.append(_build_list_defn(rest, depth, deepdive, recursion, state))
+
+        if is_dict:
+            repr_dict = {}
+            for cur_defn in defns:
+                repr_dict.update(cur_defn)
+            return repr_dict
+        repr_list = [cur_repr for cur_defn in defns for cur_repr in cur_defn]
+        if isinstance(attr, tuple):
+            return tuple(repr_list)
+        if isinstance(attr, set):
+            return set(repr_list)
+        return repr_list
+
+    def _submit(self, is_dict, chunk, depth, deepdive, recursion):
+        """Start building a chunk, returning (future, pickled objects, number of items)"""
+        if not self.processes:
+            future = self.executor.submit(
+                _build_chunk, is_dict, chunk, depth, deepdive, recursion
+            )
+            return future, None, len(chunk)
+        buffer = io.BytesIO()
+        pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+        pickler.dump(chunk)
+        # The unpickled copy of each object has the same memo index as the original
+        objects = dict(pickler.memo.copy().values())
+        if not all(_same_in_worker(obj) for obj in objects.values()):
+            raise _SerialOnly()
+        future = self.executor.submit(
+            _build_pickled_chunk,
+            is_dict,
+            buffer.getvalue(),
+            depth,
+            deepdive,
+            recursion,
+            handlers=dict(_HANDLERS),
+        )
+        return future, objects, len(chunk)
+
+
+def _same_in_worker(obj):
+    """Return True if obj is built the same from its unpickled copy in another process"""
+    if obj.__class__ is FunctionType or obj.__class__ is MethodType:
+        return False
+    # The repr() of object holds the address, objects with _repr_attrs are built from
+    # their attributes
+    return obj.__class__.__repr__ is not object.__repr__ or hasattr(obj, REPRATTRIBUTES)
+
+
+def _build_chunk(is_dict, chunk, depth, deepdive, recursion):
+    """Build a chunk of container members with its own state
+    Returns:
+        tuple: (definition, memo, markers, next_ref, events, deepest) of the chunk
+    """
+    state = _ChunkState()
+    if is_dict:
+        defn = _build_dict_defn(dict(chunk), depth, deepdive, recursion, state)
+    else:
+        defn = _build_list_defn(chunk, depth, deepdive, recursion, state)
+    return defn, state.memo, state.markers, state.next_ref, state.events, state.deepest
+
+
+def _build_pickled_chunk(is_dict, payload, depth, deepdive, recursion, *, handlers):
+    """Build a pickled chunk of container members in a worker process
+
+    Additional Information:
+        The memo is returned keyed by the pickle memo index of each object in place of
+        its id(), the objects themselves are not sent back. handlers is the type handler
+        registry of the building process, used in place of the one of the worker.
+    """
+    unpickler = pickle.Unpickler(io.BytesIO(payload))
+    chunk = unpickler.load()
+    _use_handlers(handlers)
+    indexes = {id(obj): index for index, obj in unpickler.memo.copy().items()}
+    defn, memo, markers, next_ref, events, deepest = _build_chunk(
+        is_dict, chunk, depth, deepdive, recursion
+    )
+    index_memo = {}
+    for memo_key, entry in memo.items():
+        entry[0] = None
+        index = indexes.get(memo_key[0])
+        if index is not None:
+            index_memo[(index,) + memo_key[1:]] = entry
+    return defn, index_memo, markers, next_ref, events, deepest
+
+
+def _use_handlers(handlers):
+    """Make handlers the type handler registry, as it is in the process that sent them"""
+    if handlers != _HANDLERS:
+        # Handlers registered in the building process since the worker was started
+        _HANDLERS.clear()
+        _HANDLERS.update(handlers)
+        _DISPATCH.clear()
+
+
+def _merge_chunk(state, result, objects):
+    """Merge the memo and back references of a built chunk into the state of the build
+    Returns:
+        bool: False if the chunk built an object already in the memo, state is unchanged
+    """
+    _, memo, markers, next_ref, events, deepest = result
+    if objects is not None:
+        index_memo, memo = memo, {}
+        for memo_key, entry in index_memo.items():
+            entry[0] = objects[memo_key[0]]
+            memo[(id(entry[0]),) + memo_key[1:]] = entry
+    if any(memo_key in state.memo for memo_key in memo):
+        return False
+
+    offset = state.next_ref
+    if offset:
+        for entry in memo.values():
+            if entry[2] is not None:
+                tag_length = len(f",ref: {entry[2]}")
+                entry[2] += offset
+                entry[1][0] = f"{entry[1][0][:-tag_length]},ref: {entry[2]}"
+        for entry, marker in markers:
+            marker[0] = entry[1][0]
+            marker[1] = (str(entry[2]), REFERENCE)
+    state.memo.update(memo)
+    state.next_ref += next_ref
+    state.events += events
+    state.deepest = max(state.deepest, deepest)
+    return True
+
+
+def _worker_count(workers):
+    """Return the number of workers to use, the number of CPUs if workers is None
+    Raises:
+        ReprBuildError: if workers is not a positive number
+    """
+    if workers is None:
+        return os.cpu_count() or 1
+    if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+        raise ReprBuildError(f"workers must be a positive number, not {workers!r}")
+    return workers
+
+
+def _iter_batch(task, items, args, executor, workers):
+    """Return an iterator over task(chunk, args) for chunks of items run on an executor
+    Args:
+        task (callable): module level function returning a list of results for a chunk
+        items (Iterable): the batch, consumed as chunks are submitted
+        args (object): second argument of every task
+        executor (concurrent.futures.Executor): pool to run the tasks on, a
+                    ProcessPoolExecutor with workers processes is used if None
+        workers (int): number of workers, defaults to the number of CPUs
+    Returns:
+        generator: the results of every chunk in the order of items
+    Raises:
+        ReprBuildError: if workers is not a positive number
+    """
+    workers = _worker_count(workers)
+    owned = executor is None
+    if owned:
+        executor = ProcessPoolExecutor(workers)
+    return _batch_results(task, iter(items), args, executor, workers, owned=owned)
+
+
+def _batch_results(task, items, args, executor, workers, *, owned):
+    """Yield the results of the chunks, keeping at most two chunks per worker submitted"""
+    pending = deque()
+    try:
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(islice(items, _BATCH_CHUNK))
+                if not chunk:
+                    break
+                pending.append(executor.submit(task, chunk, args))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+        if owned:
+            executor.shutdown()
+
+
+def _build_batch(objects, args):
+    """Return the representations of a chunk of objects
+    Args:
+        objects (list): the chunk of objects
+        args (tuple): (_ReprBuilder of the batch, type handler registry of the calling
+                      process)
+    """
+    builder, handlers = args
+    _use_handlers(handlers)
+    return list(builder.build_many(objects))
@@ -12,48 +12,311 @@
 """
 A parser Class for working with the recursively built representations
 """
+import contextvars
+import mmap as _mmap
+import os
+import sys
+from itertools import islice
 from typing import Optional
-from .reprbuild import is_valid_repr, split_repr, ReprBuildError
-from .constants import REBUILDER
+from .reprbase import _PROFILE
+from .reprbuild import _split_repr, is_valid_repr, split_repr, ReprBuildError
+from .reprliteral import (
+    _BUILTIN_CLASSES,
+    _parse_strings,
+    parse_literal,
+    ReprSyntaxError,
+)
+from .reprarray import ndarray_from_text
+from .reprbinary import BINARY_MAGIC, decode_binary
+from .reprcolumns import expand_columns, is_columnar, ReprColumns
+from .reprindex import lazy_repr, LazyMembers
+from .reprsymbols import decode_symbols, is_compact, SYMBOLS_PREFIX
+from .reprhash import _SubtreeDigests, fingerprint_repr
+from .constants import REBUILDER, REFERENCE
+
+# Shared instances for the rebuild in progress, visible to the parsers created by rebuilders
+_REBUILD_REFS = contextvars.ContextVar("reprbuild_rebuild_refs", default=None)
+
+# Classes the tree rebuild engine constructs from the members of their definition
+_CONTAINER_CLASSES = {"list": list, "tuple": tuple, "set": set, "dict": dict}
+
+# Leaf values the tree rebuild engine can hand out more than once
+_IMMUTABLE_TYPES = frozenset((str, int, float, complex, bool, bytes, type(None)))
+
+# Members of a container formatted by one task, the task formatting the rest is queued
+# after them so a wide container is formatted over several tasks
+_FORMAT_CHUNK = 256
+
+
+class _ReprTree:
+    """A parsed representation shared by a parser and the parsers for its members
+
+    Args:
+        root (list): The parsed [summary, definition] list
+        shared (_ReprTree): tree whose caches of strings are shared with this tree, such as
+                    the trees of a batch
+
+    Additional Information:
+        split_repr() results are cached for each node. List nodes are cached by id() and
+        held by the cache so their ids are not reused, strings are cached by value. The
+        fields of each distinct summary string are parsed once and copied for every node
+        with that summary.
+        digests holds the subtree digests used by diff_repr(), once they are needed.
+    """
+
+    __slots__ = ("root", "_nodes", "_strings", "_summaries", "digests")
+
+    def __init__(self, root, shared=None):
+        self.root = root
+        self._nodes = {}
+        if shared is None:
+            self._strings = {}
+            self._summaries = {}
+        else:
+            self._strings = shared._strings
+            self._summaries = shared._summaries
+        self.digests = None
+
+    def split(self, node):
+        """Return the cached split_repr() result for a node of the representation"""
+        if _PROFILE[0] is not None:
+            return _PROFILE[0]._call("_ReprTree.split", _ReprTree._split, self, node)
+        return self._split(node)
+
+    def _split(self, node):
+        """Return the split_repr() result for a node, see split()"""
+        if isinstance(node, list):
+            entry = self._nodes.get(id(node))
+            if entry is None:
+                entry = self._nodes[id(node)] = (node, *self._split_list(node))
+            return entry[1:]
+        if isinstance(node, str):
+            entry = self._strings.get(node)
+            if entry is None:
+                entry = self._strings[node] = _split_repr(node)
+            return entry
+        return _split_repr(node)
+
+    def summary_fields(self, summary):
+        """Return the summary dict split_repr() gives a summary string, None if not valid
+
+        Additional Information:
+            The dict is cached and must not be changed, its is_builtin and is_reference
+            are those of a node with no definition.
+        """
+        try:
+            return self._summaries[summary]
+        except KeyError:
+            fields = self._summaries[summary] = split_repr([summary, None])[0]
+            return fields
+
+    def _split_list(self, node):
+        """Return split_repr(node) for a list, from the cached fields of its summary"""
+        if len(node) != 2 or not isinstance(node[0], str):
+            return None, None
+        fields = self.summary_fields(node[0])
+        if fields is None:
+            return None, None
+        summary = dict(fields)
+        repr_defn = node[1]
+        summary["is_builtin"] = (
+            isinstance(repr_defn, tuple)
+            and (len(repr_defn) == 2)
+            and isinstance(repr_defn[0], str)
+            and isinstance(repr_defn[1], str)
+        )
+        summary["is_reference"] = summary["is_builtin"] and repr_defn[1] == REFERENCE
+        return summary, repr_defn
+
+    def is_valid(self, node):
+        """Return the cached is_valid_repr() result for a node of the representation"""
+        return self.split(node)[0] is not None
 
 
 class ReprParser:
     """Class to parse, print and manipulate a recursive object representation
 
     Args:
-        obj_repr (str): string representation of the dictionary produced
-                        by calls to myClass.__repr__()
+        obj_repr (Union[str,bytes,list]): string representation of the dictionary produced
+                        by calls to myClass.__repr__(), the bytes produced by
+                        build_repr(format="binary"), the compact string of
+                        build_repr(format="compact"), or the list they evaluate to
+        rebuilders (Union[list, dict, class]): rebuild methods passed to append_rebuilder()
+        lazy (bool): if True a representation string is only scanned for the offsets of its
+                        members, each member is parsed the first time it is used
 
     Raises:
         ReprBuildError: if the representation is not a valid dictionary
 
     Additional Information:
+        The representation is parsed once. Parsers returned by get_parser() are views over
+        the same parsed representation and share its cache of split_repr() results.
+        With lazy=True errors in a member are only found when that member is parsed, and
+        obj_defn is a read only mapping rather than a dict.
     """
 
-    def __init__(self, obj_repr, rebuilders: [Optional] = None):
-        if isinstance(obj_repr, str):
-            self._repr_str = obj_repr
-            try:
-                obj_repr = eval(obj_repr)  # pylint: disable=eval-used
-            except Exception as error:
-                raise ReprBuildError(
-                    "ReprParser argument is invalid representation "
-                ) from error
-        else:
-            obj_repr = repr(obj_repr)
-            self._repr_str = obj_repr
+    def __init__(self, obj_repr, rebuilders: [Optional] = None, lazy=False):
+        obj_repr = _parse_repr(obj_repr, lazy)
+        self._init_view(_ReprTree(obj_repr), obj_repr)
+        self._rebuilder_map = {}
+        if rebuilders is not None:
+            self.append_rebuilder(rebuilders)
 
-        if not is_valid_repr(obj_repr):
+    def _init_view(self, tree, node):
+        """Point the parser at a node of a parsed representation"""
+        summary, obj_defn = tree.split(node)
+        if summary is None:
             raise ReprBuildError("ReprParser argument is invalid representation ")
 
-        self._repr_str = obj_repr
-        (self._summary, self._obj_defn) = split_repr(self._repr_str)
+        self._tree = tree
+        self._repr_node = node
+        self._summary, self._obj_defn = summary, obj_defn
         self._name = self._summary.get("name", "")
         self._class_name = self._summary.get("class", "")
         self._is_builtin = self._summary.get("is_builtin", False)
-        self._rebuilder_map = {}
+
+    @classmethod
+    def from_file(cls, path, mmap=True, rebuilders: [Optional] = None):
+        """Return a parser for a representation stored in a file
+        Args:
+            path (Union[str,os.PathLike]): file holding a representation string as utf-8, or
+                        the bytes produced by build_repr(format="binary")
+            mmap (bool): if True the file is memory-mapped rather than read into memory
+            rebuilders (Union[list, dict, class]): rebuild methods passed to append_rebuilder()
+        Returns:
+            ReprParser: parser for the representation in the file
+        Raises:
+            ReprBuildError: if the file does not hold a valid representation
+        Additional Information:
+            A representation string is parsed lazily, as with ReprParser(text, lazy=True),
+            directly over the file contents. The text of a member is only copied out of the
+            file when the member is first read. Binary and compact representations are
+            decoded in full.
+        """
+        with open(path, "rb") as repr_file:
+            if mmap and os.fstat(repr_file.fileno()).st_size > 0:
+                data = _mmap.mmap(repr_file.fileno(), 0, access=_mmap.ACCESS_READ)
+            else:
+                data = repr_file.read()
+
+        try:
+            if data[: len(BINARY_MAGIC)] == BINARY_MAGIC:
+                obj_repr = decode_binary(data)
+            elif data[: len(SYMBOLS_PREFIX)] == SYMBOLS_PREFIX.encode():
+                obj_repr = decode_symbols(str(data[:], "utf-8"))
+            else:
+                obj_repr = lazy_repr(data)
+                if obj_repr is None:
+                    obj_repr = parse_literal(str(data[:], "utf-8"))
+        except (ReprBuildError, UnicodeDecodeError) as error:
+            raise ReprBuildError(
+                f"{path} does not hold a valid representation: {error}"
+            ) from error
+
+        new_parser = cls.__new__(cls)
+        new_parser._init_view(_ReprTree(obj_repr), obj_repr)
+        new_parser._rebuilder_map = {}
         if rebuilders is not None:
-            self.append_rebuilder(rebuilders)
+            new_parser.append_rebuilder(rebuilders)
+        return new_parser
+
+    @classmethod
+    def _view(cls, tree, node, rebuilder_map):
+        """Return a parser for a node of an already parsed representation"""
+        new_parser = cls.__new__(cls)
+        new_parser._init_view(tree, node)
+        new_parser._rebuilder_map = dict(rebuilder_map)
+        return new_parser
+
+    @classmethod
+    def parse_many(
+        cls,
+        obj_reprs,
+        rebuilders: [Optional] = None,
+        lazy=False,
+        as_generator=False,
+        executor=None,
+    ):
+        """Return parsers for a batch of representations
+        Args:
+            obj_reprs (Iterable): representation strings, bytes or parsed lists
+            rebuilders (Union[list, dict, class]): rebuild methods registered for every parser
+            lazy (bool): parse each representation string lazily, as ReprParser does
+            as_generator (bool): if True return an iterator yielding each parser as it is
+                        created, otherwise a list
+            executor (concurrent.futures.Executor): optional pool the strings and bytes are
+                        parsed on in chunks, such as a ProcessPoolExecutor
+        Returns:
+            Union[list,Iterator]: a ReprParser for each representation, in order
+        Raises:
+            ReprBuildError: if a representation is not valid, a rebuild method can not be
+                            found, or executor is given with lazy
+        Additional Information:
+            The rebuilders are resolved once for the batch and the parsers share the cache of
+            split summary strings, which holds the summaries repeated across the batch.
+            The strings of the representations are taken from a table shared by the batch,
+            so a string repeated in many representations, such as a summary or an attribute
+            name, is held once. This typically halves the memory of the parsed batch, the
+            time taken is about that of parsing each representation on its own.
+        """
+        rebuilder_map = {}
+        if rebuilders is not None:
+            _add_rebuilders(rebuilder_map, rebuilders)
+        shared = _ReprTree(None)
+        if executor is None:
+            strings = {}
+            roots = (_parse_repr(obj_repr, lazy, strings) for obj_repr in obj_reprs)
+        elif lazy:
+            raise ReprBuildError(
+                "Lazy representations can not be parsed on an executor"
+            )
+        else:
+            from .reprparallel import _iter_batch
+
+            roots = _iter_batch(_parse_batch, obj_reprs, None, executor, None)
+
+        parsers = (
+            cls._view(_ReprTree(root, shared), root, rebuilder_map) for root in roots
+        )
+        return parsers if as_generator else list(parsers)
+
+    @classmethod
+    def rebuild_many(
+        cls,
+        obj_reprs,
+        rebuilders: [Optional] = None,
+        as_generator=False,
+        executor=None,
+        engine="parser",
+        *,
+        rebuild_members=False,
+    ):
+        """Rebuild the objects of a batch of representations
+        Args:
+            obj_reprs (Iterable): representation strings, bytes or parsed lists
+            rebuilders (Union[list, dict, class]): rebuild methods used for every object
+            as_generator (bool): if True return an iterator yielding each object as it is
+                        rebuilt, otherwise a list
+            executor (concurrent.futures.Executor): optional pool the representations are
+                        parsed on, as for parse_many()
+            engine (str): rebuild engine, as for rebuild()
+            rebuild_members (bool): tree engine only, as for rebuild()
+        Returns:
+            Union[list,Iterator]: the rebuilt instance for each representation, in order
+        Raises:
+            ReprBuildError: if a representation is not valid or has no rebuild method
+        Additional Information:
+            Each representation is rebuilt on its own, back references are only shared
+            within a single representation.
+        """
+        parsers = cls.parse_many(
+            obj_reprs, rebuilders, as_generator=True, executor=executor
+        )
+        new_objs = (
+            parser.rebuild(engine=engine, rebuild_members=rebuild_members)
+            for parser in parsers
+        )
+        return new_objs if as_generator else list(new_objs)
 
     def __repr__(self):
         return f"ReprParse for {self._class_name}  {self._name}"
@@ -68,7 +331,7 @@ class ReprParser:
 
         Additional Information:
         """
-        return split_repr(self._obj_defn.get(name))
+        return self._tree.split(self._obj_defn.get(name))
 
     def get_complex(self, name, default: [Optional] = None):
         """Get item in the dictionary of type complex
@@ -82,12 +345,33 @@ class ReprParser:
 
         Additional Information:
         """
-        complex_defn = split_repr(self._obj_defn.get(name))[1]
+        complex_defn = self._tree.split(self._obj_defn.get(name))[1]
         if _builtin_repr(complex_defn) and complex_defn[1] == "complex":
             return complex(complex_defn[0])
         else:
             return default
 
+    def get_columns(self, name, default: [Optional] = None):
+        """Get a list or tuple of objects built with build_repr(columnar=True) as columns
+        Args:
+            name (str): Item to be parsed
+            default (class): return value if name is not found or is not columnar
+        Returns:
+            ReprColumns: view reading each attribute of the objects as a column
+        Raises:
+
+        Additional Information:
+            The representation of each object is only built when its row is read.
+        """
+        summary, item_defn = self._tree.split(self._obj_defn.get(name))
+        if (
+            summary is not None
+            and summary.get("class", "") in ("list", "tuple")
+            and is_columnar(item_defn)
+        ):
+            return ReprColumns(item_defn)
+        return default
+
     def get_dict(self, name, default: [Optional] = None):
         """Get item in the dictionary and return as a dictionary
         Args:
@@ -99,7 +383,7 @@ class ReprParser:
 
         Additional Information:
         """
-        summary, item_defn = split_repr(self._obj_defn.get(name))
+        summary, item_defn = self._tree.split(self._obj_defn.get(name))
         if summary is not None and summary.get("class", "") in ("dict", "defaultdict"):
             return item_defn
         else:
@@ -116,7 +400,7 @@ class ReprParser:
 
         Additional Information:
         """
-        item_defn = split_repr(self._obj_defn.get(name))[1]
+        item_defn = self._tree.split(self._obj_defn.get(name))[1]
         if (
             item_defn is not None
             and _builtin_repr(item_defn)
@@ -137,11 +421,32 @@ class ReprParser:
 
         Additional Information:
         """
-        item_dict = split_repr(self._obj_defn.get(name, None))[1]
+        item_dict = self._tree.split(self._obj_defn.get(name, None))[1]
         if item_dict is not None and _builtin_repr(item_dict) and item_dict[1] == "int":
             return int(item_dict[0])
         return default
 
+    def get_ndarray(self, name, default: [Optional] = None):
+        """Get item in the dictionary of type numpy.ndarray
+        Args:
+            name (str): Item to be parsed
+            default (class): return value if name is not found
+        Returns:
+            np.ndarray: a new array equal to the one in the representation
+        Raises:
+            ReprBuildError: if the array definition is invalid
+
+        Additional Information:
+        """
+        item_dict = self._tree.split(self._obj_defn.get(name, None))[1]
+        if (
+            item_dict is not None
+            and _builtin_repr(item_dict)
+            and item_dict[1] == "ndarray"
+        ):
+            return ndarray_from_text(item_dict[0])
+        return default
+
     def get_list(self, name, default: [Optional] = None):
         """Get item in the dictionary and return as a list
         Args:
@@ -168,7 +473,7 @@ class ReprParser:
             list:  a valid representation for name (if found)
         """
         obj_repr = self.get_list(name, None)
-        if not is_valid_repr(obj_repr):
+        if not self._tree.is_valid(obj_repr):
             obj_repr = default
         return obj_repr
 
@@ -183,7 +488,7 @@ class ReprParser:
 
         Additional Information:
         """
-        summary, item_defn = split_repr(self._obj_defn.get(name))
+        summary, item_defn = self._tree.split(self._obj_defn.get(name))
         if summary is not None and summary.get("class", "") == "set":
             return set(item_defn)
         else:
@@ -198,8 +503,8 @@ class ReprParser:
             str:  the string value for name
         """
         new_string = self._obj_defn.get(name)
-        if not isinstance(new_string, str) and is_valid_repr(new_string):
-            new_string = split_repr(new_string)[1]
+        if not isinstance(new_string, str) and self._tree.is_valid(new_string):
+            new_string = self._tree.split(new_string)[1]
         if not isinstance(new_string, str):
             new_string = default
         return new_string
@@ -215,8 +520,10 @@ class ReprParser:
 
         Additional Information:
         """
-        summary, item_defn = split_repr(self._obj_defn.get(name))
+        summary, item_defn = self._tree.split(self._obj_defn.get(name))
         if summary is not None and summary.get("class", "") == "tuple":
+            if is_columnar(item_defn):
+                return tuple(expand_columns(item_defn))
             return tuple(item_defn)
         else:
             return default
@@ -271,12 +578,16 @@ class ReprParser:
             ReprError: if the mapping is invalid
         """
         new_parser = None
-        if not is_valid_repr(obj_repr):
+        if (
+            isinstance(self._obj_defn, LazyMembers)
+            and isinstance(obj_repr, str)
+            and obj_repr in self._obj_defn
+        ):
+            obj_repr = self._obj_defn.node(obj_repr)
+        elif not self._tree.is_valid(obj_repr):
             obj_repr = self.get_repr(obj_repr, None)
-        if is_valid_repr(obj_repr):
-            new_parser = ReprParser(obj_repr)
-            if isinstance(new_parser, ReprParser):
-                new_parser.append_rebuilder(self._rebuilder_map)
+        if self._tree.is_valid(obj_repr):
+            new_parser = ReprParser._view(self._tree, obj_repr, self._rebuilder_map)
         return new_parser
 
     def append_rebuilder(self, rebuilder):
@@ -290,91 +601,142 @@ class ReprParser:
         Raises:
             ReprBuildError: if the method(s) can not be found
         """
-        if isinstance(rebuilder, list):
-            for obj_class in rebuilder:
-                if hasattr(obj_class, REBUILDER):
-                    self._rebuilder_map[obj_class.__class_name__] = getattr(
-                        obj_class, REBUILDER
-                    )
-                else:
-                    raise ReprBuildError(
-                        f"Rebuild method, {REBUILDER} not found in {obj_class.__class_name__}"
-                    )
-        elif isinstance(rebuilder, dict):
-            for class_name, mapper in rebuilder.items():
-                self._rebuilder_map[class_name] = mapper
-        else:
-            if hasattr(rebuilder, REBUILDER):
-                self._rebuilder_map[rebuilder.__class_name__] = getattr(
-                    rebuilder, REBUILDER
-                )
-            else:
-                raise ReprBuildError(
-                    f"No rebuilder {REBUILDER} method in {rebuilder.__class_name__}"
-                )
+        _add_rebuilders(self._rebuilder_map, rebuilder)
 
-    def rebuild(self, name: [Optional] = None, obj_repr: [Optional] = None):
+    def rebuild(
+        self,
+        name: [Optional] = None,
+        obj_repr: [Optional] = None,
+        engine="parser",
+        flyweight=False,
+        rebuild_members=False,
+    ):
         """Build an instance of the specified object according to the representation
         Args:
             name (str): Optional class name as string. If none name from obj_repr will be used
+                        If obj_repr is not supplied the name of the attribute to rebuild
             obj_repr(str): The representation of the object to be instantiated
+            engine (str): "parser" (default) or "tree" to walk the representation once,
+                        splitting each summary string once for the whole rebuild
+            flyweight (bool): tree engine only, rebuild identical subtrees once and return
+                        the same instance for each of them
+            rebuild_members (bool): tree engine only, rebuild the members of lists, tuples,
+                        sets and dicts into values and objects. Otherwise containers hold
+                        the representations of their members, as with the parser engine
         Returns:
             object:  The newly instantiated instance defined in the representation
         Raises:
-            ReprBuildError: if the mapping is invalid
+            ReprBuildError: if the mapping is invalid or the engine is not known
+        Additional Information:
+            An object shared within the representation is rebuilt once and every back reference
+            to it, including those rebuilt by parsers created inside rebuild methods, returns
+            that same instance. A back reference to an object whose rebuild is still in progress
+            (a cycle) returns None.
+            The engine of the outermost rebuild is used by every rebuild() call made by the
+            rebuild methods it calls, see _TreeRebuild for the tree engine.
         """
+        if engine not in ("parser", "tree"):
+            raise ReprBuildError(f"Unknown rebuild engine {engine}")
+        if _PROFILE[0] is not None:
+            return _PROFILE[0]._call(
+                "ReprParser.rebuild",
+                ReprParser._rebuild_in_refs,
+                self,
+                name,
+                obj_repr,
+                engine,
+                flyweight,
+                rebuild_members,
+            )
+        return self._rebuild_in_refs(name, obj_repr, engine, flyweight, rebuild_members)
+
+    def _rebuild_in_refs(self, name, obj_repr, engine, flyweight, rebuild_members):
+        """Rebuild with the shared instances of the rebuild in progress, see rebuild()"""
+        refs = _REBUILD_REFS.get()
+        token = None
+        if refs is None:
+            if engine == "tree":
+                refs = _TreeRebuild(
+                    self._tree, self._rebuilder_map, flyweight, rebuild_members
+                )
+            else:
+                refs = _RebuildRefs(self._tree)
+            token = _REBUILD_REFS.set(refs)
+        try:
+            if isinstance(refs, _TreeRebuild):
+                return refs.rebuild_member(self, name, obj_repr)
+            return self._rebuild(name, obj_repr, refs)
+        finally:
+            if token is not None:
+                _REBUILD_REFS.reset(token)
+
+    def _rebuild(self, name, obj_repr, refs):
         new_obj = None
         if obj_repr is None and name is not None:
             obj_repr = self.get_repr(name)
-        else:
-            obj_repr = self._repr_str
+            name = None
+        elif obj_repr is None:
+            obj_repr = self._repr_node
 
         if obj_repr is not None:
-            if name is None:
-                summary = split_repr(obj_repr)[0]
-                if summary is not None:
+            summary = self._tree.split(obj_repr)[0]
+            ref = None
+            if summary is not None:
+                if name is None:
                     name = summary.get("class", "")
+                ref = summary.get("ref")
+                if summary.get("is_reference", False):
+                    return refs.resolve(ref, self)
 
             new_obj = self._rebuild_builtin(obj_repr)
             if new_obj is None:
                 mapper = self._rebuilder_map.get(name, None)
                 if mapper is None:
                     raise ReprBuildError(f"No {REBUILDER} method found for {name}")
-                if not is_valid_repr(obj_repr):
+                if not self._tree.is_valid(obj_repr):
                     raise ReprBuildError(f"Invalid representation for {name}")
+                if ref is not None:
+                    refs.pending.add(ref)
                 new_obj = mapper(obj_repr)
+            if ref is not None:
+                refs.pending.discard(ref)
+                refs.instances[ref] = new_obj
         return new_obj
 
     def _rebuild_builtin(self, obj_repr):
-        summary, obj_dict = split_repr(obj_repr)
+        summary, obj_dict = self._tree.split(obj_repr)
         if summary is None:
-            new_attr = None
-        elif isinstance(obj_dict, str):
-            try:
-                new_attr = eval(obj_dict)  # pylint: disable=eval-used
-            except:  # pylint: disable=bare-except
-                new_attr = obj_dict
-        elif isinstance(obj_dict, (tuple, list, dict, set)):
-            if summary.get("class", "") == "str":
-                new_attr = obj_dict[0]
-            elif summary.get("class", "") == "int":
-                new_attr = int(obj_dict[0])
-            elif summary.get("class", "") == "float":
-                new_attr = float(obj_dict[0])
-            elif summary.get("class", "") == "complex":
-                new_attr = complex(obj_dict[0])
-            elif summary.get("class", "") in ("list", "dict"):
-                new_attr = obj_dict
-            elif summary.get("class", "") == "tuple":
-                new_attr = tuple(obj_dict)
-            elif summary.get("class", "") == "set":
-                new_attr = set(obj_dict)
-            else:
-                # TODO: Support numpy and sympy types as builtins
-                new_attr = None
-        else:
-            new_attr = None
-        return new_attr
+            return None
+        return _builtin_value(summary.get("class", ""), obj_dict)
+
+    def fingerprint(self):
+        """Return the Merkle fingerprint of the representation
+        Args:
+
+        Returns:
+            ReprFingerprint: fingerprint of the representation, with the fingerprint of
+                             every member available through get()
+        Raises:
+
+        Additional Information:
+            Equal to fingerprint() of the object the representation was built from
+        """
+        return fingerprint_repr(self._repr_node)
+
+    def iter_lines(self, indent=""):
+        """Yield the lines of the user friendly version of the representation
+        Args:
+            indent (str):    Indentation level for the output
+        Returns:
+            Iterator[str]: Lines of format_repr(), each ending in a newline
+        Raises:
+            ReprBuildError: If a member is not a valid representation
+
+        Additional Information:
+            The representation is walked once with an explicit stack, so the time taken is
+            linear in its size and deep representations do not hit the recursion limit.
+        """
+        return _iter_format_lines(self._repr_node, indent)
 
     def format_repr(self, indent=""):
         """Return a user friendly version of the representation
@@ -386,44 +748,340 @@ class ReprParser:
 
         Additional Information:
         """
-        if self._class_name in ("str", "int", "float", "complex"):
-            return_str = f"{indent}{self._obj_defn}\n"
-        elif self._class_name in ("tuple", "set", "list"):
-            return_str = ""
-            if self._name != "":
-                return_str += f"{indent}{self._name} : {self._class_name}\n"
-                indent += "    "
-            return_str += _format_repr_list(self._obj_defn, indent=indent)
-        elif self._class_name in ("defaultdict", "dict"):
-            return_str = f"{indent}{self._name} : {self._class_name}\n"
-            return_str += _format_repr_dict(self._obj_defn, indent=indent + "    ")
-        else:
-            return_str = f"{indent}{self._name} : {self._class_name}\n"
-            return_str += _format_repr_dict(self._obj_defn, indent + "    ")
-        return return_str
+        return "".join(self.iter_lines(indent=indent))
 
-    def print(self, indent=""):
+    def print(self, indent="", file=None):
         """Print a user friendly version of the representation
         Args:
             indent (str):    Indentation level for the output
+            file (TextIO):   Stream to write to, defaults to sys.stdout
         Returns:
         Raises:
 
         Additional Information:
+            Lines are written as they are formatted without building the full string
+        """
+        _write_lines(self.iter_lines(indent=indent), file)
+
+
+def _builtin_value(class_name, obj_dict):
+    """Return the value the parser rebuild engine gives for a definition
+    Args:
+        class_name (str): class of the summary of the definition
+        obj_dict (object): the definition
+    Returns:
+        object: the value of a builtin, or the definition of a list, tuple, set or dict
+                with its members left as representations. None for other classes
+    """
+    if isinstance(obj_dict, LazyMembers):
+        obj_dict = dict(obj_dict)
+    if class_name in ("list", "tuple") and is_columnar(obj_dict):
+        obj_dict = expand_columns(obj_dict)
+    value = None
+    container = _CONTAINER_CLASSES.get(class_name)
+    if isinstance(obj_dict, str):
+        try:
+            value = parse_literal(obj_dict)
+        except ReprSyntaxError:
+            value = obj_dict
+    elif not isinstance(obj_dict, (tuple, list, dict, set)):
+        pass
+    elif class_name in ("str", "int", "float", "complex"):
+        value = _BUILTIN_CLASSES[class_name](obj_dict[0])
+    elif class_name == "ndarray":
+        value = ndarray_from_text(obj_dict[0])
+    elif container in (list, dict):
+        value = obj_dict
+    elif container is not None:
+        value = container(obj_dict)
+    # TODO: Support numpy and sympy types as builtins
+    return value
+
+
+def _add_rebuilders(rebuilder_map, rebuilder):
+    """Add the rebuild methods of append_rebuilder() to a map of class names to methods"""
+    if isinstance(rebuilder, list):
+        for obj_class in rebuilder:
+            if hasattr(obj_class, REBUILDER):
+                rebuilder_map[obj_class.__class_name__] = getattr(obj_class, REBUILDER)
+            else:
+                raise ReprBuildError(
+                    f"Rebuild method, {REBUILDER} not found in {obj_class.__class_name__}"
+                )
+    elif isinstance(rebuilder, dict):
+        for class_name, mapper in rebuilder.items():
+            rebuilder_map[class_name] = mapper
+    else:
+        if hasattr(rebuilder, REBUILDER):
+            rebuilder_map[rebuilder.__class_name__] = getattr(rebuilder, REBUILDER)
+        else:
+            raise ReprBuildError(
+                f"No rebuilder {REBUILDER} method in {rebuilder.__class_name__}"
+            )
+
+
+def _parse_repr(obj_repr, lazy=False, strings=None):
+    """Return the parsed representation of a string, bytes or an already parsed list
+    Args:
+        obj_repr (Union[str,bytes,list]): the representation
+        lazy (bool): parse a string lazily if it is large enough, see lazy_repr
+        strings (dict): table of strings shared by a batch, see _parse_strings
+    """
+    if isinstance(obj_repr, str):
+        try:
+            if is_compact(obj_repr):
+                return decode_symbols(obj_repr)
+            lazy_node = lazy_repr(obj_repr) if lazy else None
+            if lazy_node is None:
+                return _parse_strings(obj_repr, strings)
+            return lazy_node
+        except ReprSyntaxError as error:
+            raise ReprBuildError(
+                f"ReprParser argument is invalid representation: {error}"
+            ) from error
+    if isinstance(obj_repr, (bytes, bytearray, memoryview)):
+        try:
+            return decode_binary(obj_repr)
+        except ReprBuildError as error:
+            raise ReprBuildError(
+                f"ReprParser argument is invalid representation: {error}"
+            ) from error
+    return obj_repr
+
+
+def _parse_batch(obj_reprs, _):
+    """Return the parsed representations of a chunk of a parse_many() batch"""
+    strings = {}
+    return [_parse_repr(obj_repr, strings=strings) for obj_repr in obj_reprs]
+
+
+class _RebuildRefs:
+    """Instances rebuilt for the shared objects of the representation being rebuilt
+
+    Args:
+        tree (_ReprTree): The outermost representation of the rebuild, searched for the
+                     definition of a shared object first reached through a back reference
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.root = tree.root
+        self.instances = {}
+        self.pending = set()
+        self._defns = None
+
+    def resolve(self, ref, parser):
+        """Return the instance for a back reference, rebuilding its definition if required"""
+        if ref in self.instances:
+            return self.instances[ref]
+        if ref in self.pending:
+            return None
+        return parser.rebuild(obj_repr=self.definition(ref))
+
+    def definition(self, ref):
+        """Return the representation holding the definition of a shared object"""
+        if self._defns is None:
+            self._defns = _index_shared_defns(self.root)
+        obj_repr = self._defns.get(ref)
+        if obj_repr is None:
+            raise ReprBuildError(f"No definition found for back reference {ref}")
+        return obj_repr
+
+
+class _TreeRebuild(_RebuildRefs):
+    """Rebuild engine walking a parsed representation once
+
+    Args:
+        tree (_ReprTree): the outermost representation of the rebuild
+        rebuilder_map (dict): class names mapped to the rebuild methods of the parser rebuilt
+        flyweight (bool): rebuild identical subtrees once and share the instance
+        rebuild_members (bool): rebuild the members of lists, tuples, sets and dicts
+
+    Additional Information:
+        The fields of each distinct summary string are only parsed once, they are kept by
+        the tree. Builtins and containers are given the values the parser engine gives,
+        where containers hold the representations of their members. With rebuild_members
+        lists, tuples, sets and dicts are constructed from their members rebuilt in turn,
+        without a parser for each level, and the value of each distinct immutable leaf
+        string is only parsed once. Objects of other classes are passed to their
+        rebuild method, found in the map of the parser rebuilding them and then in
+        rebuilder_map. With flyweight identical subtrees are found by the digests
+        diff_repr() uses, back references are still resolved to the instance of their own
+        shared object.
+    """
+
+    def __init__(self, tree, rebuilder_map, flyweight=False, rebuild_members=False):
+        super().__init__(tree)
+        self.rebuilder_map = rebuilder_map
+        self.rebuild_members = rebuild_members
+        self.leaves = {}
+        self.shared = None
+        if flyweight:
+            if tree.digests is None:
+                tree.digests = _SubtreeDigests()
+            self.shared = {}
+
+    def rebuild_member(self, parser, name, obj_repr):
+        """Rebuild as ReprParser.rebuild(name, obj_repr) does, for a parser of this rebuild"""
+        class_name = None
+        if obj_repr is None and name is not None:
+            obj_repr = parser.get_repr(name)
+        elif obj_repr is None:
+            obj_repr = parser._repr_node
+        else:
+            class_name = name
+            if isinstance(obj_repr, str):
+                obj_repr = _parse_repr(obj_repr)
+        if obj_repr is None:
+            return None
+        return self.value(obj_repr, class_name, parser._rebuilder_map)
+
+    def value(self, node, class_name=None, rebuilder_map=None):
+        """Return the value rebuilt from a node of the representation
+        Args:
+            node (object): [summary, definition] list, or a member of a container
+            class_name (str): class to rebuild the node as, the class of its summary if None
+            rebuilder_map (dict): rebuild methods searched before those of the engine
+        Returns:
+            object: the rebuilt instance or value
+        Raises:
+            ReprBuildError: if there is no rebuild method for the class of an object
         """
-        print(self.format_repr(indent=indent))
+        if node.__class__ is str:
+            return self._leaf(node)
+        if node.__class__ is not list or len(node) != 2:
+            return node
+        fields = self.tree.summary_fields(node[0]) if node[0].__class__ is str else None
+        if fields is None:
+            return node
+        ref = fields["ref"]
+        obj_defn = node[1]
+        is_builtin = (
+            obj_defn.__class__ is tuple
+            and len(obj_defn) == 2
+            and isinstance(obj_defn[0], str)
+            and isinstance(obj_defn[1], str)
+        )
+        if is_builtin and obj_defn[1] == REFERENCE:
+            return self._reference(ref, rebuilder_map)
+
+        digest = None
+        if self.shared is not None:
+            digest = self.tree.digests.digest(node)
+            if digest in self.shared:
+                return self.shared[digest]
+        if class_name is None:
+            class_name = fields["class"]
+        if ref is not None:
+            self.pending.add(ref)
+
+        container = _CONTAINER_CLASSES.get(class_name)
+        builtin = (
+            None if self.rebuild_members else _builtin_value(fields["class"], obj_defn)
+        )
+        if builtin is not None:
+            new_obj = builtin
+        elif not self.rebuild_members:
+            new_obj = self._object(node, class_name, rebuilder_map)
+        elif container is not None and isinstance(
+            obj_defn, (list, tuple, set, dict, LazyMembers)
+        ):
+            if container is not dict and is_columnar(obj_defn):
+                obj_defn = expand_columns(obj_defn)
+            if container is dict:
+                new_obj = {
+                    key: self.value(member, None, rebuilder_map)
+                    for key, member in obj_defn.items()
+                }
+            else:
+                members = (
+                    obj_defn.values()
+                    if isinstance(obj_defn, (dict, LazyMembers))
+                    else obj_defn
+                )
+                new_obj = container(
+                    self.value(member, None, rebuilder_map) for member in members
+                )
+        elif is_builtin and class_name in _BUILTIN_CLASSES:
+            new_obj = _BUILTIN_CLASSES[class_name](obj_defn[0])
+        elif is_builtin and class_name == "ndarray":
+            new_obj = ndarray_from_text(obj_defn[0])
+        elif isinstance(obj_defn, str):
+            new_obj = self._leaf(obj_defn)
+        else:
+            new_obj = self._object(node, class_name, rebuilder_map)
+
+        if ref is not None:
+            self.pending.discard(ref)
+            self.instances[ref] = new_obj
+        if digest is not None:
+            self.shared[digest] = new_obj
+        return new_obj
+
+    def _object(self, node, class_name, rebuilder_map):
+        """Return the instance the rebuild method of class_name rebuilds from node"""
+        mapper = None if rebuilder_map is None else rebuilder_map.get(class_name)
+        if mapper is None:
+            mapper = self.rebuilder_map.get(class_name)
+        if mapper is None:
+            raise ReprBuildError(f"No {REBUILDER} method found for {class_name}")
+        return mapper(node)
+
+    def _reference(self, ref, rebuilder_map):
+        """Return the instance of a back reference, rebuilding its definition if needed"""
+        if ref in self.instances:
+            return self.instances[ref]
+        if ref in self.pending:
+            return None
+        return self.value(self.definition(ref), None, rebuilder_map)
+
+    def _leaf(self, text):
+        """Return the value of the repr() text of a member"""
+        try:
+            return self.leaves[text]
+        except KeyError:
+            pass
+        try:
+            value = parse_literal(text)
+        except ReprSyntaxError:
+            value = text
+        if value.__class__ in _IMMUTABLE_TYPES:
+            self.leaves[text] = value
+        return value
+
+
+def _index_shared_defns(root):
+    """Map the reference number of each shared object definition to its representation"""
+    defns = {}
+    pending = [root]
+    while pending:
+        cur_node = pending.pop()
+        if isinstance(cur_node, list) and len(cur_node) == 2:
+            summary, item_defn = split_repr(cur_node)
+            if summary is not None:
+                if summary.get("ref") is not None and not summary["is_reference"]:
+                    defns.setdefault(summary["ref"], cur_node)
+                cur_node = item_defn
+        if is_columnar(cur_node):
+            pending.extend(expand_columns(cur_node))
+        elif isinstance(cur_node, (dict, LazyMembers)):
+            pending.extend(cur_node.values())
+        elif isinstance(cur_node, (list, tuple)):
+            pending.extend(cur_node)
+    return defns
 
 
-def print_repr(obj_repr, indent="    "):
+def print_repr(obj_repr, indent="    ", file=None):
     """Print the current object registration
     Args:
         obj_repr (Union[str,list]):  Recursive object representation
         indent (str): The starting indentation for this representation
+        file (TextIO): Stream to write to, defaults to sys.stdout
     Returns:
     Raises:
         ReprBuildError: If argument is not a valid representation
     """
-    print(format_repr(obj_repr, indent=indent))
+    ReprParser(obj_repr).print(indent=indent, file=file)
 
 
 def format_repr(obj_repr, indent="    "):
@@ -439,86 +1097,163 @@ def format_repr(obj_repr, indent="    "):
     return ReprParser(obj_repr).format_repr(indent=indent)
 
 
-def _format_repr_dict(obj_dict, indent="", name: Optional = ""):
-    """print an element that is of type dict"""
-    if is_valid_repr(obj_dict):
-        return_str = format_repr(obj_dict, indent)
-    elif isinstance(obj_dict, str):
-        return_str = f"{indent}{obj_dict}\n"
-    elif _builtin_repr(obj_dict):
-        return_str = f"{indent}{name} : {obj_dict[0]} : {obj_dict[1]}\n"
-    elif isinstance(obj_dict, dict):
-        return_str = ""
-        for cur_name, cur_obj in obj_dict.items():
-            return_str += _format_repr_element(
-                cur_obj,
-                indent,
-                name=cur_name,
-                header=f"{indent}{cur_name}: {cur_obj.__class__.__name__}\n",
-            )
-    elif isinstance(obj_dict, (set, list, tuple)):
-        return_str = ""
-        for item in obj_dict:
-            return_str += _format_repr_element(item, indent, name=name)
-    elif obj_dict is not None:
-        return_str = f"Type mismatch, expecting 'dict' got {type(obj_dict)}\n"
-    return return_str
-
-
-def _format_repr_element(
-    cur_defn, indent="", header: Optional = None, name: Optional = ""
-):
-    """print the details of a single element of the representation s"""
-    return_str = ""
+def _write_lines(lines, file=None):
+    """Write formatted lines to a stream followed by a blank line, as print() would"""
+    write = (sys.stdout if file is None else file).write
+    for line in lines:
+        write(line)
+    write("\n")
+
+
+def _iter_format_lines(obj_repr, indent, pause=False):
+    """Yield the formatted lines for a representation
+
+    Each task returns the lines for one level of the representation, with sub-tasks for the
+    levels below it, in output order. They are pushed on the stack in reverse so the lines
+    come out in order. The members of a container are formatted _FORMAT_CHUNK at a time.
+    If pause is True an empty string is also yielded after each chunk, so a caller taking
+    the lines a slice at a time, such as async_format_repr, gets control back even from
+    members that have no lines.
+    """
+    stack = [(_format_dict, obj_repr, indent, "")]
+    while stack:
+        task = stack.pop()
+        if isinstance(task, str):
+            yield task
+            continue
+        if pause and task[0] is _format_members:
+            yield ""
+        entries = task[0](*task[1:])
+        entries.reverse()
+        stack.extend(entries)
+
+
+def _format_node(obj_repr, indent):
+    """format a representation"""
+    summary, obj_defn = split_repr(obj_repr)
+    if summary is None:
+        raise ReprBuildError("ReprParser argument is invalid representation ")
+    return _format_split(summary, obj_defn, indent)
+
+
+def _format_split(summary, obj_defn, indent):
+    """format the summary and definition of a valid representation"""
+    name = summary.get("name", "")
+    class_name = summary.get("class", "")
+    if class_name in ("str", "int", "float", "complex"):
+        return [f"{indent}{obj_defn}\n"]
+    if class_name in ("tuple", "set", "list"):
+        if is_columnar(obj_defn):
+            obj_defn = expand_columns(obj_defn)
+        if name == "":
+            return [(_format_list, obj_defn, indent)]
+        return [
+            f"{indent}{name} : {class_name}\n",
+            (_format_list, obj_defn, indent + "    "),
+        ]
+    return [
+        f"{indent}{name} : {class_name}\n",
+        (_format_dict, obj_defn, indent + "    ", ""),
+    ]
+
+
+def _format_dict(obj_dict, indent, name):
+    """format an element that is of type dict"""
+    summary, item_defn = split_repr(obj_dict)
+    if summary is not None:
+        return _format_split(summary, item_defn, indent)
+    if isinstance(obj_dict, str):
+        return [f"{indent}{obj_dict}\n"]
+    if _builtin_defn(obj_dict):
+        return [f"{indent}{name} : {obj_dict[0]} : {obj_dict[1]}\n"]
+    if isinstance(obj_dict, (dict, LazyMembers)):
+        return _format_members(iter(obj_dict.items()), indent, None, True)
+    if isinstance(obj_dict, (set, list, tuple)):
+        return _format_members(iter(obj_dict), indent, name, False)
+    return _type_mismatch("dict", obj_dict)
+
+
+def _type_mismatch(expected, obj_defn):
+    """Return the line reporting a definition of the wrong type, none for a missing one"""
+    if obj_defn is None:
+        return []
+    if expected == "list":
+        return [f"Type mismatch expecting 'list' go {type(obj_defn)}\n"]
+    return [f"Type mismatch, expecting 'dict' got {type(obj_defn)}\n"]
+
+
+def _format_members(members, indent, name, header):
+    """Format the next _FORMAT_CHUNK members of a container, queueing a task for the rest
+    Args:
+        members (Iterator): the (name, value) items of a dict if header is True, else the
+                    members of a list, set or tuple, each formatted under name
+    """
+    entries = []
+    count = 0
+    for cur_obj in islice(members, _FORMAT_CHUNK):
+        if header:
+            cur_name, cur_obj = cur_obj
+        else:
+            cur_name = name
+        entries.extend(_format_element(cur_obj, indent, cur_name, header))
+        count += 1
+    if count == _FORMAT_CHUNK:
+        entries.append((_format_members, members, indent, name, header))
+    return entries
+
+
+def _format_element(cur_defn, indent, name, header):
+    """format a single element of the representation, under a header line if requested"""
     if isinstance(cur_defn, (str, int, float, complex)):
-        return_str = f"{indent}{name} : {cur_defn}\n"
-    elif _builtin_repr(cur_defn):
-        item_defn = split_repr(cur_defn)[1]
-        return_str = f"{indent}{name} : {item_defn[1]}: {item_defn[0]}\n"
-    elif is_valid_repr(cur_defn):
-        if header is not None and not _builtin_repr(cur_defn):
-            return_str += header
-            indent += "    "
-        return_str += format_repr(cur_defn, indent)
-    elif isinstance(cur_defn, (tuple, set, list)):
-        if header is not None:
-            return_str += header
-            indent += "    "
-        return_str += _format_repr_list(cur_defn, indent)
+        return [f"{indent}{name} : {cur_defn}\n"]
+    summary, item_defn = split_repr(cur_defn)
+    if summary is None:
+        item_defn = cur_defn
+    if _builtin_defn(item_defn):
+        return [f"{indent}{name} : {item_defn[1]}: {item_defn[0]}\n"]
+    if not isinstance(cur_defn, (tuple, set, list, dict)):
+        return _format_node(cur_defn, indent)
+    if header:
+        entries = [f"{indent}{name}: {cur_defn.__class__.__name__}\n"]
+        indent += "    "
+    else:
+        entries = []
+    if summary is not None:
+        entries.extend(_format_split(summary, item_defn, indent))
     elif isinstance(cur_defn, dict):
-        if header is not None:
-            return_str += header
-            indent += "    "
-        return_str += _format_repr_dict(cur_defn, indent, name=name)
+        entries.append((_format_dict, cur_defn, indent, name))
     else:
-        return_str = format_repr(cur_defn, indent)
-    return return_str
+        entries.append((_format_list, cur_defn, indent))
+    return entries
 
 
-def _format_repr_list(obj_list, indent):
-    """print an element that is of type list, set or tuple"""
-    return_str = ""
-    if is_valid_repr(obj_list):
-        (summary, list_dict) = split_repr(obj_list)
-        return_str += (
-            f"{indent}{summary.get('name','')} : {summary.get('class','Unknown')}\n"
-        )
-        return_str += format_repr(list_dict, indent + "    ")
-    elif isinstance(obj_list, (tuple, set, list)):
-        for cur_obj in obj_list:
-            return_str += _format_repr_element(cur_obj, indent)
-    else:
-        return_str = f"Type mismatch expecting 'list' go {type(cur_obj)}\n"
-    return return_str
+def _format_list(obj_list, indent):
+    """format an element that is of type list, set or tuple"""
+    summary, list_dict = split_repr(obj_list)
+    if summary is not None:
+        return [
+            f"{indent}{summary.get('name','')} : {summary.get('class','Unknown')}\n",
+            (_format_node, list_dict, indent + "    "),
+        ]
+    if isinstance(obj_list, (tuple, set, list)):
+        return _format_members(iter(obj_list), indent, "", False)
+    if isinstance(obj_list, (dict, LazyMembers)):
+        # Lists built as objects have their (empty) members in a dict
+        return [(_format_dict, obj_list, indent, "")]
+    return _type_mismatch("list", obj_list)
 
 
 def _builtin_repr(list_dict):
     if is_valid_repr(list_dict):
         list_dict = split_repr(list_dict)[1]
-    is_builtin = (
-        isinstance(list_dict, tuple)
-        and (len(list_dict) == 2)
-        and isinstance(list_dict[0], str)
-        and isinstance(list_dict[1], str)
+    return _builtin_defn(list_dict)
+
+
+def _builtin_defn(obj_defn):
+    """Return True if obj_defn is the (repr, class name) definition of a builtin"""
+    return (
+        isinstance(obj_defn, tuple)
+        and (len(obj_defn) == 2)
+        and isinstance(obj_defn[0], str)
+        and isinstance(obj_defn[1], str)
     )
-    return is_builtin
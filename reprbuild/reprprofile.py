@@ -0,0 +1,259 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Opt-in profiling of the build, parse and rebuild hot paths, per class and attribute
+"""
+import json
+import sys
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+from .reprbase import _PROFILE, ReprBuildError
+
+# Columns of each row of ReprProfile.rows(), in the order print() shows them
+_COLUMNS = (
+    "function",
+    "class",
+    "attribute",
+    "calls",
+    "time",
+    "self_time",
+    "nodes",
+    "bytes",
+)
+
+
+class ReprProfile:
+    """Call counts, times, nodes and output size collected by profile_repr()
+
+    Additional Information:
+        Each entry is keyed by the profiled function, the class of the object it handled and
+        for build_attribute_defn the attribute name. time includes the calls made below it,
+        self_time does not. nodes counts the [summary, definition] lists and values a call
+        built itself and bytes the characters of the summaries, member names and value text
+        in them, without the punctuation added by repr().
+    """
+
+    __slots__ = ("entries", "_frames", "_thread", "_last")
+
+    def __init__(self):
+        # (function, class, attribute) : [calls, time, self time, nodes, bytes]
+        self.entries = {}
+        self._frames = []
+        self._thread = None
+        # Definition returned by the last call recorded, not counted again by its caller
+        self._last = None
+
+    def rows(self, sort="self_time"):
+        """Return a dict for each entry, sorted on a column from the largest value
+        Args:
+            sort (str): column to sort on, one of the keys of the rows
+        Returns:
+            list: dicts with function, class, attribute, calls, time, self_time, nodes and
+                  bytes keys
+        Raises:
+            ReprBuildError: if sort is not a column
+        """
+        if sort not in _COLUMNS:
+            raise ReprBuildError(f"Unknown profile column {sort}")
+        rows = [
+            dict(zip(_COLUMNS, key + tuple(values)))
+            for key, values in self.entries.items()
+        ]
+        text_sort = sort in ("function", "class", "attribute")
+        rows.sort(
+            key=lambda row: str(row[sort]) if text_sort else row[sort],
+            reverse=not text_sort,
+        )
+        return rows
+
+    def totals(self):
+        """Return the calls, self time, nodes and bytes of each profiled function"""
+        totals = {}
+        for (function, _, _), values in self.entries.items():
+            total = totals.setdefault(
+                function, {"calls": 0, "self_time": 0.0, "nodes": 0, "bytes": 0}
+            )
+            total["calls"] += values[0]
+            total["self_time"] += values[2]
+            total["nodes"] += values[3]
+            total["bytes"] += values[4]
+        return totals
+
+    def print(self, sort="self_time", limit=None, file=None):
+        """Print the entries as a table
+        Args:
+            sort (str): column to sort on, see rows()
+            limit (int): if not None only print this many rows
+            file (TextIO): Stream to write to, defaults to sys.stdout
+        Returns:
+        Raises:
+            ReprBuildError: if sort is not a column
+        """
+        rows = self.rows(sort)[:limit]
+        write = (sys.stdout if file is None else file).write
+        write(
+            f"{'function':<22}{'class':<20}{'attribute':<20}{'calls':>10}"
+            f"{'time':>11}{'self_time':>11}{'nodes':>10}{'bytes':>12}\n"
+        )
+        for row in rows:
+            write(
+                f"{row['function']:<22}{str(row['class'])[:19]:<20}"
+                f"{str(row['attribute'] or '')[:19]:<20}{row['calls']:>10}"
+                f"{row['time']:>11.6f}{row['self_time']:>11.6f}"
+                f"{row['nodes']:>10}{row['bytes']:>12}\n"
+            )
+
+    def dump(self, path, sort="self_time"):
+        """Write the rows as a JSON list to a file
+        Args:
+            path (Union[str,os.PathLike]): file to write
+            sort (str): column to sort on, see rows()
+        Returns:
+        Raises:
+            ReprBuildError: if sort is not a column
+        """
+        with open(path, "w", encoding="utf-8") as stats_file:
+            json.dump(self.rows(sort), stats_file, indent=1)
+
+    def _call(self, hook, function, *args, **kwargs):
+        """Return function(*args, **kwargs) for a profiled call, recorded on the profiled
+        thread under the key its hook gives the positional arguments"""
+        if self._thread != threading.get_ident():
+            return function(*args, **kwargs)
+        key_of, size_of = _HOOKS[hook]
+        self._frames.append(0.0)
+        started = perf_counter()
+        result = None
+        try:
+            result = function(*args, **kwargs)
+            return result
+        finally:
+            self._record(key_of(*args), started, result, size_of)
+
+    def _record(self, key, started, result, size_of):
+        """Add a finished call to its entry, charging its time to the calling frame"""
+        elapsed = perf_counter() - started
+        if result.__class__ is list and result is self._last:
+            # build_attribute_defn returning the definition of build_object_defn
+            result_size = (0, 0)
+        else:
+            result_size = size_of(result)
+        self._last = result
+        child_time = self._frames.pop()
+        if self._frames:
+            self._frames[-1] += elapsed
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = [0, 0.0, 0.0, 0, 0]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += elapsed - child_time
+        entry[3] += result_size[0]
+        entry[4] += result_size[1]
+
+
+def _defn_size(defn):
+    """Return (nodes, characters) of a definition, without the nodes built by other calls"""
+    if defn is None:
+        return (0, 0)
+    if defn.__class__ is str:
+        return (1, len(defn))
+    nodes, chars = 1, len(defn[0])
+    members = defn[1]
+    if members.__class__ is tuple and len(members) == 2 and members[1].__class__ is str:
+        return (nodes, chars + len(members[0]))
+    if isinstance(members, dict):
+        chars += sum(len(str(key)) for key in members)
+        members = members.values()
+    elif not isinstance(members, (list, tuple, set)):
+        return (nodes, chars + len(str(members)))
+    for member in members:
+        if member.__class__ is str:
+            nodes += 1
+            chars += len(member)
+    return (nodes, chars)
+
+
+def _attribute_key(source, attribute, *_):
+    return ("build_attribute_defn", type(source).__name__, attribute)
+
+
+def _object_key(source, *_):
+    return ("build_object_defn", type(source).__name__, None)
+
+
+def _split_key(obj_repr):
+    if isinstance(obj_repr, list) and obj_repr and isinstance(obj_repr[0], str):
+        class_name = obj_repr[0].split(",", 1)[0]
+        if class_name.startswith("class: "):
+            class_name = class_name[len("class: ") :]
+        return ("split_repr", class_name, None)
+    return ("split_repr", type(obj_repr).__name__, None)
+
+
+def _node_key(_, node):
+    return _split_key(node)
+
+
+def _rebuild_key(parser, name, obj_repr, *_):
+    if obj_repr is None and name is not None:
+        return ("ReprParser.rebuild", parser._class_name, name)
+    return ("ReprParser.rebuild", name or parser._class_name, None)
+
+
+def _no_size(*_):
+    return (0, 0)
+
+
+def _rebuild_size(_):
+    return (1, 0)
+
+
+# Hook name passed to ReprProfile._call by each profiled call : (key function, size function)
+_HOOKS = {
+    "build_attribute_defn": (_attribute_key, _defn_size),
+    "build_object_defn": (_object_key, _defn_size),
+    "split_repr": (_split_key, _no_size),
+    "_ReprTree.split": (_node_key, _no_size),
+    "ReprParser.rebuild": (_rebuild_key, _rebuild_size),
+}
+
+
+@contextmanager
+def profile_repr():
+    """Profile the build, parse and rebuild calls made inside a with block
+    Args:
+    Returns:
+        ReprProfile: the profile, filled in as the calls are made
+    Raises:
+        ReprBuildError: if a profile is already active
+
+    Additional Information:
+        build_attribute_defn, build_object_defn, split_repr, the cached splits of the
+        ReprParser accessors and ReprParser.rebuild check for an active profile and hand
+        their call to it. Only the calls made by the thread that entered the block are
+        recorded, calls made by other threads during the block are run as they are, after
+        checking their thread. The iterative and streaming engines and the chunks of a
+        parallel build do not call build_attribute_defn and are only seen through the
+        splits and rebuilds.
+    """
+    if _PROFILE[0] is not None:
+        raise ReprBuildError("A repr profile is already active")
+    profile = ReprProfile()
+    profile._thread = threading.get_ident()
+    _PROFILE[0] = profile
+    try:
+        yield profile
+    finally:
+        _PROFILE[0] = None
@@ -0,0 +1,556 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+On-disk store of representation snapshots, each distinct subtree stored once
+
+A store is a directory holding three append-only files:
+    chunks.dat      : the binary encoding of each stored subtree, one after the other
+    chunks.idx      : a (digest, offset, length) record for each subtree in chunks.dat
+    snapshots.jsonl : a {"name", "time", "root"} line for each snapshot
+Every [summary, definition] list whose definition is a container is stored as its own chunk,
+with each object below it replaced by (digest, STORED). Lists, tuples and dicts with more
+than page_size members are stored as pages of members, replaced by (digest, STOREDPAGES)
+of the chunk listing the pages with, for a list or tuple, the end of each page and, for a
+dict, the buckets mapping each key to its page. A page ends after a member, or dict key,
+whose crc32 meets a mask, so inserting or removing a member only changes the pages around
+it and not every page after it.
+Sets are stored as (members, STOREDSET) with their members in a canonical order. The digest
+of a chunk is the blake2b digest of its bytes, so a subtree found in an earlier snapshot, or
+twice in the same one, is written once.
+"""
+import json
+import mmap
+from bisect import bisect_right
+import os
+import struct
+import time
+import zlib
+from hashlib import blake2b
+
+from .constants import STORED, STOREDPAGES, STOREDSET, STOREPAGESIZE
+from .reprbinary import decode_binary, encode_binary
+from .reprbase import ReprBuildError
+from .reprhash import _DIGEST_SIZE
+from .reprindex import LazyMembers
+from .reprparse import _parse_repr, ReprParser
+from .reprwalk import iter_defn_repr
+
+# digest, offset and length of a chunk in chunks.dat
+_INDEX_RECORD = struct.Struct(f"<{_DIGEST_SIZE}sQI")
+
+# Marker class names whose first member is a digest
+_CHUNK_MARKERS = (STORED, STOREDPAGES)
+
+# Classes of the values that can hold objects or sets
+_NESTED = (list, tuple, dict, set, LazyMembers)
+
+
+def _is_object(node):
+    """Return True if a value is a [summary, definition] list stored as its own chunk"""
+    if node.__class__ is not list or len(node) != 2 or node[0].__class__ is not str:
+        return False
+    summary, defn = node
+    if not (summary.startswith("class: ") or summary.startswith("<class '")):
+        return False
+    defn_class = defn.__class__
+    if defn_class is tuple:
+        # (text, class name) of a builtin, back reference or elision marker
+        return len(defn) != 2 or defn[1].__class__ is not str
+    return defn_class in (dict, list, set, LazyMembers)
+
+
+def _marker(value):
+    """Return the class name of a stored marker, None if value is not one"""
+    if value.__class__ is tuple and len(value) == 2 and value[1].__class__ is str:
+        if value[1] in _CHUNK_MARKERS and value[0].__class__ is bytes:
+            return value[1]
+        if value[1] == STOREDSET and value[0].__class__ is tuple:
+            return STOREDSET
+    return None
+
+
+def _set_members(members):
+    """Return the members of a set in an order that only depends on their values"""
+    return tuple(sorted(members, key=repr))
+
+
+class ReprStore:
+    """Content addressed store of representation snapshots in a directory
+
+    Args:
+        path (Union[str,os.PathLike]): directory of the store, created if it does not exist
+        page_size (int): lists, tuples and dicts with more members are stored as pages of
+                    about this many members, STOREPAGESIZE by default
+    Raises:
+        ReprBuildError: if page_size is not a positive int
+
+    Additional Information:
+        Storing a snapshot walks the whole representation, but only the subtrees not
+        already in the store are written, so the store grows with the changes between
+        snapshots rather than with their size. Reading one member of a snapshot only
+        decodes the chunks on its path and below it. A store is written by one process
+        at a time, see the module documentation for its layout.
+    """
+
+    __slots__ = ("path", "page_size", "_index", "_snapshots", "_data", "_data_size")
+
+    def __init__(self, path, page_size=STOREPAGESIZE):
+        if (
+            not isinstance(page_size, int)
+            or isinstance(page_size, bool)
+            or page_size < 1
+        ):
+            raise ReprBuildError(f"page_size must be a positive int, not {page_size!r}")
+        self.path = os.fspath(path)
+        self.page_size = page_size
+        os.makedirs(self.path, exist_ok=True)
+        self._index = {}
+        with open(self._file("chunks.idx"), "ab+") as index_file:
+            index_file.seek(0)
+            records = index_file.read()
+        # A record cut short by an interrupted write is dropped before more are appended
+        usable = len(records) - len(records) % _INDEX_RECORD.size
+        if usable < len(records):
+            os.truncate(self._file("chunks.idx"), usable)
+        for digest, offset, length in _INDEX_RECORD.iter_unpack(records[:usable]):
+            self._index[digest] = (offset, length)
+        self._snapshots = []
+        with open(self._file("snapshots.jsonl"), "ab+") as snapshot_file:
+            snapshot_file.seek(0)
+            lines = snapshot_file.read()
+        usable = lines.rfind(b"\n") + 1
+        if usable < len(lines):
+            os.truncate(self._file("snapshots.jsonl"), usable)
+        for line in lines[:usable].splitlines():
+            entry = json.loads(line)
+            self._snapshots.append((entry["name"], entry["time"], entry["root"]))
+        self._data = None
+        self._data_size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        """Release the memory map of the chunks read so far"""
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+            self._data_size = 0
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def put(self, name, obj_repr, timestamp=None):
+        """Store a snapshot of a representation
+        Args:
+            name (str): name of the snapshot, several snapshots can share a name
+            obj_repr (Union[str,bytes,list,ReprParser]): the representation to store
+            timestamp (Union[float,datetime]): time of the snapshot, now if None
+        Returns:
+            str: hex digest of the root chunk of the snapshot
+        Raises:
+            ReprBuildError: if the representation is not valid
+        Additional Information:
+            The chunks are written and flushed to disk before the snapshot is added to the
+            index, so an interrupted put leaves the earlier snapshots readable.
+        """
+        if isinstance(obj_repr, ReprParser):
+            obj_repr = obj_repr._repr_node
+        else:
+            obj_repr = _parse_repr(obj_repr)
+        if timestamp is None:
+            timestamp = time.time()
+        elif not isinstance(timestamp, (int, float)):
+            timestamp = timestamp.timestamp()
+
+        with open(self._file("chunks.dat"), "ab") as data_file, open(
+            self._file("chunks.idx"), "ab"
+        ) as index_file:
+            writer = _ChunkWriter(self, data_file, index_file)
+            root = writer.store_tree(obj_repr)
+            for stored_file in (data_file, index_file):
+                stored_file.flush()
+                os.fsync(stored_file.fileno())
+        entry = (name, float(timestamp), root.hex())
+        with open(
+            self._file("snapshots.jsonl"), "a", encoding="utf-8"
+        ) as snapshot_file:
+            snapshot_file.write(
+                json.dumps({"name": entry[0], "time": entry[1], "root": entry[2]})
+                + "\n"
+            )
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+        self._snapshots.append(entry)
+        return entry[2]
+
+    def snapshots(self, name=None):
+        """Return the snapshots in the store, oldest first
+        Args:
+            name (str): if given only return the snapshots with this name
+        Returns:
+            list: (name, timestamp, root digest) tuples ordered by timestamp, then by the
+                  order they were stored in
+        """
+        entries = [
+            entry for entry in self._snapshots if name is None or entry[0] == name
+        ]
+        return sorted(entries, key=lambda entry: entry[1])
+
+    def find(self, name, timestamp=None):
+        """Return the latest snapshot of a name
+        Args:
+            name (str): name of the snapshot
+            timestamp (Union[float,datetime]): if given the latest snapshot taken at or
+                        before it
+        Returns:
+            tuple: (name, timestamp, root digest)
+        Raises:
+            ReprBuildError: if there is no such snapshot
+        """
+        if timestamp is not None and not isinstance(timestamp, (int, float)):
+            timestamp = timestamp.timestamp()
+        found = None
+        for entry in self.snapshots(name):
+            if timestamp is not None and entry[1] > timestamp:
+                break
+            found = entry
+        if found is None:
+            raise ReprBuildError(
+                f"No snapshot {name}"
+                + ("" if timestamp is None else f" taken at or before {timestamp}")
+            )
+        return found
+
+    def load(self, name, path=(), timestamp=None):
+        """Return the parsed representation of a snapshot, or of one of its members
+        Args:
+            name (str): name of the snapshot
+            path (tuple): list indexes and dict keys leading to a member, as in the changes
+                        of diff_repr, so the attribute a of the root object is (1, "a")
+            timestamp (Union[float,datetime]): if given the latest snapshot taken at or
+                        before it, else the latest snapshot
+        Returns:
+            Union[list,tuple,dict,set,str,None]: the value at path, as parse_literal()
+                        returns it
+        Raises:
+            ReprBuildError: if there is no such snapshot or member
+        Additional Information:
+            Only the chunks leading to the member and those below it are read, and of a
+            list, tuple or dict stored as pages only the page holding the next member of
+            the path. Back references to objects stored outside the member are returned
+            as they are.
+        """
+        value = self._chunk(bytes.fromhex(self.find(name, timestamp)[2]))
+        for depth, key in enumerate(path):
+            value = self._member(value, key, path[: depth + 1])
+        return self._expand(value)
+
+    def load_repr(self, name, path=(), timestamp=None):
+        """Return the representation string of a snapshot, or of one of its members
+        Args:
+            name (str): name of the snapshot
+            path (tuple): path of the member, see load()
+            timestamp (Union[float,datetime]): time of the snapshot, see load()
+        Returns:
+            str: the repr() of load(name, path, timestamp)
+        Raises:
+            ReprBuildError: if there is no such snapshot or member
+        """
+        value = self.load(name, path, timestamp)
+        try:
+            return repr(value)
+        except RecursionError:
+            return "".join(iter_defn_repr(value))
+
+    def stats(self):
+        """Return the number of snapshots and chunks and the bytes of chunks stored
+        Returns:
+            dict: {"snapshots": int, "chunks": int, "bytes": int}
+        """
+        return {
+            "snapshots": len(self._snapshots),
+            "chunks": len(self._index),
+            "bytes": sum(length for _, length in self._index.values()),
+        }
+
+    def _chunk(self, digest):
+        """Return the decoded value of a chunk"""
+        try:
+            offset, length = self._index[digest]
+        except KeyError:
+            raise ReprBuildError(f"Chunk {digest.hex()} is not in the store") from None
+        if offset + length > self._data_size:
+            # The chunk was written after the file was mapped
+            self.close()
+            with open(self._file("chunks.dat"), "rb") as data_file:
+                self._data = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._data_size = len(self._data)
+        return decode_binary(self._data[offset : offset + length])
+
+    def _join_pages(self, digest):
+        """Return a container stored as pages, its members still holding markers"""
+        kind, _, _, page_digests = self._chunk(digest)[:4]
+        if kind == "dict":
+            members = {}
+            for page_digest in page_digests:
+                members.update(self._chunk(page_digest))
+            return members
+        members = []
+        for page_digest in page_digests:
+            members.extend(self._chunk(page_digest))
+        return tuple(members) if kind == "tuple" else members
+
+    def _member(self, value, key, path):
+        """Return a member of a value of a snapshot, reading only the chunks it needs"""
+        marker = _marker(value)
+        if marker == STORED:
+            value = self._chunk(value[0])
+        elif marker == STOREDSET:
+            value = set(value[0])
+        elif marker == STOREDPAGES:
+            kind, count, _, page_digests, lookup = self._chunk(value[0])[:5]
+            if kind == "dict":
+                try:
+                    bucket = self._chunk(lookup[_key_bucket(key, len(lookup))])
+                    if key in bucket:
+                        return self._chunk(page_digests[bucket[key]])[key]
+                except TypeError:
+                    # key is not hashable
+                    pass
+            elif (
+                isinstance(key, int)
+                and not isinstance(key, bool)
+                and -count <= key < count
+            ):
+                # lookup holds the end of each page
+                position = key % count
+                page = bisect_right(lookup, position)
+                start = lookup[page - 1] if page else 0
+                return self._chunk(page_digests[page])[position - start]
+            raise ReprBuildError(f"No member at path {path!r}")
+        try:
+            if isinstance(value, (list, tuple, dict)):
+                return value[key]
+        except (IndexError, KeyError, TypeError):
+            pass
+        raise ReprBuildError(f"No member at path {path!r}")
+
+    def _expand(self, value):
+        """Return a value of a snapshot with every marker below it replaced by its contents"""
+        root = [value]
+        # Each entry is (container, position of the value to expand, True once the members
+        # of a tuple are expanded and it can be made a tuple again)
+        stack = [(root, 0, False)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            container, position, finished = pop()
+            if finished:
+                container[position] = tuple(container[position])
+                continue
+            node = container[position]
+            marker = _marker(node)
+            while marker is not None:
+                if marker == STORED:
+                    node = self._chunk(node[0])
+                elif marker == STOREDPAGES:
+                    node = self._join_pages(node[0])
+                else:
+                    node = set(node[0])
+                marker = _marker(node)
+            node_class = node.__class__
+            if node_class is tuple:
+                node = list(node)
+                push((container, position, True))
+            container[position] = node
+            if node_class is dict:
+                for key, child in node.items():
+                    if _needs_expand(child):
+                        push((node, key, False))
+            elif node_class is list or node_class is tuple:
+                for index, child in enumerate(node):
+                    if _needs_expand(child):
+                        push((node, index, False))
+        return root[0]
+
+
+def _key_bucket(key, buckets):
+    """Return the bucket of a dict key, the same in every process"""
+    return _member_crc(key) % buckets
+
+
+def _member_crc(member):
+    """Return the crc32 of the repr() of a member, the same in every process"""
+    return zlib.crc32(repr(member).encode("utf-8", "surrogatepass"))
+
+
+def _page_ends(crcs, page_size):
+    """Return the end of each page of members from the crc32 of each member
+    Args:
+        crcs (list): crc32 of each member, or of each key of a dict
+        page_size (int): target number of members of a page
+    Returns:
+        list: position after the last member of each page
+    Additional Information:
+        A page ends after a member whose crc32 is a multiple of a divisor, once it holds
+        a quarter of page_size members, so pages hold page_size members on average and
+        where they end only depends on the members near the end. A page is cut at four
+        times page_size members if no member ends it first.
+    """
+    smallest = max(1, page_size // 4)
+    largest = page_size * 4
+    divisor = max(1, page_size - smallest)
+    ends = []
+    start = 0
+    for position, crc in enumerate(crcs, 1):
+        size = position - start
+        if size >= largest or (size >= smallest and crc % divisor == 0):
+            ends.append(position)
+            start = position
+    if start < len(crcs):
+        ends.append(len(crcs))
+    return ends
+
+
+def _bucket_count(count, page_size):
+    """Return the number of buckets of a dict of count keys stored as pages, the power of
+    two at or above the number of pages it would have on average, so it only changes when
+    count crosses a power of two times page_size"""
+    return 1 << (-(-count // page_size) - 1).bit_length()
+
+
+def _needs_expand(value):
+    """Return True if a value can hold a marker"""
+    value_class = value.__class__
+    if value_class is list or value_class is dict:
+        return True
+    if value_class is tuple:
+        return _marker(value) is not None or any(
+            member.__class__ in _NESTED for member in value
+        )
+    return False
+
+
+class _ChunkWriter:
+    """Writes the chunks of the snapshots stored by a ReprStore
+
+    Args:
+        store (ReprStore): the store, whose chunk index is updated as chunks are written
+        data_file (BinaryIO): chunks.dat opened for appending
+        index_file (BinaryIO): chunks.idx opened for appending
+    """
+
+    __slots__ = ("store", "data_file", "index_file", "offset")
+
+    def __init__(self, store, data_file, index_file):
+        self.store = store
+        self.data_file = data_file
+        self.index_file = index_file
+        self.offset = os.fstat(data_file.fileno()).st_size
+
+    def store_chunk(self, node):
+        """Write a chunk unless the store already holds it, returning its digest"""
+        data = encode_binary(node)
+        digest = blake2b(data, digest_size=_DIGEST_SIZE).digest()
+        index = self.store._index
+        if digest not in index:
+            self.data_file.write(data)
+            self.index_file.write(_INDEX_RECORD.pack(digest, self.offset, len(data)))
+            index[digest] = (self.offset, len(data))
+            self.offset += len(data)
+        return digest
+
+    def store_pages(self, container):
+        """Write a list, tuple or dict as pages and return the digest of their list"""
+        page_size = self.store.page_size
+        if container.__class__ is dict:
+            kind = "dict"
+            members = list(container.items())
+            ends = _page_ends(list(map(_member_crc, container)), page_size)
+            pages = [dict(members[start:end]) for start, end in zip([0, *ends], ends)]
+        else:
+            kind = "tuple" if container.__class__ is tuple else "list"
+            members = list(container)
+            ends = _page_ends(list(map(_member_crc, members)), page_size)
+            pages = [members[start:end] for start, end in zip([0, *ends], ends)]
+        page_digests = [self.store_chunk(page) for page in pages]
+        if kind != "dict":
+            return self.store_chunk([kind, len(members), page_size, page_digests, ends])
+        # Buckets of the page holding each key, so a key is found by reading one bucket
+        # and one page. Their number does not depend on where the pages end, so a bucket
+        # only changes when a key in it is added or removed or moves to another page
+        buckets = [{} for _ in range(_bucket_count(len(members), page_size))]
+        page = 0
+        for position, (key, _) in enumerate(members):
+            if position == ends[page]:
+                page += 1
+            buckets[_key_bucket(key, len(buckets))][key] = page
+        bucket_digests = [self.store_chunk(bucket) for bucket in buckets]
+        return self.store_chunk(
+            [kind, len(members), page_size, page_digests, bucket_digests]
+        )
+
+    def store_tree(self, root):
+        """Write the chunks of a parsed representation and return the digest of its root"""
+        page_size = self.store.page_size
+        out = [None]
+        # Each entry is (value, list the stored value goes in, its position, None) or, once
+        # the members of a container are stored, (container, list, position, members)
+        stack = [(root, out, 0, None)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            value, out_list, position, members = pop()
+            value_class = value.__class__
+            if members is not None:
+                if value_class is list:
+                    stored = members
+                elif value_class is tuple:
+                    stored = tuple(members)
+                else:
+                    stored = dict(zip(value.keys(), members))
+                if _is_object(value):
+                    stored = (self.store_chunk(stored), STORED)
+                elif len(stored) > page_size:
+                    stored = (self.store_pages(stored), STOREDPAGES)
+                out_list[position] = stored
+                continue
+            if value_class is set:
+                out_list[position] = (_set_members(value), STOREDSET)
+                continue
+            if value_class is dict or value_class is LazyMembers:
+                children = list(value.values())
+            elif value_class is list or value_class is tuple:
+                children = value
+            else:
+                out_list[position] = value
+                continue
+            members = [None] * len(children)
+            push((value, out_list, position, members))
+            for index in range(len(children) - 1, -1, -1):
+                child = children[index]
+                child_class = child.__class__
+                if child_class in _NESTED and (
+                    child_class is not tuple
+                    or any(member.__class__ in _NESTED for member in child)
+                ):
+                    push((child, members, index, None))
+                else:
+                    members[index] = child
+        stored = out[0]
+        if _marker(stored) == STORED:
+            return stored[0]
+        return self.store_chunk(stored)
@@ -0,0 +1,355 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Compact representation strings with a symbol table for their repeated strings
+
+A compact representation is the literal [SYMBOLS, [symbol, ...], body]. The body is the
+representation with each summary, class name of a (text, class name) builtin and dict key
+found more than once replaced by its index in the symbol table. These are the slots of the
+body: the first member of each list of two members, the second member of each tuple of two
+members and the keys of dicts. An int or a tuple of one member in a slot is written as a
+tuple of one member, so every int in a slot is a symbol index.
+"""
+import re
+from itertools import islice
+
+from .constants import SYMBOLS
+from .reprindex import _STRING
+from .reprliteral import _literal_steps, parse_literal, ReprSyntaxError
+
+SYMBOLS_PREFIX = f"[{SYMBOLS!r}, ["
+
+# The symbol table at the head of a compact representation and the start of its body
+_HEADER = re.compile(rf"\[{SYMBOLS!r}, (\[(?:{_STRING})?(?:, (?:{_STRING}))*\]), ")
+
+# Work stack operations of the encoder
+_TEXT = 0
+_VALUE = 1
+_SLOT = 2
+_ENTRIES = 3
+_MEMBERS = 4
+
+# Members of a list, tuple or dict queued by one work stack entry, so a wide container is
+# written over several entries
+_EXPAND_CHUNK = 256
+
+# Characters of the body written by _compact_steps for each member it is paused after
+_MEMBER_TEXT = 16
+
+_CONTAINERS = (list, tuple, dict, set)
+
+
+def _count_steps(obj_defn, counts, pause_members):
+    """Generator adding the number of times each string that can be a symbol is found in
+    slots to counts, yielding None after every pause_members containers and every
+    pause_members members of a wide container, never if 0"""
+    countdown = pause_members
+    stack = [obj_defn]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        node = pop()
+        node_class = node.__class__
+        if node_class is list:
+            if len(node) == 2 and node[0].__class__ is str:
+                counts[node[0]] = counts.get(node[0], 0) + 1
+        elif node_class is tuple:
+            if len(node) == 2 and node[0].__class__ is str and node[1].__class__ is str:
+                counts[node[1]] = counts.get(node[1], 0) + 1
+        elif node_class is dict:
+            # The keys of a wide dict are counted by _count_wide
+            if not countdown or len(node) <= pause_members:
+                for key in node:
+                    if key.__class__ is str:
+                        counts[key] = counts.get(key, 0) + 1
+                node = node.values()
+        else:
+            continue
+        if countdown:
+            countdown -= 1
+            if not countdown:
+                yield None
+                countdown = pause_members
+            if len(node) > pause_members:
+                yield from _count_wide(node, counts, push, pause_members)
+                continue
+        for child in node:
+            if child.__class__ in _CONTAINERS:
+                push(child)
+
+
+def _count_wide(node, counts, push, pause_members):
+    """Generator counting the keys and pushing the containers of a wide list, tuple or dict
+    as _count_steps does, yielding None after every pause_members members"""
+    is_dict = node.__class__ is dict
+    members = iter(node.items() if is_dict else node)
+    block = list(islice(members, pause_members))
+    while block:
+        for child in block:
+            if is_dict:
+                key, child = child
+                if key.__class__ is str:
+                    counts[key] = counts.get(key, 0) + 1
+            if child.__class__ in _CONTAINERS:
+                push(child)
+        yield None
+        block = list(islice(members, pause_members))
+
+
+def _leaf_text(item, index):
+    """Return the text of a string or of a [summary, (text, class name)] builtin, or None
+    for the other values, which are pushed on the work stack of _iter_body"""
+    item_class = item.__class__
+    if item_class is str:
+        return repr(item)
+    if item_class is list and len(item) == 2:
+        summary, defn = item
+        if (
+            summary.__class__ is str
+            and defn.__class__ is tuple
+            and len(defn) == 2
+            and defn[0].__class__ is str
+            and defn[1].__class__ is str
+        ):
+            return (
+                f"[{index.get(summary) or repr(summary)}, "
+                f"({defn[0]!r}, {index.get(defn[1]) or repr(defn[1])})]"
+            )
+    return None
+
+
+def _iter_body(obj_defn, index):
+    """Yield the text of the body of a compact representation in chunks
+
+    Additional Information:
+        The members of lists, tuples and dicts are pushed _EXPAND_CHUNK at a time, the
+        entry pushing the rest is queued below them, so the work between two chunks is
+        bounded however wide the containers are.
+    """
+    stack = [(_VALUE, obj_defn)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        mode, item = pop()
+        if mode == _TEXT:
+            yield item
+            continue
+        if mode > _SLOT:
+            if mode == _MEMBERS:
+                item, start = item
+                end = start + _EXPAND_CHUNK
+                if end < len(item):
+                    push((_MEMBERS, (item, end)))
+                for position in range(min(end, len(item)) - 1, start - 1, -1):
+                    push((_VALUE, item[position]))
+                    push((_TEXT, ", "))
+                continue
+            remaining, separator, left = item
+        else:
+            item_class = item.__class__
+            if mode == _SLOT:
+                if item_class is str:
+                    yield index.get(item) or repr(item)
+                    continue
+                if item_class is int or (item_class is tuple and len(item) == 1):
+                    # A value that would read as a symbol index
+                    yield "("
+                    push((_TEXT, ",)"))
+                    push((_VALUE, item))
+                    continue
+            if item_class is list and len(item) == 2 and item[0].__class__ is str:
+                # [summary, definition]
+                yield f"[{index.get(item[0]) or repr(item[0])}, "
+                push((_TEXT, "]"))
+                push((_VALUE, item[1]))
+                continue
+            if (
+                item_class is tuple
+                and len(item) == 2
+                and item[0].__class__ is str
+                and item[1].__class__ is str
+            ):
+                # (text, class name) of a builtin
+                yield f"({item[0]!r}, {index.get(item[1]) or repr(item[1])})"
+                continue
+            if item_class is list or item_class is tuple:
+                size = len(item)
+                if item_class is list:
+                    yield "["
+                    push((_TEXT, "]"))
+                    slot = 0 if size == 2 else -1
+                else:
+                    yield "("
+                    push((_TEXT, ",)" if size == 1 else ")"))
+                    slot = 1 if size == 2 else -1
+                if size > _EXPAND_CHUNK:
+                    # The leading chunk, the rest is queued below it
+                    push((_MEMBERS, (item, _EXPAND_CHUNK)))
+                    size = _EXPAND_CHUNK
+                for position in range(size - 1, -1, -1):
+                    push((_SLOT if position == slot else _VALUE, item[position]))
+                    if position:
+                        push((_TEXT, ", "))
+                continue
+            if item_class is not dict:
+                if item_class is set and any(
+                    member.__class__ is not str for member in item
+                ):
+                    yield "{"
+                    push((_TEXT, "}"))
+                    for position, member in enumerate(item):
+                        if position:
+                            push((_TEXT, ", "))
+                        push((_VALUE, member))
+                else:
+                    yield repr(item)
+                continue
+            yield "{"
+            push((_TEXT, "}"))
+            remaining, separator, left = item.items(), "", len(item)
+        if left > _EXPAND_CHUNK:
+            # The leading chunk, the rest is queued below it
+            remaining = iter(remaining)
+            push((_ENTRIES, (remaining, ", ", left - _EXPAND_CHUNK)))
+            remaining = islice(remaining, _EXPAND_CHUNK)
+        entries = []
+        # Text of the leading entries not pushed yet
+        text = []
+        for cur_key, cur_value in remaining:
+            if cur_key.__class__ is str:
+                text.append(f"{separator}{index.get(cur_key) or repr(cur_key)}: ")
+            else:
+                text.append(separator)
+                entries.append((_TEXT, "".join(text)))
+                text = []
+                entries.append((_SLOT, cur_key))
+                text.append(": ")
+            value_text = _leaf_text(cur_value, index)
+            if value_text is None:
+                entries.append((_TEXT, "".join(text)))
+                text = []
+                entries.append((_VALUE, cur_value))
+            else:
+                text.append(value_text)
+            separator = ", "
+        entries.append((_TEXT, "".join(text)))
+        entries.reverse()
+        stack.extend(entries)
+
+
+def encode_symbols(obj_defn):
+    """Return the compact representation string of a representation definition
+    Args:
+        obj_defn (list): the [summary, definition] list of a representation, as returned by
+                    parse_literal() or decode_binary()
+    Returns:
+        str: [SYMBOLS, [symbol, ...], body] as a literal string
+    Additional Information:
+        Only strings found more than once are put in the symbol table, the most frequent
+        first so they have the shortest indexes. The definition is walked with an explicit
+        stack, so there is no nesting depth limit. decode_symbols() returns a value equal
+        to obj_defn.
+    """
+    steps = _compact_steps(obj_defn, 0)
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+
+def _compact_steps(obj_defn, pause_members):
+    """Generator encoding a definition as encode_symbols() does, returning the string when
+    it stops
+    Args:
+        obj_defn (list): the [summary, definition] list of a representation
+        pause_members (int): yield None after every this many containers or members of
+                    a wide container counted, and every pause_members * _MEMBER_TEXT
+                    characters written, never if 0
+    Additional Information:
+        Lets a caller such as async_build_repr encode a wide definition a slice at a time.
+    """
+    counts = {}
+    yield from _count_steps(obj_defn, counts, pause_members)
+    if pause_members:
+        repeated = []
+        entries = iter(counts.items())
+        block = list(islice(entries, pause_members * _EXPAND_CHUNK))
+        while block:
+            repeated += [text for text, count in block if count > 1]
+            yield None
+            block = list(islice(entries, pause_members * _EXPAND_CHUNK))
+    else:
+        repeated = [text for text, count in counts.items() if count > 1]
+    symbols = sorted(repeated, key=counts.__getitem__, reverse=True)
+    index = {text: str(position) for position, text in enumerate(symbols)}
+    parts = [f"[{SYMBOLS!r}, {symbols!r}, "]
+    body = _iter_body(obj_defn, index)
+    if pause_members:
+        # A chunk can hold many dict entries, so the text is paced by its length
+        pause_text = pause_members * _MEMBER_TEXT
+        written = 0
+        block = []
+        for chunk in body:
+            block.append(chunk)
+            written += len(chunk)
+            if written >= pause_text:
+                parts.append("".join(block))
+                yield None
+                written = 0
+                block = []
+        parts += block
+    else:
+        parts += body
+    parts.append("]")
+    return "".join(parts)
+
+
+def is_compact(text):
+    """Return True if a representation string is a compact representation"""
+    return text.startswith(SYMBOLS_PREFIX)
+
+
+def _symbol_steps(text, pause_tokens):
+    """Generator decoding a compact representation as _literal_steps() parses a literal"""
+    header = _HEADER.match(text)
+    if header is None:
+        raise ReprSyntaxError("Invalid symbol table", text, 0)
+    symbols = parse_literal(header.group(1))
+    end = len(text.rstrip())
+    if not text[:end].endswith("]"):
+        raise ReprSyntaxError("Unclosed '['", text, 0)
+    return (
+        yield from _literal_steps(text[header.end() : end - 1], pause_tokens, symbols)
+    )
+
+
+def decode_symbols(text):
+    """Parse a compact representation string
+    Args:
+        text (str): string returned by encode_symbols() or build_repr(format="compact")
+    Returns:
+        list: the representation, with every symbol index replaced by its string
+    Raises:
+        ReprSyntaxError: if text is not a valid compact representation
+    Additional Information:
+        The indexes are resolved by the tokenizer, which reads the opening of each
+        [summary, definition] list, each (text, class name) builtin and each dict key with
+        its ':' as a single token, so the body has fewer tokens than the text and is parsed
+        faster. Each symbol is a single string object shared by every place it is used.
+    """
+    steps = _symbol_steps(text, 0)
+    try:
+        while True:
+            next(steps)
+    except StopIteration as stop:
+        return stop.value
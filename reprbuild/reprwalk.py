@@ -0,0 +1,771 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Build the recursive representation with an explicit work stack instead of recursive calls
+"""
+from itertools import islice
+from time import perf_counter
+
+from .constants import MAXRECURSION, REFERENCE, REPRATTRIBUTES
+from .reprbase import (
+    _BuildState,
+    _get_repr_plan,
+    _get_summary,
+    _memo_lookup,
+    ReprBuildError,
+)
+from .reprhandlers import _DISPATCH, _resolve_handler, _UNRESOLVED
+
+# Keyword arguments of iter_repr and build_repr_to
+_STREAM_OPTIONS = frozenset(
+    ("attr_list", "depth", "deepdive", "shared_refs", "max_recursion")
+)
+
+# Work stack operations
+_VALUE = 0
+_OBJECT = 1
+_SEQUENCE = 2
+_TEXT = 3
+_LIST_MEMBERS = 4
+_DICT_MEMBERS = 5
+
+# Members of a list, tuple, set or dict queued by one work stack entry, so a wide
+# container is expanded over several entries
+_EXPAND_CHUNK = 256
+
+# Characters buffered by iter_repr before a chunk is yielded
+STREAM_CHUNK_SIZE = 65536
+
+_CONTAINER_TYPES = (list, tuple, set, dict)
+
+# Back reference written by the scanning pass of iter_repr, whose text is discarded
+_SCANNED_REF = ["", ("0", REFERENCE)]
+
+
+class ReprWalker:
+    """Build the [summary, definition] list for an object without recursive calls
+
+    Args:
+        depth (int)          : starting depth, -1 fully expands all attributes
+        deepdive (boolean)   : if True append attributes returned from dir() to the attributes
+        max_recursion (int)  : if not None replace the members of objects nested deeper than
+                               this by the recursion limit message, as build_object_defn does
+                               with MAXRECURSION
+        state (_BuildState)  : shared state for the build, if None repeated objects are not
+                               replaced by back references
+
+    Additional Information:
+        Each entry of the work stack writes its result into target[key] of the definition
+        being assembled. Entries are pushed in reverse order so the graph is visited in the
+        same order as build_object_defn, which keeps the memo and back reference numbering
+        identical between the two engines. The attributes of an object are read when the
+        object is expanded and strings, numbers and None are stored without a stack entry.
+        Containers are expanded _EXPAND_CHUNK members at a time, the entry expanding the
+        rest is queued below the members of each chunk, so run(max_steps) returns after a
+        bounded amount of work however wide the containers are.
+    """
+
+    def __init__(self, depth=-1, deepdive=False, max_recursion=None, state=None):
+        self.depth = depth
+        self.deepdive = deepdive
+        self.max_recursion = max_recursion
+        self.state = state
+        self._stack = []
+        self._root = [None]
+
+    def start(self, source, attr_list=None):
+        """Queue the source object as the root of the representation"""
+        self._root = [None]
+        self._stack = [(_OBJECT, source, attr_list, self.depth, 0, self._root, 0)]
+
+    @property
+    def done(self):
+        """True when the representation is complete"""
+        return not self._stack
+
+    @property
+    def result(self):
+        """The [summary, definition] list built for the root object"""
+        return self._root[0]
+
+    def run(self, max_steps=None, deadline=None):
+        """Process work stack entries
+        Args:
+            max_steps (int): if not None stop after this many entries
+            deadline (float): if not None stop once time.perf_counter() has reached it,
+                              after at least one entry
+        Returns:
+            int: number of entries processed
+        """
+        stack = self._stack
+        value = self._value
+        build_object = self._object
+        steps = 0
+        while stack and (max_steps is None or steps < max_steps):
+            if steps and deadline is not None and perf_counter() >= deadline:
+                break
+            task = stack.pop()
+            operation = task[0]
+            if operation == _VALUE:
+                value(task)
+            elif operation == _OBJECT:
+                build_object(task)
+            elif operation == _LIST_MEMBERS:
+                self._list_chunk(*task[1:])
+            elif operation == _DICT_MEMBERS:
+                self._dict_chunk(*task[1:])
+            else:
+                _, attr_defn, members, container_type = task
+                attr_defn[1] = container_type(members)
+            steps += 1
+        return steps
+
+    def _value(self, task):
+        """Work stack equivalent of build_attribute_defn for an attribute that is not None
+        Args:
+            task (tuple): (_VALUE, attr, depth, recursion, target, key) work stack entry
+        """
+        _, attr, depth, recursion, target, key = task
+        if isinstance(attr, str):
+            target[key] = attr
+            return
+        attr_defn = target[key] = [_get_summary(attr), None]
+        handler = _DISPATCH.get(attr.__class__, _UNRESOLVED)
+        if handler is _UNRESOLVED:
+            handler = _resolve_handler(attr.__class__)
+        if handler is not None:
+            attr_defn[1] = handler[0](attr)
+        elif depth != 0:
+            if hasattr(attr, REPRATTRIBUTES):
+                self._object(
+                    (
+                        _OBJECT,
+                        attr,
+                        getattr(attr, REPRATTRIBUTES),
+                        depth - 1,
+                        recursion + 1,
+                        target,
+                        key,
+                    )
+                )
+            elif isinstance(attr, _CONTAINER_TYPES):
+                ref_defn = _memo_lookup(self.state, attr, attr_defn, depth, "container")
+                if ref_defn is not None:
+                    target[key] = ref_defn
+                elif isinstance(attr, dict):
+                    self._dict_members(attr, attr_defn, depth, recursion)
+                else:
+                    self._list_members(attr, attr_defn, depth, recursion)
+            else:
+                attr_defn[1] = repr(attr)
+
+    def _object(self, task):
+        """Work stack equivalent of build_object_defn
+        Args:
+            task (tuple): (_OBJECT, source, attr_list, depth, recursion, target, key) work
+                          stack entry
+        """
+        _, source, attr_list, depth, recursion, target, key = task
+        plan = _get_repr_plan(source, attr_list, self.deepdive)
+        obj_defn = [_get_summary(source), None]
+        ref_defn = _memo_lookup(
+            self.state,
+            source,
+            obj_defn,
+            depth,
+            "members" if attr_list is None else "object",
+        )
+        if ref_defn is not None:
+            target[key] = ref_defn
+            return
+        target[key] = obj_defn
+
+        if self.max_recursion is not None and recursion > self.max_recursion:
+            obj_defn[1] = f"<Recursion limit of {self.max_recursion} exceeded>"
+            return
+        member_dict = obj_defn[1] = {}
+        tasks = []
+        for cur_member, cur_depth in plan.resolve(source):
+            attr = getattr(source, cur_member, None)
+            if attr is None:
+                continue
+            if isinstance(attr, str):
+                member_dict[cur_member] = attr
+                continue
+            handler = _DISPATCH.get(attr.__class__, _UNRESOLVED)
+            if handler is _UNRESOLVED:
+                handler = _resolve_handler(attr.__class__)
+            if handler is not None:
+                member_dict[cur_member] = [_get_summary(attr), handler[0](attr)]
+            else:
+                member_dict[cur_member] = None
+                tasks.append(
+                    (
+                        _VALUE,
+                        attr,
+                        depth if cur_depth is None else cur_depth,
+                        recursion + 1,
+                        member_dict,
+                        cur_member,
+                    )
+                )
+        tasks.reverse()
+        self._stack.extend(tasks)
+
+    def _list_members(self, attr, attr_defn, depth, recursion):
+        """Queue the members of a list, tuple or set"""
+        members = []
+        if isinstance(attr, tuple):
+            self._stack.append((_SEQUENCE, attr_defn, members, tuple))
+        elif isinstance(attr, set):
+            self._stack.append((_SEQUENCE, attr_defn, members, set))
+        else:
+            attr_defn[1] = members
+        self._list_chunk(iter(attr), members, depth, recursion)
+
+    def _list_chunk(self, remaining, members, depth, recursion):
+        """Queue the next _EXPAND_CHUNK members of a list, tuple or set"""
+        tasks = []
+        count = 0
+        for cur_attr in islice(remaining, _EXPAND_CHUNK):
+            count += 1
+            if cur_attr is None:
+                continue
+            if hasattr(cur_attr, REPRATTRIBUTES):
+                tasks.append(
+                    (
+                        _OBJECT,
+                        cur_attr,
+                        getattr(cur_attr, REPRATTRIBUTES),
+                        depth - 1,
+                        recursion + 1,
+                        members,
+                        len(members),
+                    )
+                )
+                members.append(None)
+            elif isinstance(cur_attr, _CONTAINER_TYPES):
+                tasks.append(
+                    (
+                        _OBJECT,
+                        cur_attr,
+                        None,
+                        depth - 1,
+                        recursion + 1,
+                        members,
+                        len(members),
+                    )
+                )
+                members.append(None)
+            else:
+                members.append(repr(cur_attr))
+        if count == _EXPAND_CHUNK:
+            self._stack.append((_LIST_MEMBERS, remaining, members, depth, recursion))
+        tasks.reverse()
+        self._stack.extend(tasks)
+
+    def _dict_members(self, attr, attr_defn, depth, recursion):
+        """Queue the members of a dict"""
+        members = attr_defn[1] = {}
+        self._dict_chunk(iter(attr.items()), members, depth, recursion)
+
+    def _dict_chunk(self, remaining, members, depth, recursion):
+        """Queue the next _EXPAND_CHUNK members of a dict"""
+        tasks = []
+        count = 0
+        for cur_key, cur_attr in islice(remaining, _EXPAND_CHUNK):
+            count += 1
+            if cur_attr is None:
+                continue
+            if hasattr(cur_attr, REPRATTRIBUTES):
+                members[cur_key] = None
+                tasks.append(
+                    (
+                        _OBJECT,
+                        cur_attr,
+                        getattr(cur_attr, REPRATTRIBUTES),
+                        depth - 1,
+                        recursion + 1,
+                        members,
+                        cur_key,
+                    )
+                )
+            elif isinstance(cur_attr, _CONTAINER_TYPES):
+                members[cur_key] = None
+                tasks.append(
+                    (
+                        _VALUE,
+                        cur_attr,
+                        depth - 1,
+                        recursion + 1,
+                        members,
+                        cur_key,
+                    )
+                )
+            else:
+                members[cur_key] = repr(cur_attr)
+        if count == _EXPAND_CHUNK:
+            self._stack.append((_DICT_MEMBERS, remaining, members, depth, recursion))
+        tasks.reverse()
+        self._stack.extend(tasks)
+
+
+def build_object_defn_iterative(
+    source,
+    attr_list=None,
+    depth=-1,
+    deepdive=False,
+    *,
+    max_recursion=None,
+    state=None,
+):
+    """Create a list with the summary string and representation for the object using a work stack
+    Args:
+        source (Unknown)    : Object to be built into a dictionary
+        attr_list  (list)   : List of the object's attributes to include
+        depth (int)         : if == 0 : return object summary only as string
+                              if != 1 : return list[ object summary, dict{ attribute :,repr to depth -1]
+                                       a starting depth -1 will fully expand all attributes
+        deepdive (boolean)  : if True append attributes returned from dir() to list
+        max_recursion (int) : number of levels of recursion allowable, by default the
+                              nesting depth is unlimited when back references are enabled
+                              and MAXRECURSION when they are not
+        state (_BuildState) : shared state for the build, if None repeated objects are not
+                              replaced by back references
+    Returns:
+        list: summary of source object in element [0]
+              object definition in element[1]
+    Raises:
+        ReprBuildError: if a valid list of attributes is not found
+    Additional Information:
+        The result is identical to build_object_defn for any object graph build_object_defn
+        can represent within MAXRECURSION, without a limit on the nesting depth.
+    """
+    if max_recursion is None and state is None:
+        # Without the memo cycles are only cut by the recursion limit
+        max_recursion = MAXRECURSION
+    walker = ReprWalker(depth, deepdive, max_recursion, state)
+    walker.start(source, attr_list)
+    walker.run()
+    return walker.result
+
+
+def iter_defn_repr(obj_defn):
+    """Yield the repr() of a representation definition in chunks without recursive calls
+    Args:
+        obj_defn (list): [summary, definition] list built by build_object_defn
+    Returns:
+        generator: str chunks which join to repr(obj_defn)
+    Additional Information:
+        Sets hold only the repr strings of their members so they are passed to repr() whole.
+        The members of lists, tuples and dicts are queued _EXPAND_CHUNK at a time, so the
+        work between two chunks is bounded however wide the containers are.
+    """
+    stack = [(_VALUE, obj_defn)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        operation, item = pop()
+        if operation == _TEXT:
+            yield item
+            continue
+        if operation == _LIST_MEMBERS:
+            item, start = item
+            end = start + _EXPAND_CHUNK
+            if end < len(item):
+                push((_LIST_MEMBERS, (item, end)))
+            for index in range(min(end, len(item)) - 1, start - 1, -1):
+                push((_VALUE, item[index]))
+                if index:
+                    push((_TEXT, ", "))
+            continue
+        if operation == _DICT_MEMBERS:
+            remaining, separator = item
+            entries = list(islice(remaining, _EXPAND_CHUNK))
+            if len(entries) == _EXPAND_CHUNK:
+                push((_DICT_MEMBERS, (remaining, ", ")))
+            for index in range(len(entries) - 1, -1, -1):
+                cur_key, cur_value = entries[index]
+                push((_VALUE, cur_value))
+                push((_TEXT, f"{separator if index == 0 else ', '}{cur_key!r}: "))
+            continue
+        item_type = type(item)
+        if item_type is list:
+            yield "["
+            push((_TEXT, "]"))
+            push((_LIST_MEMBERS, (item, 0)))
+        elif item_type is tuple:
+            yield "("
+            push((_TEXT, ",)" if len(item) == 1 else ")"))
+            push((_LIST_MEMBERS, (item, 0)))
+        elif item_type is dict:
+            yield "{"
+            push((_TEXT, "}"))
+            push((_DICT_MEMBERS, (iter(item.items()), "")))
+        else:
+            yield repr(item)
+
+
+def defn_text(obj_defn):
+    """Return repr(obj_defn), written with iter_defn_repr if it is too deep for repr()"""
+    try:
+        return repr(obj_defn)
+    except RecursionError:
+        return "".join(iter_defn_repr(obj_defn))
+
+
+class _ScanState(_BuildState):
+    """Build state for the scanning pass of a stream, numbering the shared objects
+
+    Additional Information:
+        The memo only holds each object, so its id can not be reused during the scan, and
+        refs the reference number of every object found a second time, in the order the
+        build gives them out. No definition is kept.
+    """
+
+    __slots__ = ("refs",)
+
+    def __init__(self):
+        super().__init__()
+        self.refs = {}
+
+    def lookup(self, source, obj_defn, memo_key):
+        if memo_key in self.memo:
+            if memo_key not in self.refs:
+                self.next_ref += 1
+                self.refs[memo_key] = self.next_ref
+            return _SCANNED_REF
+        if not isinstance(source, _CONTAINER_TYPES) or len(source) > 0:
+            self.memo[memo_key] = source
+        return None
+
+
+class _StreamState(_BuildState):
+    """Build state for the emitting pass of a stream with the back references already known
+
+    Args:
+        refs (dict): memo key to reference number for every object found to be shared by
+                     the scanning pass
+
+    Additional Information:
+        A streamed definition can not be tagged once it has been written, so the first
+        occurrence of a shared object is tagged as soon as it is registered.
+    """
+
+    __slots__ = ("refs",)
+
+    def __init__(self, refs):
+        super().__init__()
+        self.refs = refs
+        self.next_ref = len(refs)
+
+    def lookup(self, source, obj_defn, memo_key):
+        entry = self.memo.get(memo_key)
+        if entry is not None:
+            return self.reference(entry)
+        ref = self.refs.get(memo_key)
+        if ref is not None:
+            obj_defn[0] = f"{obj_defn[0]},ref: {ref}"
+            self.memo[memo_key] = [source, obj_defn, ref, None]
+        return None
+
+
+class ReprStreamer:
+    """Emit the text of a representation while walking the object graph
+
+    Args:
+        depth (int)          : starting depth, -1 fully expands all attributes
+        deepdive (boolean)   : if True append attributes returned from dir() to the attributes
+        max_recursion (int)  : if not None the number of levels of recursion allowable
+        state (_BuildState)  : shared state for the build, if None repeated objects are not
+                               replaced by back references
+
+    Additional Information:
+        The work stack holds the closing text and the pending members of each container
+        being written, so memory is bounded by the depth of the graph and the width of its
+        containers rather than the size of the output. Sets are built whole, as repr() of
+        a set does not preserve the order of its members.
+    """
+
+    def __init__(self, depth=-1, deepdive=False, max_recursion=None, state=None):
+        self.depth = depth
+        self.deepdive = deepdive
+        self.max_recursion = max_recursion
+        self.state = state
+        self._stack = []
+
+    def iter_text(self, source, attr_list=None):
+        """Yield the text of the representation of source in order
+        Args:
+            source (Unknown)  : Object to be represented
+            attr_list (list)  : List of the object's attributes to include
+        Returns:
+            generator: str pieces which join to the representation
+        """
+        stack = self._stack = [(_OBJECT, source, attr_list, self.depth, 0)]
+        value = self._value
+        build_object = self._object
+        while stack:
+            task = stack.pop()
+            operation = task[0]
+            if operation == _TEXT:
+                yield task[1]
+            elif operation == _VALUE:
+                value(*task[1:])
+            else:
+                build_object(*task[1:])
+
+    def _push(self, entries):
+        """Push a list of text and tasks so they are processed in order"""
+        entries.reverse()
+        self._stack.extend(entries)
+
+    def _object(self, source, attr_list, depth, recursion):
+        plan = _get_repr_plan(source, attr_list, self.deepdive)
+        obj_defn = [_get_summary(source), None]
+        ref_defn = _memo_lookup(
+            self.state,
+            source,
+            obj_defn,
+            depth,
+            "members" if attr_list is None else "object",
+        )
+        if ref_defn is not None:
+            self._stack.append((_TEXT, repr(ref_defn)))
+            return
+        if self.max_recursion is not None and recursion > self.max_recursion:
+            obj_defn[1] = f"<Recursion limit of {self.max_recursion} exceeded>"
+            self._stack.append((_TEXT, repr(obj_defn)))
+            return
+
+        entries = []
+        text = f"[{obj_defn[0]!r}, {{"
+        separator = ""
+        for cur_member, cur_depth in plan.resolve(source):
+            attr = getattr(source, cur_member, None)
+            if attr is None:
+                continue
+            text += f"{separator}{cur_member!r}: "
+            separator = ", "
+            if isinstance(attr, str):
+                text += repr(attr)
+                continue
+            handler = _DISPATCH.get(attr.__class__, _UNRESOLVED)
+            if handler is _UNRESOLVED:
+                handler = _resolve_handler(attr.__class__)
+            if handler is not None:
+                text += repr([_get_summary(attr), handler[0](attr)])
+            else:
+                entries.append((_TEXT, text))
+                text = ""
+                entries.append(
+                    (
+                        _VALUE,
+                        attr,
+                        depth if cur_depth is None else cur_depth,
+                        recursion + 1,
+                    )
+                )
+        entries.append((_TEXT, text + "}]"))
+        self._push(entries)
+
+    def _value(self, attr, depth, recursion):
+        if isinstance(attr, str):
+            self._stack.append((_TEXT, repr(attr)))
+            return
+        attr_defn = [_get_summary(attr), None]
+        handler = _DISPATCH.get(attr.__class__, _UNRESOLVED)
+        if handler is _UNRESOLVED:
+            handler = _resolve_handler(attr.__class__)
+        if handler is not None:
+            attr_defn[1] = handler[0](attr)
+        elif depth != 0:
+            if hasattr(attr, REPRATTRIBUTES):
+                self._object(
+                    attr, getattr(attr, REPRATTRIBUTES), depth - 1, recursion + 1
+                )
+                return
+            elif isinstance(attr, _CONTAINER_TYPES):
+                ref_defn = _memo_lookup(self.state, attr, attr_defn, depth, "container")
+                if ref_defn is not None:
+                    attr_defn = ref_defn
+                elif isinstance(attr, set):
+                    walker = ReprWalker(
+                        self.depth, self.deepdive, self.max_recursion, self.state
+                    )
+                    walker._list_members(attr, attr_defn, depth, recursion)
+                    walker.run()
+                elif isinstance(attr, dict):
+                    self._dict_members(attr, attr_defn, depth, recursion)
+                    return
+                else:
+                    self._list_members(attr, attr_defn, depth, recursion)
+                    return
+            else:
+                attr_defn[1] = repr(attr)
+        self._stack.append((_TEXT, "".join(iter_defn_repr(attr_defn))))
+
+    def _list_members(self, attr, attr_defn, depth, recursion):
+        """Queue the text and members of a list or tuple"""
+        is_tuple = isinstance(attr, tuple)
+        entries = []
+        text = f"[{attr_defn[0]!r}, {'(' if is_tuple else '['}"
+        count = 0
+        for cur_attr in attr:
+            if cur_attr is None:
+                continue
+            if count:
+                text += ", "
+            count += 1
+            if hasattr(cur_attr, REPRATTRIBUTES):
+                entries.append((_TEXT, text))
+                text = ""
+                entries.append(
+                    (
+                        _OBJECT,
+                        cur_attr,
+                        getattr(cur_attr, REPRATTRIBUTES),
+                        depth - 1,
+                        recursion + 1,
+                    )
+                )
+            elif isinstance(cur_attr, _CONTAINER_TYPES):
+                entries.append((_TEXT, text))
+                text = ""
+                entries.append((_OBJECT, cur_attr, None, depth - 1, recursion + 1))
+            else:
+                text += repr(repr(cur_attr))
+        if not is_tuple:
+            text += "]]"
+        elif count == 1:
+            text += ",)]"
+        else:
+            text += ")]"
+        entries.append((_TEXT, text))
+        self._push(entries)
+
+    def _dict_members(self, attr, attr_defn, depth, recursion):
+        """Queue the text and members of a dict"""
+        entries = []
+        text = f"[{attr_defn[0]!r}, {{"
+        separator = ""
+        for cur_key, cur_attr in attr.items():
+            if cur_attr is None:
+                continue
+            text += f"{separator}{cur_key!r}: "
+            separator = ", "
+            if hasattr(cur_attr, REPRATTRIBUTES):
+                entries.append((_TEXT, text))
+                text = ""
+                entries.append(
+                    (
+                        _OBJECT,
+                        cur_attr,
+                        getattr(cur_attr, REPRATTRIBUTES),
+                        depth - 1,
+                        recursion + 1,
+                    )
+                )
+            elif isinstance(cur_attr, _CONTAINER_TYPES):
+                entries.append((_TEXT, text))
+                text = ""
+                entries.append((_VALUE, cur_attr, depth - 1, recursion + 1))
+            else:
+                text += repr(repr(cur_attr))
+        entries.append((_TEXT, text + "}]"))
+        self._push(entries)
+
+
+def iter_repr(source, chunk_size=STREAM_CHUNK_SIZE, **kwargs):
+    """Yield the recursive representation of the source object as it is built
+    Args:
+        source (Type)     : Object to be represented
+        chunk_size (int)  : approximate number of characters in each chunk yielded
+        **kwargs (params) :
+            attr_list  (list)   : List of the object's attributes to include
+            depth (int)         : if == 0 : return representation without recursion
+                                  if != 1 : recursively build representations for included attributes
+            deepdive (boolean)  : if True append attributes returned from dir() to the representation
+            shared_refs (boolean) : if True (default) an object reached more than once is built
+                                  the first time and replaced by a back reference after that
+            max_recursion (int) : limit on the nesting depth, MAXRECURSION by default as
+                                  for build_repr, None for no limit
+    Returns:
+        generator: str chunks which join to build_repr(source, **kwargs)
+    Raises:
+        ReprBuildError: if an option is not one of the above, when called, or if a valid
+                        list of attributes is not found, while iterating
+    Additional Information:
+        The first occurrence of a shared object is written before the second one is found,
+        so with shared_refs the object graph is walked once without output to number the
+        back references before the text is produced. That pass holds every object and
+        container in its memo until it ends, so memory is only bounded by the depth and
+        width of the graph with shared_refs=False.
+    """
+    unknown = sorted(set(kwargs).difference(_STREAM_OPTIONS))
+    if unknown:
+        raise ReprBuildError(f"Unknown iter_repr options {', '.join(unknown)}")
+    return _iter_chunks(source, chunk_size, **kwargs)
+
+
+def _iter_chunks(
+    source,
+    chunk_size,
+    *,
+    attr_list=None,
+    depth=-1,
+    deepdive=False,
+    shared_refs=True,
+    max_recursion=MAXRECURSION,
+):
+    """Yield the chunks of iter_repr() once its options are checked"""
+    state = None
+    if shared_refs:
+        scan_state = _ScanState()
+        for _ in ReprStreamer(depth, deepdive, max_recursion, scan_state).iter_text(
+            source, attr_list
+        ):
+            pass
+        state = _StreamState(scan_state.refs)
+        del scan_state
+
+    streamer = ReprStreamer(depth, deepdive, max_recursion, state)
+    buffer = []
+    buffered = 0
+    for text in streamer.iter_text(source, attr_list):
+        buffer.append(text)
+        buffered += len(text)
+        if buffered >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def build_repr_to(stream, source, **kwargs):
+    """Write the recursive representation of the source object to a file-like object
+    Args:
+        stream (TextIO)   : Object with a write(str) method such as an open text file
+        source (Type)     : Object to be represented
+        **kwargs (params) : Options for iter_repr
+    Returns:
+        int: number of characters written
+    Raises:
+        ReprBuildError: if an option is not one of those of iter_repr or a valid list of
+                        attributes is not found
+    """
+    written = 0
+    for text in iter_repr(source, **kwargs):
+        stream.write(text)
+        written += len(text)
+    return written
@@ -0,0 +1,124 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Objects shared by the tests
+"""
+from reprbuild import build_repr, ReprCached, ReprParser
+
+
+class Node:
+    """Object holding any attributes, all of them listed in _repr_attrs
+
+    Args:
+        name (str): name of the object, the first attribute of the representation
+        **attrs (params): the other attributes, in representation order
+    """
+
+    __class_name__ = "Node"
+
+    def __init__(self, name=None, **attrs):
+        self._repr_attrs = ["name", *attrs]
+        self.name = name
+        for attr_name, value in attrs.items():
+            setattr(self, attr_name, value)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return False
+        return self._repr_attrs == other._repr_attrs and all(
+            getattr(self, attr_name) == getattr(other, attr_name)
+            for attr_name in self._repr_attrs
+        )
+
+    __hash__ = object.__hash__
+
+    @classmethod
+    def rebuild(cls, obj_repr):
+        """Return an instance with every attribute of the representation rebuilt"""
+        parser = ReprParser(obj_repr, rebuilders=REBUILDERS)
+        new_obj = cls(parser.name or None)
+        for attr_name in parser.obj_defn:
+            if attr_name == "name":
+                continue
+            new_obj._repr_attrs.append(attr_name)
+            value = parser.obj_defn[attr_name]
+            if not isinstance(value, str):
+                # Strings are stored as themselves rather than as a representation
+                value = parser.rebuild(attr_name)
+            setattr(new_obj, attr_name, value)
+        return new_obj
+
+
+class Leaf(Node):
+    """Node without children"""
+
+    __class_name__ = "Leaf"
+
+
+class CachedNode(ReprCached, Node):
+    """Node caching its member definitions"""
+
+    __class_name__ = "CachedNode"
+
+
+REBUILDERS = [Node, Leaf, CachedNode]
+
+
+def make_tree(width=3, depth=3, prefix="n"):
+    """Return a tree of Nodes with width children at each of depth levels, and Leaf values"""
+    if depth == 0:
+        return Leaf(f"{prefix}", value=len(prefix), score=len(prefix) / 7, tag=prefix)
+    return Node(
+        prefix,
+        count=width,
+        ratio=depth / 3,
+        flags=(depth % 2 == 0, "x"),
+        kids=[
+            make_tree(width, depth - 1, f"{prefix}{index}") for index in range(width)
+        ],
+        lookup={"first": prefix, "depth": depth},
+    )
+
+
+def make_cached_tree(width=3, depth=2, prefix="c"):
+    """Return a tree of CachedNodes with width children at each of depth levels"""
+    if depth == 0:
+        return CachedNode(prefix, value=len(prefix))
+    return CachedNode(
+        prefix,
+        value=depth,
+        kids=[
+            make_cached_tree(width, depth - 1, f"{prefix}{index}")
+            for index in range(width)
+        ],
+    )
+
+
+def make_shared():
+    """Return a graph holding one object several times and a cycle"""
+    shared = Leaf("shared", value=1)
+    left = Node("left", item=shared, items=[shared, shared])
+    right = Node("right", item=shared, other=left)
+    root = Node("root", left=left, right=right, pair=(left, right))
+    left.back = root
+    left._repr_attrs.append("back")
+    return root
+
+
+def sample_graphs():
+    """Return the graphs most tests run on, a tree and a graph with repeats and a cycle"""
+    return make_tree(), make_shared()
+
+
+def build(obj, **kwargs):
+    """Return build_repr of obj with its own attributes listed in representation order"""
+    return build_repr(obj, attr_list=obj._repr_attrs, **kwargs)
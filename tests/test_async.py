@@ -0,0 +1,184 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of async_build_repr and async_format_repr
+"""
+
+import asyncio
+import gc
+import unittest
+from time import perf_counter
+
+from reprbuild import (
+    async_build_repr,
+    async_format_repr,
+    format_repr,
+    ReprBuildError,
+)
+from reprbuild.reprbase import _BuildState
+from reprbuild.reprwalk import _EXPAND_CHUNK, ReprWalker
+from .objects import build, make_tree, sample_graphs, Leaf, Node
+
+
+class TestAsync(unittest.TestCase):
+    """The cooperative builds give the result of the blocking ones"""
+
+    def test_build_equivalence(self):
+        for root in sample_graphs():
+            for kwargs in ({}, {"engine": "iterative"}, {"format": "compact"}):
+                with self.subTest(root=root.name, **kwargs):
+                    self.assertEqual(
+                        asyncio.run(
+                            async_build_repr(
+                                root,
+                                attr_list=root._repr_attrs,
+                                yield_every=7,
+                                **kwargs,
+                            )
+                        ),
+                        build(root, **kwargs),
+                    )
+
+    def test_offload(self):
+        tree = make_tree()
+        self.assertEqual(
+            asyncio.run(
+                async_build_repr(
+                    tree, offload=True, attr_list=tree._repr_attrs, max_items=10
+                )
+            ),
+            build(tree, max_items=10),
+        )
+        with self.assertRaises(ReprBuildError):
+            asyncio.run(async_build_repr(tree, max_items=10))
+
+    def test_format(self):
+        tree = make_tree()
+        text = build(tree)
+        self.assertEqual(
+            asyncio.run(async_format_repr(text, yield_every=5)), format_repr(text)
+        )
+
+    def test_other_tasks_run(self):
+        root = Node("root", items=[Node(f"n{index}") for index in range(2000)])
+        ticks = []
+
+        async def ticker():
+            while True:
+                ticks.append(None)
+                await asyncio.sleep(0)
+
+        async def build_with_ticker():
+            task = asyncio.create_task(ticker())
+            await asyncio.sleep(0)
+            text = await async_build_repr(
+                root, attr_list=root._repr_attrs, yield_every=50
+            )
+            task.cancel()
+            return text
+
+        self.assertEqual(asyncio.run(build_with_ticker()), build(root))
+        self.assertGreater(len(ticks), 20)
+
+    def test_wide_containers_paced(self):
+        size = 20 * _EXPAND_CHUNK
+        root = Node(
+            "root",
+            numbers=list(range(size)),
+            leaves=tuple(Leaf(f"l{index}") for index in range(3)),
+            table={index: str(index) for index in range(size)},
+        )
+        walker = ReprWalker(state=_BuildState())
+        walker.start(root, root._repr_attrs)
+        steps = 0
+        while not walker.done:
+            # Each step expands at most one chunk of a container
+            steps += walker.run(1)
+        self.assertGreaterEqual(steps, 2 * 20)
+        self.assertEqual(repr(walker.result), build(root))
+
+    def test_loop_not_blocked(self):
+        # A wide object, each format is built and encoded a slice at a time
+        size = 100000
+        root = Node(
+            "root",
+            numbers=list(range(size)),
+            table={f"k{index}": index for index in range(size // 2)},
+            leaves=[Leaf(f"l{index}") for index in range(size // 20)],
+        )
+
+        # Collector pauses are not the build's
+        gc.disable()
+        try:
+            for kwargs in ({}, {"format": "compact"}, {"format": "binary"}):
+                with self.subTest(**kwargs):
+                    result, gap = asyncio.run(
+                        _max_gap(
+                            async_build_repr(
+                                root,
+                                attr_list=root._repr_attrs,
+                                yield_interval=0.001,
+                                **kwargs,
+                            )
+                        )
+                    )
+                    self.assertEqual(result, build(root, **kwargs))
+                    self.assertLess(gap, 0.02)
+        finally:
+            gc.enable()
+
+    def test_format_loop_not_blocked(self):
+        # Wide members are decoded, closed and formatted a slice at a time
+        size = 50000
+        root = Node(
+            "root",
+            numbers=list(range(size)),
+            table={f"k{index}": index for index in range(size)},
+            tags={f"t{index}" for index in range(size)},
+        )
+        gc.disable()
+        try:
+            for kwargs in ({}, {"format": "compact"}, {"format": "binary"}):
+                with self.subTest(**kwargs):
+                    obj_repr = build(root, **kwargs)
+                    result, gap = asyncio.run(
+                        _max_gap(async_format_repr(obj_repr, yield_interval=0.001))
+                    )
+                    self.assertEqual(result, format_repr(obj_repr))
+                    self.assertLess(gap, 0.02)
+        finally:
+            gc.enable()
+
+
+async def _max_gap(awaitable):
+    """Return the result of awaitable and the longest time the loop was held meanwhile"""
+    gaps = [0.0]
+
+    async def ticker():
+        last = perf_counter()
+        while True:
+            await asyncio.sleep(0)
+            now = perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    result = await awaitable
+    # The ticker records the gap of the last slice
+    await asyncio.sleep(0)
+    task.cancel()
+    return result, max(gaps)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the binary encoding
+"""
+import unittest
+
+from reprbuild import (
+    decode_binary,
+    encode_binary,
+    parse_literal,
+    ReprBuildError,
+    ReprParser,
+)
+from reprbuild.reprbinary import write_binary
+from .objects import (
+    build,
+    make_cached_tree,
+    make_shared,
+    make_tree,
+    sample_graphs,
+    Leaf,
+    Node,
+    REBUILDERS,
+)
+
+
+class TestBinary(unittest.TestCase):
+    """encode_binary and decode_binary round trip the parsed representation"""
+
+    def test_round_trip(self):
+        for root in sample_graphs():
+            text = build(root)
+            data = build(root, format="binary")
+            self.assertIsInstance(data, bytes)
+            self.assertEqual(decode_binary(data), parse_literal(text))
+            self.assertEqual(encode_binary(parse_literal(text)), data)
+
+    def test_iterative_engine(self):
+        root = make_shared()
+        self.assertEqual(
+            build(root, format="binary"),
+            build(root, format="binary", engine="iterative"),
+        )
+
+    def test_parser(self):
+        tree = make_tree()
+        data = build(tree, format="binary")
+        parser = ReprParser(data, rebuilders=REBUILDERS)
+        self.assertEqual(parser.get_int("count"), 3)
+        self.assertEqual(parser.rebuild(engine="tree", rebuild_members=True), tree)
+
+    def test_values(self):
+        obj_defn = [
+            "class: Values",
+            {
+                "big": ["class: int", (str(2**80), "int")],
+                "neg": ["class: float", ("-0.5", "float")],
+                "inf": ["class: float", ("inf", "float")],
+                "cplx": ["class: complex", ("(1+2j)", "complex")],
+                "text": "caf\xe9",
+                "raw": b"\x00\xff",
+                "flags": [True, False, None],
+                "members": {"1", "2"},
+            },
+        ]
+        self.assertEqual(decode_binary(encode_binary(obj_defn)), obj_defn)
+
+    def test_two_member_tuples(self):
+        # Only (text, class name) tuples of strings can be packed builtins
+        root = Node("root", pair=(1, Leaf("leaf", value=2)), other=("int", [1]))
+        text = build(root)
+        data = build(root, format="binary")
+        self.assertEqual(decode_binary(data), parse_literal(text))
+        for obj_defn in (
+            ["x", ("a", {})],
+            ["class: int", (["1"], "int")],
+            ["class: int", ("1", ["int"])],
+            ["class: float", ({}, "float")],
+        ):
+            with self.subTest(obj_defn=obj_defn):
+                self.assertEqual(decode_binary(encode_binary(obj_defn)), obj_defn)
+
+    def test_written_during_walk(self):
+        # The bytes written during the walk are those of the built definition
+        roots = [
+            *sample_graphs(),
+            Node("numbers", ints=list(range(300)), floats=[0.5, -0.0, 1e300, 2**70]),
+            Node("nan", value=float("nan"), neg=-float("nan"), big=2**64, small=-0.0),
+            Node("repeats", texts=["a", "b", "a"], again=["a", "1", 1]),
+        ]
+        cases = [
+            (root, options)
+            for root in roots
+            for options in ({}, {"shared_refs": False, "depth": 3})
+        ]
+        cases.append((roots[0], {"depth": 2}))
+        for root, options in cases:
+            with self.subTest(root=root.name, options=options):
+                data = write_binary(root, root._repr_attrs, **options)
+                self.assertIsNotNone(data)
+                text = build(root, **options)
+                self.assertEqual(data, encode_binary(parse_literal(text)))
+                self.assertEqual(build(root, format="binary", **options), data)
+
+    def test_written_from_definition(self):
+        # Graphs the writer leaves to the built definition give the same bytes
+        leaf = Leaf("a")
+        for root in (
+            Node("root", text="class: Leaf,name: a", first=leaf, second=leaf),
+            make_cached_tree(),
+        ):
+            with self.subTest(root=root.name):
+                self.assertIsNone(write_binary(root, root._repr_attrs))
+                self.assertEqual(
+                    build(root, format="binary"),
+                    encode_binary(parse_literal(build(root))),
+                )
+
+    def test_invalid(self):
+        with self.assertRaises(ReprBuildError):
+            decode_binary(b"not binary")
+        data = encode_binary(["class: A", {"a": "b"}])
+        with self.assertRaises(ReprBuildError):
+            decode_binary(data[:-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the item, size and time budgets of build_repr
+"""
+import time
+import unittest
+
+import numpy as np
+
+from reprbuild import build_repr, parse_literal, ReprBuildError
+from reprbuild.constants import ELIDED
+from .objects import build, make_tree, sample_graphs, Leaf, Node
+
+
+def _elided(obj_defn):
+    """Return the number of members left out of a parsed representation"""
+    count = 0
+    stack = [obj_defn]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, (list, tuple)):
+            if (
+                len(node) == 2
+                and node[1].__class__ is tuple
+                and node[1][1:] == (ELIDED,)
+            ):
+                count += int(node[1][0])
+            else:
+                stack.extend(node)
+    return count
+
+
+class TestBudget(unittest.TestCase):
+    """A budgeted build stops early and counts the members it left out"""
+
+    def test_unbounded(self):
+        tree = make_tree()
+        self.assertEqual(
+            build(tree, max_items=10**6),
+            build(tree),
+        )
+
+    def test_max_items(self):
+        root = Node("root", big=list(range(1000)), after=1)
+        obj_defn = parse_literal(build(root, max_items=20))
+        members = obj_defn[1]["big"][1]
+        self.assertLessEqual(len(members), 20)
+        self.assertEqual(
+            members[-1], ["class: ...", (str(1000 - len(members) + 1), ELIDED)]
+        )
+        self.assertEqual(obj_defn[1]["..."], ["class: ...", ("1", ELIDED)])
+
+    def test_marker_in_set_and_dict(self):
+        root = Node("root", items=set(range(100)), table={i: i for i in range(100)})
+        obj_defn = parse_literal(build(root, max_items=10))
+        self.assertGreater(_elided(obj_defn), 0)
+        root = Node("root", table={i: i for i in range(100)})
+        obj_defn = parse_literal(build(root, max_items=10))
+        self.assertIn("...", obj_defn[1]["table"][1])
+
+    def test_max_bytes_holds(self):
+        roots = [
+            *sample_graphs(),
+            Node(
+                "mixed",
+                text="x" * 5000,
+                array=np.arange(1000.0),
+                members={1, 2, 3},
+                table={"a": [1, 2, "q'\"z"], "b": Leaf("b", value=2)},
+            ),
+        ]
+        for root in roots:
+            full = len(build(root))
+            for max_bytes in [*range(100, 1000, 23), 5050, 8000, full - 1, full]:
+                with self.subTest(root=root.name, max_bytes=max_bytes):
+                    text = build(root, max_bytes=max_bytes)
+                    self.assertLessEqual(len(text), max_bytes)
+                    parse_literal(text)
+            self.assertEqual(
+                build(root, max_bytes=2 * full),
+                build(root),
+            )
+
+    def test_large_leaves_not_built(self):
+        holder = Node("holder", array=np.zeros(10**7), text="x" * 10**7)
+        for kwargs in (
+            {"max_items": 1, "max_bytes": 10, "max_time": 0.001},
+            {"max_bytes": 10**5},
+        ):
+            with self.subTest(**kwargs):
+                started = time.perf_counter()
+                text = build(holder, **kwargs)
+                self.assertLess(time.perf_counter() - started, 0.05)
+                self.assertLess(len(text), 200)
+                self.assertGreater(_elided(parse_literal(text)), 0)
+
+    def test_invalid_limits(self):
+        tree = make_tree()
+        for kwargs in (
+            {"max_items": 0},
+            {"max_bytes": -1},
+            {"max_time": "1"},
+            {"max_items": True},
+            {"max_items": 10, "engine": "iterative"},
+            {"max_items": 10, "shared_refs": False},
+        ):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ReprBuildError):
+                    build_repr(tree, **kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
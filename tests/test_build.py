@@ -0,0 +1,109 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of build_repr and the attribute plan cache
+"""
+import unittest
+
+from reprbuild import (
+    build_repr,
+    clear_plan_cache,
+    parse_literal,
+    split_repr,
+    ReprBuildError,
+    ReprParser,
+)
+from reprbuild.reprbase import _PLAN_CACHE
+from .objects import build, make_tree, Leaf, Node, REBUILDERS
+
+
+class TestBuildRepr(unittest.TestCase):
+    """build_repr output and rebuilding from it"""
+
+    def test_round_trip(self):
+        tree = make_tree()
+        text = build(tree)
+        self.assertEqual(parse_literal(text), eval(text))  # pylint: disable=eval-used
+        rebuilt = ReprParser(text, rebuilders=REBUILDERS).rebuild(
+            engine="tree", rebuild_members=True
+        )
+        self.assertEqual(rebuilt, tree)
+        self.assertEqual(build(rebuilt), text)
+
+    def test_summary(self):
+        summary, obj_defn = split_repr(build(Leaf("a", value=1)))
+        self.assertEqual(summary["class"], "Leaf")
+        self.assertEqual(summary["name"], "a")
+        self.assertFalse(summary["is_builtin"])
+        self.assertEqual(obj_defn["value"], ["class: int", ("1", "int")])
+
+    def test_depth(self):
+        tree = make_tree(2, 2)
+        obj_defn = parse_literal(build(tree, depth=1))
+        kids = obj_defn[1]["kids"]
+        self.assertEqual(kids[0], "class: list")
+        self.assertEqual([kid[1]["name"] for kid in kids[1]], ["n0", "n1"])
+        # Containers of the last level built are summaries only
+        self.assertEqual(kids[1][0][1]["kids"], ["class: list", None])
+
+    def test_unknown_options(self):
+        with self.assertRaises(ReprBuildError):
+            build(make_tree(), engine="unknown")
+        with self.assertRaises(ReprBuildError):
+            build(make_tree(), format="unknown")
+
+    def test_module_exports(self):
+        # pylint: disable=import-outside-toplevel
+        from reprbuild.reprbuild import build_attribute_defn, build_object_defn
+
+        leaf = Leaf("a", value=1)
+        self.assertEqual(
+            build_object_defn(leaf, leaf._repr_attrs), parse_literal(build(leaf))
+        )
+        self.assertEqual(
+            build_attribute_defn(leaf, "value"), ["class: int", ("1", "int")]
+        )
+
+
+class TestPlanCache(unittest.TestCase):
+    """Attribute plans are cached per class and refreshed when the class changes"""
+
+    def test_plan_reused(self):
+        clear_plan_cache()
+        build(make_tree())
+        self.assertIn(Node, _PLAN_CACHE)
+        plans = dict(_PLAN_CACHE[Node])
+        build(make_tree())
+        self.assertEqual(_PLAN_CACHE[Node], plans)
+
+    def test_class_change_refreshes_deepdive(self):
+        class Config:
+            """Class whose class level attributes are added by deepdive"""
+
+            limit = 1
+
+            def __init__(self):
+                self._repr_attrs = ["name"]
+                self.name = "config"
+
+        config = Config()
+        self.assertNotIn("extra", build_repr(config, deepdive=True))
+        Config.extra = 2
+        self.assertIn("'extra'", build_repr(config, deepdive=True))
+        del Config.extra
+        self.assertNotIn("extra", build_repr(config, deepdive=True))
+        clear_plan_cache()
+        self.assertEqual(_PLAN_CACHE, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the definitions cached for ReprCached objects
+"""
+import copy
+import gc
+import pickle
+import random
+import unittest
+import weakref
+
+from .objects import build, make_cached_tree, CachedNode
+
+
+def _fresh(obj, **kwargs):
+    """Build without reusing or storing cached definitions"""
+    return build(obj, engine="iterative", **kwargs)
+
+
+class TestReprCached(unittest.TestCase):
+    """A repeat build reuses clean definitions and rebuilds the dirty ones"""
+
+    def test_reuse(self):
+        root = make_cached_tree()
+        first = build(root)
+        self.assertEqual(first, _fresh(root))
+        self.assertTrue(root.kids[1].__dict__.get("__repr_cache__"))
+        self.assertEqual(build(root), first)
+
+    def test_assignment_invalidates(self):
+        root = make_cached_tree()
+        build(root)
+        leaf = root.kids[2].kids[1]
+        leaf.value = 42
+        self.assertFalse(leaf.__dict__.get("__repr_cache__"))
+        self.assertFalse(root.kids[2].__dict__.get("__repr_cache__"))
+        self.assertTrue(root.kids[0].__dict__.get("__repr_cache__"))
+        text = build(root)
+        self.assertIn("('42', 'int')", text)
+        self.assertEqual(text, _fresh(root))
+
+    def test_in_place_change(self):
+        root = make_cached_tree()
+        build(root)
+        root.kids[0].kids.pop()
+        # Changes in place are only seen after mark_repr_dirty()
+        root.kids[0].mark_repr_dirty()
+        self.assertEqual(build(root), _fresh(root))
+
+    def test_moved_child(self):
+        root = make_cached_tree()
+        build(root)
+        moved = root.kids[0].kids.pop()
+        root.kids[0].mark_repr_dirty()
+        root.kids[1].kids = root.kids[1].kids + [moved]
+        self.assertEqual(build(root), _fresh(root))
+        moved.value = 7
+        self.assertEqual(build(root), _fresh(root))
+
+    def test_shared_child(self):
+        root = make_cached_tree()
+        build(root)
+        # Sharing an object already held elsewhere turns later occurrences into back
+        # references, the cached definitions holding it in full must not be reused
+        root.extra = root.kids[0].kids[0]
+        root._repr_attrs = root._repr_attrs + ["extra"]
+        self.assertEqual(build(root), _fresh(root))
+        self.assertEqual(build(root), _fresh(root))
+
+    def test_depth_limited_build(self):
+        leaf = CachedNode("leaf", value=0)
+        middle = CachedNode("middle", child=leaf)
+        root = CachedNode("root", loop=None, middle=middle)
+        root.loop = root
+        build(root)
+        root._repr_attrs = root._repr_attrs + ["items"]
+        root.items = [leaf]
+        # A build of another depth reaches leaf through a back reference, the full depth
+        # definition of middle holding it is still cached and must see it change
+        build(root, depth=3)
+        leaf.value = 5
+        self.assertEqual(build(middle), _fresh(middle))
+        self.assertEqual(build(root), _fresh(root))
+
+    def test_shared_descendant(self):
+        nodes = [CachedNode(f"n{index}", kids=[], other=None) for index in range(5)]
+        nodes[0].kids = [nodes[1], nodes[2]]
+        nodes[1].kids = [nodes[3]]
+        nodes[2].kids = [nodes[4]]
+        nodes[4].other = nodes[3]
+        build(nodes[0], depth=2)
+        build(nodes[0], depth=3)
+        # The definitions reused for n1 and n4 both hold n3, which a fresh build gives
+        # once in full and once as a back reference
+        nodes[2].other = nodes[1]
+        text = build(nodes[0], depth=3)
+        self.assertEqual(text, _fresh(nodes[0], depth=3))
+        self.assertIn("reprref", text)
+
+    def test_mutations(self):
+        # Depth limited builds cache definitions under several keys, each repeat build
+        # must still match a fresh one after any assignment
+        for seed in range(100):
+            rng = random.Random(seed)
+            nodes = [CachedNode(f"n{index}", kids=[], other=None) for index in range(6)]
+            for index in range(1, len(nodes)):
+                nodes[rng.randrange(index)].kids.append(nodes[index])
+            texts = []
+            for _ in range(40):
+                node = rng.choice(nodes)
+                if rng.random() < 0.5:
+                    node.other = rng.choice(nodes + [None])
+                else:
+                    node.kids = rng.sample(nodes, rng.randrange(3))
+                depth = rng.choice([2, 3, 4])
+                texts.append(
+                    (build(nodes[0], depth=depth), _fresh(nodes[0], depth=depth))
+                )
+            with self.subTest(seed=seed):
+                for text, expected in texts:
+                    self.assertEqual(text, expected)
+
+    def test_reused_parent_id(self):
+        child = CachedNode("child", value=1)
+        first = CachedNode("first", kids=[child])
+        build(first)
+        del first
+        gc.collect()
+        second = CachedNode("second", kids=[child])
+        # Stand in for a collected parent whose id() is reused by second
+        dead = CachedNode("dead")
+        parents = child.__dict__["__repr_parents__"]
+        parents[id(second)] = weakref.ref(dead)
+        del dead
+        gc.collect()
+        build(second)
+        self.assertEqual(len(parents), 1)
+        self.assertIs(parents[id(second)](), second)
+        child.value = 2
+        self.assertEqual(build(second), _fresh(second))
+
+    def test_pickle(self):
+        root = CachedNode("c", child=CachedNode("k", v=1), kids=[CachedNode("l", v=2)])
+        text = build(root)
+        build(root)
+        for clone in (
+            pickle.loads(pickle.dumps(root)),
+            copy.copy(root),
+            copy.deepcopy(root),
+        ):
+            with self.subTest(clone=clone):
+                self.assertEqual(clone, root)
+                self.assertNotIn("__repr_cache__", clone.__dict__)
+                if clone.child is not root.child:
+                    self.assertNotIn("__repr_parents__", clone.child.__dict__)
+                self.assertEqual(build(clone), text)
+        clone = pickle.loads(pickle.dumps(root))
+        build(clone)
+        clone.child.v = 3
+        self.assertEqual(build(clone), _fresh(clone))
+        self.assertEqual(build(root), text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of columnar definitions of lists of objects of one class
+"""
+import unittest
+
+from reprbuild import (
+    build_repr,
+    fingerprint,
+    format_repr,
+    ReprBuildError,
+    ReprColumns,
+    ReprParser,
+)
+from reprbuild.reprcolumns import expand_columns, is_columnar
+from .objects import build, Leaf, Node, REBUILDERS
+
+
+def _table(size=20):
+    rows = [Leaf(f"r{index}", value=index, score=index / 2) for index in range(size)]
+    return Node("table", records=rows, few=rows[:3])
+
+
+class TestColumns(unittest.TestCase):
+    """Columnar lists read and rebuild as the list built row by row"""
+
+    def test_equivalence(self):
+        table = _table()
+        text = build(table)
+        columnar = build(table, columnar=True)
+        self.assertLess(len(columnar), len(text))
+        parser = ReprParser(columnar, rebuilders=REBUILDERS)
+        records = parser.obj_defn["records"][1]
+        self.assertTrue(is_columnar(records))
+        self.assertEqual(
+            expand_columns(records), ReprParser(text).obj_defn["records"][1]
+        )
+        self.assertEqual(format_repr(columnar), format_repr(text))
+        self.assertEqual(
+            parser.fingerprint(), fingerprint(table, attr_list=table._repr_attrs)
+        )
+        self.assertEqual(parser.rebuild(engine="tree", rebuild_members=True), table)
+
+    def test_view(self):
+        table = _table()
+        parser = ReprParser(build(table, columnar=True))
+        columns = parser.get_columns("records")
+        self.assertIsInstance(columns, ReprColumns)
+        self.assertEqual(len(columns), 20)
+        self.assertEqual(columns.class_name, "Leaf")
+        self.assertEqual(columns.column("value"), list(range(20)))
+        self.assertEqual(columns.names[:2], ["r0", "r1"])
+        self.assertEqual(columns.row(4)[1]["score"], ["class: float", ("2.0", "float")])
+        # Lists below the threshold are built row by row
+        self.assertIsNone(parser.get_columns("few"))
+
+    def test_mixed_rows(self):
+        table = _table()
+        table.records[5] = Node("odd", value=5)
+        obj_repr = build(table, columnar=True)
+        self.assertIsNone(ReprParser(obj_repr).get_columns("records"))
+        self.assertEqual(obj_repr, build(table))
+
+    def test_threshold(self):
+        table = _table(5)
+        obj_repr = build(table, columnar=3)
+        parser = ReprParser(obj_repr)
+        self.assertIsNotNone(parser.get_columns("records"))
+        # Its rows were already built in records, so few holds back references
+        self.assertIsNone(parser.get_columns("few"))
+        with self.assertRaises(ReprBuildError):
+            build_repr(table, columnar=0)
+        with self.assertRaises(ReprBuildError):
+            build_repr(table, columnar=True, max_items=10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of diff_repr and apply_diff
+"""
+import unittest
+
+from reprbuild import (
+    apply_diff,
+    diff_repr,
+    parse_literal,
+    ReprBuildError,
+    ReprParser,
+)
+from .objects import build, make_tree, Leaf
+
+
+class TestDiff(unittest.TestCase):
+    """diff_repr finds the changes apply_diff needs to rebuild the later snapshot"""
+
+    def test_unchanged(self):
+        tree = make_tree()
+        self.assertEqual(diff_repr(build(tree), build(tree)), [])
+
+    def test_round_trip(self):
+        tree = make_tree()
+        old = build(tree)
+        tree.kids[2].kids[0].count = 7
+        tree.kids[2].kids.append(Leaf("extra", value=1))
+        del tree.kids[0].kids[2]
+        tree.lookup["added"] = 1.5
+        tree.kids[1] = Leaf("swapped")
+        new = build(tree)
+        changes = diff_repr(old, new)
+        kinds = {change[0] for change in changes}
+        self.assertEqual(kinds, {"added", "removed", "changed", "class_changed"})
+        old_parsed = parse_literal(old)
+        self.assertEqual(apply_diff(old, changes), parse_literal(new))
+        self.assertEqual(apply_diff(old_parsed, changes), parse_literal(new))
+        # The representation the changes are applied to is not modified
+        self.assertEqual(old_parsed, parse_literal(old))
+
+    def test_changed_path(self):
+        tree = make_tree(2, 1)
+        old = build(tree)
+        tree.count = 5
+        self.assertEqual(
+            diff_repr(ReprParser(old), ReprParser(build(tree))),
+            [("changed", (1, "count", 1, 0), "2", "5")],
+        )
+
+    def test_invalid_change(self):
+        tree = make_tree(2, 1)
+        with self.assertRaises(ReprBuildError):
+            apply_diff(build(tree), [("moved", (1,), None, None)])
+        with self.assertRaises(ReprBuildError):
+            apply_diff(build(tree), [("changed", (1, "missing", 3), None, "1")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of format_repr and print_repr
+"""
+import io
+import unittest
+
+from reprbuild import format_repr, parse_literal, print_repr
+from .objects import build, make_tree
+
+
+class TestFormat(unittest.TestCase):
+    """format_repr and print_repr give the same lines for every input"""
+
+    def test_inputs(self):
+        root = make_tree()
+        text = build(root)
+        expected = format_repr(text)
+        self.assertIn("n12 : Node", expected)
+        for obj_repr in (
+            parse_literal(text),
+            build(root, format="binary"),
+            build(root, format="compact"),
+        ):
+            with self.subTest(kind=type(obj_repr).__name__):
+                self.assertEqual(format_repr(obj_repr), expected)
+        stream = io.StringIO()
+        print_repr(text, file=stream)
+        self.assertEqual(stream.getvalue().rstrip("\n"), expected.rstrip("\n"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of ReprParser.from_file
+"""
+import os
+import tempfile
+import unittest
+
+from reprbuild import ReprBuildError, ReprParser
+from .objects import build, make_tree, REBUILDERS
+
+
+class TestFromFile(unittest.TestCase):
+    """Files of every format parse as the representations written to them"""
+
+    def test_formats(self):
+        tree = make_tree()
+        with tempfile.TemporaryDirectory() as directory:
+            for output_format in ("text", "binary", "compact"):
+                obj_repr = build(tree, format=output_format)
+                path = os.path.join(directory, output_format)
+                with open(path, "wb") as repr_file:
+                    repr_file.write(
+                        obj_repr if isinstance(obj_repr, bytes) else obj_repr.encode()
+                    )
+                for mmap in (True, False):
+                    with self.subTest(format=output_format, mmap=mmap):
+                        parser = ReprParser.from_file(
+                            path, mmap=mmap, rebuilders=REBUILDERS
+                        )
+                        self.assertEqual(
+                            parser.rebuild(engine="tree", rebuild_members=True), tree
+                        )
+            path = os.path.join(directory, "invalid")
+            with open(path, "wb") as repr_file:
+                repr_file.write(b"[1, 2")
+            with self.assertRaises(ReprBuildError):
+                ReprParser.from_file(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the type handlers
+"""
+import unittest
+from datetime import datetime
+
+from reprbuild import (
+    build_repr,
+    register_type_handler,
+    unregister_type_handler,
+    ReprBuildError,
+    ReprParser,
+)
+from .objects import build, Node
+
+
+class TestTypeHandlers(unittest.TestCase):
+    """Registered handlers build the definitions of the values of their classes"""
+
+    def test_register(self):
+        event = Node("event", when=datetime(2024, 1, 2, 3, 4, 5))
+        register_type_handler(datetime, lambda value: (value.isoformat(), "datetime"))
+        try:
+            obj_repr = build(event)
+            self.assertEqual(
+                ReprParser(obj_repr).obj_defn["when"],
+                ["class: datetime", ("2024-01-02T03:04:05", "datetime")],
+            )
+            for engine in ("iterative",):
+                self.assertEqual(
+                    build(event, engine=engine),
+                    obj_repr,
+                )
+        finally:
+            unregister_type_handler(datetime)
+        self.assertNotIn("2024-01-02T03:04:05", build_repr(event, attr_list=["when"]))
+
+    def test_invalid(self):
+        with self.assertRaises(ReprBuildError):
+            register_type_handler(str, repr)
+        with self.assertRaises(ReprBuildError):
+            register_type_handler(datetime, "not callable")
+        with self.assertRaises(ReprBuildError):
+            unregister_type_handler(datetime)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the Merkle fingerprints of objects and representations
+"""
+import unittest
+
+from reprbuild import fingerprint, ReprParser
+from .objects import build, make_tree, sample_graphs, Node
+
+
+class TestFingerprint(unittest.TestCase):
+    """fingerprint(obj) equals the fingerprint of the representation of obj"""
+
+    def test_equivalence(self):
+        for root in sample_graphs():
+            for kwargs in ({}, {"depth": 2}, {"shared_refs": False}):
+                if kwargs.get("shared_refs") is False and root.name == "root":
+                    continue
+                with self.subTest(root=root.name, **kwargs):
+                    obj_repr = build(root, **kwargs)
+                    self.assertEqual(
+                        fingerprint(root, attr_list=root._repr_attrs, **kwargs),
+                        ReprParser(obj_repr).fingerprint(),
+                    )
+
+    def test_members(self):
+        tree = make_tree()
+        found = fingerprint(tree, attr_list=tree._repr_attrs)
+        tree.kids[2].kids[1].count = 99
+        changed = fingerprint(tree, attr_list=tree._repr_attrs)
+        self.assertNotEqual(found, changed)
+        self.assertEqual(found.get(("kids", 0)), changed.get(("kids", 0)))
+        self.assertNotEqual(found.get(("kids", 2)), changed.get(("kids", 2)))
+        self.assertEqual(len(found.hexdigest()), 32)
+
+    def test_builtin_members(self):
+        first = Node("a", count=3, ratio=0.5, pair=("x", 2), flags=(True, False))
+        found = fingerprint(first, attr_list=first._repr_attrs)
+        self.assertEqual(found, ReprParser(build(first)).fingerprint())
+        for attr_name in ("count", "ratio", "pair", "flags"):
+            with self.subTest(attr_name=attr_name):
+                self.assertEqual(
+                    found.get(attr_name),
+                    ReprParser(build(first)).fingerprint().get(attr_name),
+                )
+        second = Node("a", count=4, ratio=0.5, pair=("x", 2), flags=(True, False))
+        changed = fingerprint(second, attr_list=second._repr_attrs)
+        self.assertNotEqual(found, changed)
+        self.assertNotEqual(found.get("count"), changed.get("count"))
+        self.assertEqual(found.get("ratio"), changed.get("ratio"))
+
+    def test_order_independent(self):
+        first = Node("a", table={"x": 1, "y": 2}, members={3, 1, 2})
+        second = Node("a", table={"y": 2, "x": 1}, members={2, 3, 1})
+        self.assertEqual(
+            fingerprint(first, attr_list=first._repr_attrs),
+            fingerprint(second, attr_list=second._repr_attrs),
+        )
+
+    def test_shared_order_independent(self):
+        shared = Node("shared", count=3)
+        first = Node("a", table={"x": shared, "y": shared, "z": [shared]})
+        second = Node("a", table={"z": [shared], "y": shared, "x": shared})
+        found = fingerprint(first, attr_list=first._repr_attrs)
+        self.assertEqual(found, fingerprint(second, attr_list=second._repr_attrs))
+        self.assertEqual(found, ReprParser(build(second)).fingerprint())
+        self.assertEqual(found.get(("table", "y")), found.get(("table", "x")))
+
+    def test_shared_definition(self):
+        # The parsed representation holds the same () for both members
+        root = Node("r", a0=(), a1=())
+        found = fingerprint(root, attr_list=root._repr_attrs)
+        self.assertEqual(found, ReprParser(build(root)).fingerprint())
+        self.assertEqual(found.get("a0"), found.get("a1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
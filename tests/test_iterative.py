@@ -0,0 +1,46 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the explicit work stack build engine
+"""
+import unittest
+
+from reprbuild.constants import MAXRECURSION
+from .objects import build, sample_graphs, Node
+
+
+class TestIterative(unittest.TestCase):
+    """The iterative engine gives the output of the recursive engine"""
+
+    def test_equivalence(self):
+        for root in sample_graphs():
+            for kwargs in ({}, {"shared_refs": False}, {"depth": 2}):
+                if kwargs.get("shared_refs") is False and root.name == "root":
+                    continue
+                with self.subTest(root=root.name, **kwargs):
+                    self.assertEqual(
+                        build(root, engine="iterative", **kwargs),
+                        build(root, **kwargs),
+                    )
+
+    def test_deep_chain(self):
+        head = None
+        for index in range(MAXRECURSION * 5):
+            head = Node(f"l{index}", next=head)
+        text = build(head, engine="iterative")
+        self.assertEqual(text.count("class: Node"), MAXRECURSION * 5)
+        limited = build(head, engine="iterative", max_recursion=10)
+        self.assertIn("<Recursion limit of 10 exceeded>", limited)
+
+
+if __name__ == "__main__":
+    unittest.main()
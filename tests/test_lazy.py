@@ -0,0 +1,34 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the lazy mode of ReprParser
+"""
+import unittest
+
+from reprbuild import ReprParser
+from .objects import build, make_tree, REBUILDERS
+
+
+class TestLazy(unittest.TestCase):
+    """Members parsed on first use read as the members of a full parse"""
+
+    def test_members(self):
+        tree = make_tree()
+        text = build(tree)
+        lazy = ReprParser(text, rebuilders=REBUILDERS, lazy=True)
+        self.assertEqual(lazy.get_int("count"), 3)
+        self.assertEqual(dict(lazy.obj_defn), ReprParser(text).obj_defn)
+        self.assertEqual(lazy.rebuild(engine="tree", rebuild_members=True), tree)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,53 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the representation parser of reprliteral
+"""
+import ast
+import unittest
+
+from reprbuild import parse_literal, ReprSyntaxError
+from .objects import build, sample_graphs
+
+
+class TestParseLiteral(unittest.TestCase):
+    """parse_literal gives the value of ast.literal_eval for representations"""
+
+    def test_representations(self):
+        for root in sample_graphs():
+            text = build(root)
+            self.assertEqual(parse_literal(text), ast.literal_eval(text))
+
+    def test_literals(self):
+        for text in (
+            "[]",
+            "()",
+            "(1,)",
+            "{}",
+            "{'a': [1, 2.5, -3, 1e-07, 2j, (1-2j)], 'b': ('x', \"y'z\")}",
+            "[True, False, None, b'\\x00bytes', 'caf\\xe9', '\\n\\t']",
+            "{1, 2, 3}",
+            "[[[['deep']]]]",
+            "  [ 1 ,2 ]  ",
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(parse_literal(text), ast.literal_eval(text))
+
+    def test_invalid(self):
+        for text in ("", "[1, 2", "[1 2]", "{'a' 1}", "[1]]", "[x]", "1 +"):
+            with self.subTest(text=text):
+                with self.assertRaises(ReprSyntaxError):
+                    parse_literal(text)
+
+
+if __name__ == "__main__":
+    unittest.main()
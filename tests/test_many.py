@@ -0,0 +1,99 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the batch functions build_repr_many, ReprParser.parse_many and rebuild_many
+"""
+import unittest
+
+from reprbuild import build_repr_many, ReprParser
+from .objects import build, make_shared, make_tree, Node, REBUILDERS
+
+
+class Slotted:
+    """Value without __dict__ whose instances are named"""
+
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return f"Slotted({self.name!r})"
+
+
+class TestBatch(unittest.TestCase):
+    """A batch gives the results of a loop over the functions for one object"""
+
+    def test_build(self):
+        roots = [make_tree(2, 2, f"t{index}") for index in range(4)]
+        expected = [build(root) for root in roots]
+        self.assertEqual(
+            build_repr_many(roots, attr_list=roots[0]._repr_attrs), expected
+        )
+        self.assertEqual(
+            list(
+                build_repr_many(
+                    roots, as_generator=True, attr_list=roots[0]._repr_attrs
+                )
+            ),
+            expected,
+        )
+        # Summaries shared across the batch do not leak names or back references
+        shared = [make_shared() for _ in range(3)]
+        for kwargs in ({}, {"depth": 2}, {"format": "compact"}):
+            with self.subTest(**kwargs):
+                self.assertEqual(
+                    build_repr_many(shared, attr_list=shared[0]._repr_attrs, **kwargs),
+                    [build(root, **kwargs) for root in shared],
+                )
+        values = [Node(f"v{index}", value=Slotted(f"s{index}")) for index in range(2)]
+        texts = build_repr_many(values, attr_list=values[0]._repr_attrs)
+        self.assertEqual(texts, [build(value) for value in values])
+        self.assertIn("name: s1", texts[1])
+
+    def test_parse(self):
+        trees = [make_tree(2, 2, f"t{index}") for index in range(5)]
+        texts = [build(tree) for tree in trees]
+        parsers = ReprParser.parse_many(texts, rebuilders=REBUILDERS)
+        self.assertEqual(
+            [parser.name for parser in parsers], [f"t{i}" for i in range(5)]
+        )
+        self.assertEqual(
+            [parser.obj_defn for parser in parsers],
+            [ReprParser(text).obj_defn for text in texts],
+        )
+        # Strings repeated across the batch are held once
+        first, second = (next(iter(parser.obj_defn)) for parser in parsers[:2])
+        self.assertEqual(first, second)
+        self.assertIs(first, second)
+        self.assertEqual(
+            ReprParser.rebuild_many(
+                texts, rebuilders=REBUILDERS, engine="tree", rebuild_members=True
+            ),
+            trees,
+        )
+        self.assertEqual(
+            list(
+                ReprParser.rebuild_many(
+                    texts,
+                    rebuilders=REBUILDERS,
+                    engine="tree",
+                    rebuild_members=True,
+                    as_generator=True,
+                )
+            ),
+            trees,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the lossless NumPy array definitions
+"""
+import unittest
+
+import numpy as np
+
+from reprbuild import ReprParser
+from .objects import build, Node, REBUILDERS
+
+
+class TestNdarray(unittest.TestCase):
+    """Arrays are rebuilt with their dtype, shape, order and every element"""
+
+    def test_round_trip(self):
+        holder = Node(
+            "holder",
+            small=np.arange(6, dtype=np.int16).reshape(2, 3),
+            large=np.linspace(0.0, 1.0, 5000),
+            fortran=np.asfortranarray(np.arange(12.0).reshape(3, 4)),
+        )
+        parser = ReprParser(build(holder), rebuilders=REBUILDERS)
+        for name in ("small", "large", "fortran"):
+            with self.subTest(name=name):
+                array = parser.get_ndarray(name)
+                expected = getattr(holder, name)
+                self.assertEqual(array.dtype, expected.dtype)
+                self.assertTrue(np.array_equal(array, expected))
+                self.assertEqual(array.flags.f_contiguous, expected.flags.f_contiguous)
+                self.assertTrue(array.flags.writeable)
+        rebuilt = parser.rebuild(engine="tree", rebuild_members=True)
+        self.assertTrue(np.array_equal(rebuilt.large, holder.large))
+
+    def test_object_array(self):
+        objects = np.array([1, "a", None], dtype=object)
+        parser = ReprParser(
+            build(Node("holder", objects=objects)), rebuilders=REBUILDERS
+        )
+        self.assertIsNone(parser.get_ndarray("objects"))
+        for engine in ("parser", "tree"):
+            with self.subTest(engine=engine):
+                rebuilt = parser.rebuild(engine=engine)
+                self.assertEqual(rebuilt.objects, repr(objects))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of parallel builds
+"""
+import unittest
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from reprbuild import (
+    build_repr,
+    build_repr_many,
+    register_type_handler,
+    ReprBuildError,
+    ReprParser,
+    unregister_type_handler,
+)
+from .objects import build, Leaf, Node
+
+
+class Celsius:
+    """Value built by a type handler registered while a process pool is running"""
+
+    def __init__(self, degrees):
+        self.degrees = degrees
+
+    def __repr__(self):
+        return f"Celsius({self.degrees})"
+
+
+class Opaque:
+    """Value whose repr() holds its address"""
+
+
+def _celsius_defn(value):
+    return (f"{value.degrees}C", "celsius")
+
+
+def _graph(size=300):
+    shared = Leaf("shared", value=0)
+    items = [Leaf(f"i{index}", value=index, score=index / 3) for index in range(size)]
+    items[size // 2] = shared
+    return Node(
+        "root",
+        first=shared,
+        items=items,
+        numbers=list(range(size)),
+        table={f"k{index}": index * 2 for index in range(size)},
+        nested=[[index, str(index)] for index in range(size)],
+    )
+
+
+class TestParallel(unittest.TestCase):
+    """Parallel builds give the output of a serial build"""
+
+    def test_threads(self):
+        root = _graph()
+        expected = build(root)
+        self.assertEqual(
+            build(root, workers=3, parallel_threshold=50),
+            expected,
+        )
+        with ThreadPoolExecutor(2) as pool:
+            self.assertEqual(
+                build(
+                    root,
+                    executor=pool,
+                    parallel_threshold=50,
+                ),
+                expected,
+            )
+
+    def test_processes(self):
+        root = _graph()
+        expected = build(root)
+        with ProcessPoolExecutor(2) as pool:
+            text = build(root, executor=pool, parallel_threshold=50)
+            self.assertEqual(text, expected)
+            texts = [build(_graph(60)) for _ in range(5)]
+            self.assertEqual(
+                [
+                    parser.obj_defn
+                    for parser in ReprParser.parse_many(texts, executor=pool)
+                ],
+                [ReprParser(cur).obj_defn for cur in texts],
+            )
+            roots = [_graph(60) for _ in range(5)]
+            self.assertEqual(
+                build_repr_many(roots, attr_list=roots[0]._repr_attrs, executor=pool),
+                [build(cur) for cur in roots],
+            )
+
+    def test_processes_serial_values(self):
+        with ProcessPoolExecutor(2) as pool:
+            pool.submit(int).result()
+            register_type_handler(Celsius, _celsius_defn, immutable=True)
+            try:
+                temps = [
+                    Leaf(f"t{index}", value=Celsius(index)) for index in range(100)
+                ]
+                root = Node("root", temps=temps)
+                text = build(
+                    root,
+                    executor=pool,
+                    parallel_threshold=50,
+                )
+                self.assertEqual(text, build(root))
+                self.assertIn("('99C', 'celsius')", text)
+            finally:
+                unregister_type_handler(Celsius)
+            root = Node("root", opaque=[Opaque() for _ in range(100)])
+            text = build(root, executor=pool, parallel_threshold=50)
+            self.assertEqual(text, build(root))
+
+    def test_invalid(self):
+        root = _graph(10)
+        with self.assertRaises(ReprBuildError):
+            build_repr(root, workers=2, engine="iterative")
+        with self.assertRaises(ReprBuildError):
+            build_repr(root, workers=2, shared_refs=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
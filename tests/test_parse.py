@@ -0,0 +1,48 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of ReprParser
+"""
+import unittest
+
+from reprbuild import ReprBuildError, ReprParser
+from .objects import build, make_tree
+
+
+class TestReprParser(unittest.TestCase):
+    """Accessors and the inputs accepted by ReprParser"""
+
+    def test_accessors(self):
+        parser = ReprParser(build(make_tree()))
+        self.assertEqual(parser.class_name, "Node")
+        self.assertEqual(parser.name, "n")
+        self.assertEqual(parser.get_int("count"), 3)
+        self.assertEqual(parser.get_tuple("flags"), ("False", "'x'"))
+        self.assertEqual(parser.get_dict("lookup"), {"first": "'n'", "depth": "3"})
+        kids = parser.get_list("kids")
+        self.assertEqual(kids[0], "class: list")
+        self.assertEqual(len(kids[1]), 3)
+        self.assertEqual(parser.get_int("missing", 5), 5)
+        kid = parser.get_parser(kids[1][1])
+        self.assertEqual(kid.name, "n1")
+
+    def test_invalid(self):
+        for obj_repr in ("not a representation", "[1, 2]", ["a", "b", "c"]):
+            with self.subTest(obj_repr=obj_repr):
+                with self.assertRaises(ReprBuildError):
+                    ReprParser(obj_repr)
+        with self.assertRaises(ReprBuildError):
+            ReprParser(build(make_tree())).rebuild()
+
+
+if __name__ == "__main__":
+    unittest.main()
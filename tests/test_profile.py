@@ -0,0 +1,74 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the build, parse and rebuild profiles
+"""
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+from reprbuild import profile_repr, ReprBuildError, ReprParser
+from .objects import build, make_tree, REBUILDERS
+
+
+class TestProfile(unittest.TestCase):
+    """profile_repr records the calls made inside its block and nothing after it"""
+
+    def test_profile(self):
+        tree = make_tree()
+        with profile_repr() as profile:
+            text = build(tree)
+            parser = ReprParser(text, rebuilders=REBUILDERS)
+            parser.get_list("kids")
+            parser.rebuild()
+        self.assertEqual(text, build(tree))
+        totals = profile.totals()
+        self.assertEqual(totals["build_object_defn"]["calls"], 40)
+        self.assertGreater(totals["build_attribute_defn"]["calls"], 40)
+        self.assertGreater(totals["build_attribute_defn"]["nodes"], 0)
+        # The parser splits its nodes through its cache, not through split_repr
+        self.assertGreater(totals["split_repr"]["calls"], 10)
+        self.assertGreater(totals["ReprParser.rebuild"]["calls"], 0)
+        rows = profile.rows(sort="calls")
+        self.assertEqual(rows, sorted(rows, key=lambda row: -row["calls"]))
+        attributes = {row["attribute"] for row in rows}
+        self.assertIn("kids", attributes)
+        stream = io.StringIO()
+        profile.print(limit=3, file=stream)
+        self.assertEqual(len(stream.getvalue().splitlines()), 4)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "profile.json")
+            profile.dump(path)
+            with open(path, encoding="utf-8") as stats_file:
+                self.assertEqual(len(json.load(stats_file)), len(rows))
+
+    def test_other_thread(self):
+        with profile_repr() as profile:
+            thread = threading.Thread(target=build, args=(make_tree(),))
+            thread.start()
+            thread.join()
+        self.assertEqual(profile.totals(), {})
+
+    def test_invalid(self):
+        with profile_repr() as profile:
+            with self.assertRaises(ReprBuildError):
+                with profile_repr():
+                    pass
+        with self.assertRaises(ReprBuildError):
+            profile.rows(sort="unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the tree rebuild engine
+"""
+import unittest
+
+from reprbuild import ReprBuildError, ReprParser
+from .objects import build, make_tree, Leaf, Node, REBUILDERS
+
+
+class TestTreeRebuild(unittest.TestCase):
+    """The tree engine rebuilds the object the parser engine rebuilds, or with
+    rebuild_members the objects and values held by containers"""
+
+    def test_engines(self):
+        root = Node(
+            "r",
+            items=[1, "s", 2.5],
+            table={"a": 1, "b": "t"},
+            pair=(1, "x"),
+            tags={"u"},
+            label="str",
+            kids=[Leaf("l", v=[3, "w"])],
+        )
+        for graph in (make_tree(), root):
+            with self.subTest(graph=graph.name):
+                parser = ReprParser(build(graph), rebuilders=REBUILDERS)
+                self.assertEqual(parser.rebuild(engine="tree"), parser.rebuild())
+                self.assertEqual(
+                    parser.rebuild(engine="tree", flyweight=True), parser.rebuild()
+                )
+                self.assertEqual(
+                    parser.rebuild(engine="tree", rebuild_members=True), graph
+                )
+        self.assertEqual(
+            ReprParser(build(root), rebuilders=REBUILDERS).rebuild(engine="tree").items,
+            ["1", "'s'", "2.5"],
+        )
+        tree = make_tree()
+        parser = ReprParser(build(tree), rebuilders=REBUILDERS)
+        shared = parser.rebuild(engine="tree", flyweight=True, rebuild_members=True)
+        self.assertEqual(shared, tree)
+        self.assertIs(shared.kids[0].kids[0].flags, shared.kids[1].kids[2].flags)
+        with self.assertRaises(ReprBuildError):
+            parser.rebuild(engine="unknown")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the back references to objects reached more than once
+"""
+import unittest
+
+from reprbuild import parse_literal, ReprParser
+from reprbuild.constants import REFERENCE
+from .objects import build, make_shared, Leaf, Node, REBUILDERS
+
+
+class TestSharedRefs(unittest.TestCase):
+    """Back references to objects reached more than once"""
+
+    def test_back_references(self):
+        root = make_shared()
+        obj_defn = parse_literal(build(root))
+        left = obj_defn[1]["left"]
+        self.assertTrue(left[0].endswith(",ref: 3"))
+        self.assertEqual(left[1]["items"][1][0][1], ("1", REFERENCE))
+        self.assertEqual(left[1]["back"][1], ("2", REFERENCE))
+
+    def test_rebuild_shares_instances(self):
+        root = make_shared()
+        parser = ReprParser(build(root), rebuilders=REBUILDERS)
+        for engine in ("parser", "tree"):
+            rebuilt = parser.rebuild(engine=engine)
+            self.assertIs(rebuilt.left.item, rebuilt.right.item)
+            self.assertIs(rebuilt.right.other, rebuilt.left)
+
+    def test_without_shared_refs(self):
+        shared = Leaf("shared", value=1)
+        root = Node("root", items=[shared, shared])
+        text = build(root, shared_refs=False)
+        self.assertNotIn(REFERENCE, text)
+        self.assertEqual(text.count("'class: Leaf,name: shared'"), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
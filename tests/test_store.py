@@ -0,0 +1,135 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the snapshot store
+"""
+import os
+import tempfile
+import unittest
+
+from reprbuild import parse_literal, ReprBuildError, ReprStore
+from .objects import build, make_tree, Leaf, Node
+
+
+class TestReprStore(unittest.TestCase):
+    """Snapshots load back as they were stored and share their unchanged subtrees"""
+
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()  # pylint: disable=consider-using-with
+        self.path = self._dir.name
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_round_trip(self):
+        tree = make_tree()
+        text = build(tree)
+        with ReprStore(self.path) as store:
+            store.put("tree", text, timestamp=1.0)
+            self.assertEqual(store.load("tree"), parse_literal(text))
+            self.assertEqual(store.load_repr("tree"), text)
+            self.assertEqual(
+                store.load("tree", (1, "kids", 1, 2)),
+                parse_literal(text)[1]["kids"][1][2],
+            )
+        # Reopened from disk
+        with ReprStore(self.path) as store:
+            self.assertEqual(store.load_repr("tree"), text)
+            self.assertEqual(len(store.snapshots("tree")), 1)
+
+    def test_formats(self):
+        tree = make_tree()
+        text = build(tree)
+        with ReprStore(self.path) as store:
+            store.put("text", text)
+            store.put("compact", build(tree, format="compact"))
+            store.put("parsed", parse_literal(text))
+            for name in ("text", "compact", "parsed"):
+                self.assertEqual(store.load_repr(name), text)
+            # The same tree is stored once
+            self.assertEqual(len({entry[2] for entry in store.snapshots()}), 1)
+
+    def test_history(self):
+        root = Node(
+            "root", items=[Leaf(f"l{index}", value=index) for index in range(2000)]
+        )
+        with ReprStore(self.path, page_size=64) as store:
+            store.put("root", build(root), timestamp=10.0)
+            first = store.stats()
+            root.items[1000].value = -1
+            root.items.append(Leaf("new"))
+            store.put("root", build(root), timestamp=20.0)
+            grown = store.stats()["bytes"] - first["bytes"]
+            # Only the changed pages and the chunks above them are added
+            self.assertLess(grown, first["bytes"] / 10)
+            self.assertEqual(store.load_repr("root"), build(root))
+            old = store.load("root", (1, "items", 1, 1000), timestamp=15.0)
+            self.assertEqual(old[1]["value"], ["class: int", ("1000", "int")])
+            self.assertEqual(store.find("root", timestamp=25.0)[1], 20.0)
+            with self.assertRaises(ReprBuildError):
+                store.find("root", timestamp=5.0)
+            with self.assertRaises(ReprBuildError):
+                store.load("missing")
+            with self.assertRaises(ReprBuildError):
+                store.load("root", (1, "missing"))
+            # Pages end after the same members, so a front insert only adds a page or two
+            before = store.stats()["bytes"]
+            root.items.insert(0, Leaf("first"))
+            store.put("root", build(root), timestamp=30.0)
+            self.assertLess(store.stats()["bytes"] - before, first["bytes"] / 10)
+            self.assertEqual(store.load_repr("root"), build(root))
+            moved = store.load("root", (1, "items", 1, 1001))
+            self.assertEqual(moved[1]["value"], ["class: int", ("-1", "int")])
+
+    def test_dict_pages_and_sets(self):
+        root = Node(
+            "root",
+            table={f"k{index}": index for index in range(1000)},
+            members=set(range(50)),
+        )
+        text = build(root)
+        with ReprStore(self.path, page_size=32) as store:
+            store.put("root", text)
+            self.assertEqual(store.load("root"), parse_literal(text))
+            self.assertEqual(store.load("root", (1, "table", 1, "k517")), "517")
+            before = store.stats()["bytes"]
+            root.table = {"first": -1, **root.table}
+            store.put("root", build(root))
+            self.assertLess(store.stats()["bytes"] - before, before / 4)
+            self.assertEqual(store.load("root", (1, "table", 1, "first")), "-1")
+            self.assertEqual(store.load("root", (1, "table", 1, "k517")), "517")
+
+    def test_interrupted_write(self):
+        tree = make_tree(2, 2)
+        with ReprStore(self.path) as store:
+            store.put("tree", build(tree))
+        for name, cut in (("chunks.idx", 5), ("snapshots.jsonl", 3)):
+            with open(os.path.join(self.path, name), "ab") as partial:
+                partial.write(b"x" * cut)
+        with ReprStore(self.path) as store:
+            self.assertEqual(store.load_repr("tree"), build(tree))
+            tree.count = 9
+            store.put("tree", build(tree))
+        with ReprStore(self.path) as store:
+            self.assertEqual(store.load_repr("tree"), build(tree))
+            self.assertEqual(len(store.snapshots()), 2)
+
+    def test_invalid(self):
+        with self.assertRaises(ReprBuildError):
+            ReprStore(self.path, page_size=0)
+        with ReprStore(self.path) as store:
+            with self.assertRaises(ReprBuildError):
+                store.put("bad", "not a representation")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of iter_repr and build_repr_to
+"""
+import io
+import unittest
+
+from reprbuild import build_repr_to, iter_repr, ReprBuildError
+from reprbuild.constants import MAXRECURSION
+from .objects import build, make_tree, sample_graphs, Node
+
+
+class TestStream(unittest.TestCase):
+    """The streamed chunks join to the output of build_repr"""
+
+    def test_equivalence(self):
+        for root in sample_graphs():
+            expected = build(root)
+            chunks = list(iter_repr(root, attr_list=root._repr_attrs, chunk_size=64))
+            self.assertGreater(len(chunks), 1)
+            self.assertEqual("".join(chunks), expected)
+            stream = io.StringIO()
+            written = build_repr_to(stream, root, attr_list=root._repr_attrs)
+            self.assertEqual(stream.getvalue(), expected)
+            self.assertEqual(written, len(expected))
+
+    def test_recursion_limit(self):
+        head = None
+        for index in range(MAXRECURSION):
+            head = Node(f"l{index}", next=head)
+        for shared_refs in (True, False):
+            with self.subTest(shared_refs=shared_refs):
+                expected = build(head, shared_refs=shared_refs)
+                self.assertIn(f"<Recursion limit of {MAXRECURSION} exceeded>", expected)
+                text = "".join(
+                    iter_repr(head, attr_list=head._repr_attrs, shared_refs=shared_refs)
+                )
+                self.assertEqual(text, expected)
+        text = "".join(iter_repr(head, attr_list=head._repr_attrs, max_recursion=None))
+        self.assertEqual(text.count("class: Node"), MAXRECURSION)
+
+    def test_unknown_options(self):
+        tree = make_tree()
+        for kwargs in ({"format": "binary"}, {"engine": "recursive"}, {"dpeth": 1}):
+            with self.subTest(**kwargs):
+                with self.assertRaises(ReprBuildError):
+                    iter_repr(tree, **kwargs)
+                with self.assertRaises(ReprBuildError):
+                    build_repr_to(io.StringIO(), tree, **kwargs)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# This code is part of reprbuild
+#
+# (C) Copyright LJSB Enterprises, LLC 2022
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+"""
+Tests of the compact encoding with a symbol table
+"""
+import unittest
+
+from reprbuild import (
+    decode_symbols,
+    encode_symbols,
+    format_repr,
+    parse_literal,
+    split_repr,
+    ReprParser,
+    ReprSyntaxError,
+)
+from reprbuild.reprsymbols import is_compact
+from .objects import build, make_tree, sample_graphs, REBUILDERS
+
+
+class TestSymbols(unittest.TestCase):
+    """encode_symbols and decode_symbols round trip the parsed representation"""
+
+    def test_round_trip(self):
+        for root in sample_graphs():
+            text = build(root)
+            compact = build(root, format="compact")
+            self.assertTrue(is_compact(compact))
+            self.assertFalse(is_compact(text))
+            self.assertLess(len(compact), len(text))
+            self.assertEqual(decode_symbols(compact), parse_literal(text))
+            self.assertEqual(encode_symbols(parse_literal(text)), compact)
+            self.assertEqual(
+                build(
+                    root,
+                    format="compact",
+                    engine="iterative",
+                ),
+                compact,
+            )
+
+    def test_consumers(self):
+        tree = make_tree()
+        text = build(tree)
+        compact = encode_symbols(parse_literal(text))
+        self.assertEqual(split_repr(compact), split_repr(text))
+        self.assertEqual(format_repr(compact), format_repr(text))
+        self.assertEqual(
+            ReprParser(compact, rebuilders=REBUILDERS).rebuild(
+                engine="tree", rebuild_members=True
+            ),
+            tree,
+        )
+
+    def test_symbols_shared(self):
+        tree = make_tree()
+        obj_defn = decode_symbols(build(tree, format="compact"))
+        kids = obj_defn[1]["kids"][1]
+        self.assertIs(kids[0][1]["count"][0], kids[1][1]["count"][0])
+
+    def test_slot_values(self):
+        # Values in the slots a symbol index can be read from that are not indexes
+        for obj_defn in (
+            ["s", {"a": [5, 6, 7], "b": [5], "c": (1, 5, 6), "d": (1, 5)}],
+            ["s", {"a": ["s", ("it's", "s")], "b": ["s", ('say "hi"\n', "a")]}],
+            ["s", {"a": {(1,): "x", 2: "y", "s": "z"}, "b": {1, 2}, "c": [7, "s"]}],
+            ["s", {"a": ["s", ("1", "s")], "b": ["s", ("2", 3)], "c": [(4,), "s"]}],
+        ):
+            with self.subTest(obj_defn=obj_defn):
+                self.assertEqual(decode_symbols(encode_symbols(obj_defn)), obj_defn)
+
+    def test_unknown_symbol(self):
+        for body in ("[2, 'a']", "['a', ('1', 2)]", "['a', {2: 'b'}]", "[1, 2, 3]"):
+            with self.subTest(body=body):
+                compact = f"['reprsymbols', ['a', 'b'], {body}]"
+                if body == "[1, 2, 3]":
+                    self.assertEqual(decode_symbols(compact), [1, 2, 3])
+                    continue
+                with self.assertRaises(ReprSyntaxError):
+                    decode_symbols(compact)
+
+
+if __name__ == "__main__":
+    unittest.main()